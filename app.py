@@ -1,34 +1,29 @@
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from flask import Flask, request, render_template, redirect, url_for, flash
+from flask import Flask, Response, jsonify, request, render_template, redirect, url_for, flash, abort
 from werkzeug.utils import secure_filename
 import os
 import time
-import pandas as pd
-import tempfile
 import threading
-import logging
+import json
 
-# =======================
-# CONFIGURACIÓN DEL DRIVER
-# =======================
-
-# Initialize driver and wait as None - will be created when needed
-driver = None
-wait = None
+import metricas
+from lectura import leer_filas
+import validacion
+from persistencia import almacen
+from trabajos import MOTORES, MOTOR_ENVIO, nuevo_id_trabajo
+import progreso
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET") or "dev-secret-key"
 
 # Configura la carpeta donde se guardarán los archivos subidos
 app.config['UPLOAD_FOLDER'] = 'uploads/'
-app.config['ALLOWED_EXTENSIONS'] = {'xlsx', 'xls'}
+app.config['ALLOWED_EXTENSIONS'] = {'xlsx', 'xls', 'csv'}
+
+# Peso de cada prioridad al repartir los trabajadores entre trabajos simultáneos
+PRIORIDADES = {'normal': 1.0, 'urgente': float(os.environ.get("PESO_URGENTE", "4"))}
+
+# Filas de un mismo trabajo en proceso a la vez si la subida no dice otra cosa (0 = sin tope)
+LIMITE_POR_TRABAJO = int(os.environ.get("LIMITE_POR_TRABAJO", "0"))
 
 # Asegúrate de que la carpeta exista
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -41,577 +36,204 @@ def allowed_file(filename):
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', motor=MOTOR_ENVIO)
+
+
+def responder(mensaje, codigo=200, **extra):
+    # El formulario con JavaScript pide JSON; sin JavaScript se responde texto
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(mensaje=mensaje, **extra), codigo
+    return mensaje, codigo
 
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
     # Verifica si el archivo es parte de la solicitud
     if 'file' not in request.files:
-        return "No file part"
+        return responder("No file part", 400)
 
     file = request.files['file']
 
     # Si no seleccionaron un archivo
     if file.filename == '':
-        return "No selected file"
+        return responder("No selected file", 400)
+
+    motor = request.form.get('motor') or MOTOR_ENVIO
+    if motor not in MOTORES:
+        return responder(f"Motor no soportado: {motor}", 400)
+
+    prioridad = request.form.get('prioridad') or 'normal'
+    if prioridad not in PRIORIDADES:
+        return responder(f"Prioridad no soportada: {prioridad}", 400)
+    try:
+        limite = int(request.form.get('limite') or LIMITE_POR_TRABAJO)
+    except ValueError:
+        return responder("El límite de navegadores debe ser un número entero", 400)
 
     # Si el archivo es válido
     if file and file.filename and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        trabajo_id = nuevo_id_trabajo()
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{trabajo_id}_{filename}")
 
-        # Lee el archivo Excel y inicia procesamiento en segundo plano
+        # El archivo se lee en segundo plano fila a fila: la petición responde
+        # enseguida y el primer navegador arranca con la primera fila leída
         try:
-            datos_excel = pd.read_excel(file_path)
-            lista_datos = datos_excel.to_dict(orient='records')
-            
-            # Iniciar el procesamiento en un hilo separado
-            def procesar_en_segundo_plano():
-                usuarios_procesados = 0
-                usuarios_fallidos = 0
-                
-                try:
-                    for datos in lista_datos:
-                        print(f"Procesando usuario: {datos.get('usuario', 'desconocido')}")
-                        
-                        try:
-                            # Ejecutar la automatización para este usuario
-                            iniciar_sesion(datos)
-                            time.sleep(2)
-                            
-                            navegar_a_enlace()
-                            completar_formulario()
-                            time.sleep(1)
-                            
-                            formulario(datos)
-                            
-                            cerrar_sesion()
-                            usuarios_procesados += 1
-                            print(f"✓ Usuario {datos.get('usuario', 'desconocido')} procesado exitosamente")
-                            
-                        except Exception as user_error:
-                            usuarios_fallidos += 1
-                            print(f"✗ Error procesando usuario {datos.get('usuario', 'desconocido')}: {user_error}")
-                            try:
-                                cerrar_sesion()  # Intentar cerrar sesión en caso de error
-                            except:
-                                pass
-                            continue
-                    
-                    print(f"✓ PROCESAMIENTO COMPLETADO: {usuarios_procesados} exitosos, {usuarios_fallidos} fallidos")
-                    
-                except Exception as e:
-                    print(f"✗ Error general en procesamiento: {e}")
-                
-                finally:
-                    # Cerrar el driver al final
-                    global driver
-                    try:
-                        if driver:
-                            driver.quit()
-                            driver = None
-                    except:
-                        pass
-                    
-                    # Limpiar archivos temporales de Firefox
-                    try:
-                        os.system("rm -rf /tmp/rust_mozprofile* /tmp/tmp* 2>/dev/null")
-                        print("✓ Perfiles temporales de Firefox eliminados")
-                    except:
-                        pass
-                    
-                    # Eliminar el archivo Excel
-                    try:
-                        os.remove(file_path)
-                        print(f"✓ Archivo Excel eliminado: {filename}")
-                    except Exception as cleanup_error:
-                        print(f"Advertencia: No se pudo eliminar el archivo: {cleanup_error}")
-            
-            # Iniciar el procesamiento en segundo plano
-            hilo_procesamiento = threading.Thread(target=procesar_en_segundo_plano)
-            hilo_procesamiento.daemon = True  # Permite que el programa termine aunque el hilo esté corriendo
-            hilo_procesamiento.start()
-            
-            return f"Archivo Excel cargado exitosamente. Procesando {len(lista_datos)} usuario(s) en segundo plano. Revisa los logs del servidor para ver el progreso."
-            
-        except Exception as e:
-            # En caso de error, intentar eliminar el archivo
-            try:
-                os.remove(file_path)
-            except:
-                pass
-            return f"Error al procesar el archivo: {e}"
-
-    return "Archivo no permitido. Solo se permiten archivos .xlsx o .xls"
-
-
-if __name__ == '__main__':
-    app.run(debug=True)
-
-# Driver initialization function
-def initialize_driver():
-    global driver, wait
-    if driver is None:
-        options = webdriver.FirefoxOptions()
-        options.add_argument('--headless')  # 👉 Oculta el navegador
-        options.add_argument('--no-sandbox')  # Necesario en entornos de servidor
-        options.add_argument('--disable-dev-shm-usage')  # Evita problemas de memoria
-        # Firefox no necesita configuración especial de binary_location
-        
-        # Configuración para Firefox - deshabilitar notificaciones y prompts
-        options.set_preference("dom.webnotifications.enabled", False)
-        options.set_preference("dom.push.enabled", False)
-        options.set_preference("signon.rememberSignons", False)
-        options.set_preference("browser.privatebrowsing.autostart", True)
-        
-        # Firefox maneja los perfiles temporales automáticamente en modo headless
-        
-        # Usar GeckoDriver del sistema
-        try:
-            service = Service()  # Usar geckodriver del PATH
-            driver = webdriver.Firefox(service=service, options=options)
-            print("✓ Firefox iniciado exitosamente")
-        except Exception as firefox_error:
-            print(f"Error iniciando Firefox: {firefox_error}")
-            raise
-        wait = WebDriverWait(driver, 30)  # Más tiempo para elementos lentos
+            file.save(file_path)
 
-# reiniciar
+            # Sin las columnas obligatorias no se arranca ningún navegador
+            faltantes = validacion.columnas_faltantes_archivo(file_path, leer_filas)
+            if faltantes:
+                os.remove(file_path)
+                return responder(f"Faltan columnas obligatorias: {', '.join(faltantes)}", 400,
+                                 columnas_faltantes=faltantes)
 
+            almacen.crear_trabajo(file_path, trabajo_id, motor)
 
-def cerrar_sesion():
-    global driver
-    if driver is None:
-        initialize_driver()
-    try:
-        # Intenta encontrar y hacer clic en el botón de cerrar sesión
-        driver.get('https://personal.migracion.gob.do/Account/Logout')
-        print("Sesión cerrada.")
-    except:
-        print("No se pudo cerrar sesión (quizás no estás logueado).")
+            seguimiento = progreso.registrar(trabajo_id, filename, motor)
+            filas = almacen.registrar_filas(trabajo_id, leer_validadas(file_path, seguimiento), seguimiento.omitir)
+            iniciar_trabajo(seguimiento, filas, file_path, motor, PRIORIDADES[prioridad], limite)
 
+            return responder(
+                f"Archivo cargado exitosamente. Procesando usuarios en segundo plano (trabajo {trabajo_id}).",
+                202,
+                trabajo_id=trabajo_id,
+                estado_url=url_for('estado_trabajo', trabajo_id=trabajo_id),
+                stream_url=url_for('stream_trabajo', trabajo_id=trabajo_id))
 
-def reiniciar_navegador():
-    global driver, wait  # Necesario para cambiar el driver global
-    try:
-        if driver:
-            driver.quit()
-    except:
-        pass
-
-    time.sleep(2)
-    driver = None
-    wait = None
-    initialize_driver()
-    print("Navegador reiniciado.")
-
-
-# Limpiar campos del formulario
-def limpiar_campos(lista_selectores):
-    global driver
-    if driver is None:
-        initialize_driver()
-    for selector in lista_selectores:
-        try:
-            campo = driver.find_element(By.CSS_SELECTOR, selector)
-            campo.clear()
-            campo.send_keys(Keys.CONTROL + "a")
-            campo.send_keys(Keys.DELETE)
         except Exception as e:
-            print(f"No se pudo limpiar el campo: {selector}. Error: {e}")
-
-
-def iniciar_sesion(datos):
-    global driver, wait
-    if driver is None:
-        initialize_driver()
-    driver.get('https://personal.migracion.gob.do/Account/Login')
-    print("Página de login cargada.")
-
-    # Esperar que cargue el formulario de inicio de sesión
-    wait.until(EC.presence_of_element_located((By.NAME, 'id')))
-
-    # Llenar usuario y contraseña
-    driver.find_element(By.NAME, 'id').send_keys(datos['usuario'])
-    driver.find_element(By.NAME, 'password').send_keys(datos['contra'])
-
-    # Clic en botón de inicio de sesión
-    driver.find_element(
-        By.XPATH,
-        '//input[@type="submit" and @value="Iniciar Sesión"]').click()
-    print("Intentando iniciar sesión...")
-
-    # Esperar que se cargue la página de bienvenida (ajusta el selector si es diferente)
-    wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'welcome')))
-    print("Sesión iniciada correctamente.")
-
-    # Cerrar popup si aparece
-    try:
-        wait.until(
-            EC.element_to_be_clickable(
-                (By.XPATH, '//button[contains(text(), "Aceptar")]'))).click()
-        print("Popup de cambio de contraseña cerrado.")
-    except TimeoutException:
-        print("No apareció popup de cambio de contraseña.")
-
-
-def navegar_a_enlace():
-    global driver, wait
-    if driver is None:
-        initialize_driver()
-    # Cambia el texto si el link es distinto
-    enlace = wait.until(
-        EC.element_to_be_clickable((By.LINK_TEXT, 'LISTA DE APLICACIONES')))
-    enlace.click()
-    print("Navegando a sección LISTA DE APLICACIONES...")
-
-    # Esperar a que cargue tabla o indicador de que la página cargó
-    wait.until(EC.presence_of_element_located((By.ID, 'tblLinks')))
-    print("Sección del formulario cargada.")
-
-
-def completar_formulario():
-    global driver, wait
-    if driver is None:
-        initialize_driver()
-    xpath = "//td[a[contains(translate(normalize-space(.), 'abcdefghijklmnopqrstuvwxyzáéíóúü', 'ABCDEFGHIJKLMNOPQRSTUVWXYZÁÉÍÓÚÜ'), 'SOLICITUD DE RENOVACIÓN CARNET DE TRABAJADORES TEMPOREROS')]]/following-sibling::td/input[@type='image']"
-
-    try:
-        input_element = wait.until(
-            EC.element_to_be_clickable((By.XPATH, xpath)))
-
-        # Scroll al elemento para asegurarnos que esté visible
-        driver.execute_script(
-            "arguments[0].scrollIntoView({block: 'center'});", input_element)
-        time.sleep(0.5)
-
-        input_element.click()
-        print(
-            "Click realizado en el formulario de renovación carnet de trabajadores temporeros."
-        )
-
-    except (TimeoutException, NoSuchElementException) as e:
-        print("No se pudo encontrar o hacer clic en el elemento:", e)
-    except Exception as e:
-        print("Error al hacer click, intentando con JavaScript:", e)
-        try:
-            driver.execute_script("arguments[0].click();", input_element)
-            print("Click realizado con JavaScript.")
-        except Exception as js_e:
-            print("También falló el click con JavaScript:", js_e)
-
-    # Esperar que cargue la siguiente página o sección
-    try:
-        wait.until(
-            EC.visibility_of_element_located((By.CLASS_NAME, "rc-wrap-t")))
-        print("Formulario cargado correctamente.")
-
-    except TimeoutException:
-        print("No se pudo confirmar la carga de la siguiente página.")
-
-    boton_aplicar = wait.until(
-        EC.presence_of_element_located((
-            By.XPATH,
-            "//div[contains(@class, 'f-right')]//button[contains(text(), 'Aplicar')]"
-        )))
-
-    # Scroll para asegurarte que esté visible
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
-                          boton_aplicar)
-
-    # Click con JavaScript
-    driver.execute_script("arguments[0].click();", boton_aplicar)
-
-    # Espera a que el formulario cargue
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located(
-            (By.ID,
-             'nombre'))  # Espera hasta que el campo 'nombre' esté disponible
-    )
-
-    # Seleccionar sede con mejor manejo
-    try:
-        sede = driver.find_element(By.ID, "radio_button_3")
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", sede)
-        time.sleep(0.5)
-        sede.click()
-        print("✓ Sede seleccionada")
-    except Exception as e:
-        print(f"✗ Error seleccionando sede: {e}")
-
-
-    # Rellenar el formulario
-def formulario(datos):
-    global driver, wait
-    if driver is None:
-        initialize_driver()
-
-    # Nombre, apellido, fecha de nacimiento y pasaporte hecho en el correo
-    pasaporte1_input = driver.find_element(
-        By.ID, 'p_tipo')  # Cambia el 'name' por el real
-    pasaporte1_input.send_keys('p')
-
-    pasaporte2_input = driver.find_element(
-        By.ID, 'p_fecha_expedicion')  # Cambia el 'name' por el real
-    pasaporte2_input.send_keys(datos['expedicion'])
-
-    pasaporte3_input = driver.find_element(
-        By.ID, 'p_fecha_expiracion')  # Cambia el 'name' por el real
-    pasaporte3_input.send_keys(datos['expiracion'])
-
-    pasaporte4_input = driver.find_element(
-        By.ID, 'p_pais_emisor')  # Cambia el 'name' por el real
-    pasaporte4_input.send_keys('hti')
-
-    # Visa4
-    visa = driver.find_element(By.ID, 'v_no')  # Cambia el 'name' por el real
-    visa.send_keys('11111111111')
-
-    visa1 = driver.find_element(By.ID,
-                                'v_tipo')  # Cambia el 'name' por el real
-    visa1.send_keys('p')
-
-    visa2 = driver.find_element(
-        By.ID, 'v_fecha_expedicion')  # Cambia el 'name' por el real
-    visa2.send_keys(datos['expedicion'])
-
-    visa3 = driver.find_element(
-        By.ID, 'v_fecha_expiracion')  # Cambia el 'name' por el real
-    visa3.send_keys(datos['expiracion'])
-
-    # carnet4
-    carnet = driver.find_element(By.ID, 'e_no')  # Cambia el 'name' por el real
-    carnet.send_keys(datos['e_no'])
-
-    carnet1 = driver.find_element(By.ID,
-                                  'e_tipo')  # Cambia el 'name' por el real
-    carnet1.send_keys('tt1')
-
-    carnet2 = driver.find_element(
-        By.ID, 'e_fecha_expedicion')  # Cambia el 'name' por el real
-    carnet2.send_keys(datos['e_expedicion'])
-
-    carnet3 = driver.find_element(
-        By.ID, 'e_fecha_expiracion')  # Cambia el 'name' por el real
-    carnet3.send_keys(datos['e_expiracion'])
-
-    # varios - teléfonos con mejor manejo
-    numero = '111-111-1111'
-    try:
-        telefono_element = driver.find_element(By.ID, 'telefonos1')
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", telefono_element)
-        time.sleep(0.3)
-        driver.execute_script(
-            "document.getElementById('telefonos1').value = arguments[0];", numero)
-        print("✓ Teléfono 1 rellenado")
-    except Exception as e:
-        print(f"✗ Error con teléfono 1: {e}")
-
-    driver.execute_script(
-        """
-    var telefonoInput = document.getElementById('telefonos1');
-    telefonoInput.value = arguments[0];
-    telefonoInput.dispatchEvent(new Event('input', { bubbles: true }));
-    telefonoInput.dispatchEvent(new Event('change', { bubbles: true }));
-""", numero)
-
-    # Teléfono celular
-    try:
-        celular_element = driver.find_element(By.ID, 'celular')
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", celular_element)
-        time.sleep(0.3)
-        driver.execute_script(
-            "document.getElementById('celular').value = arguments[0];", numero)
-        print("✓ Celular rellenado")
-    except Exception as e:
-        print(f"✗ Error con celular: {e}")
-
-    driver.execute_script(
-        """
-    var telefonoInput = document.getElementById('celular');
-    telefonoInput.value = arguments[0];
-    telefonoInput.dispatchEvent(new Event('input', { bubbles: true }));
-    telefonoInput.dispatchEvent(new Event('change', { bubbles: true }));
-""", numero)
-
-    # direccion - con mejor manejo de elementos
-    try:
-        municipio_element = driver.find_element(By.ID, 'municipio')
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", municipio_element)
-        time.sleep(0.5)
-        provincia = Select(municipio_element)
-        provincia.select_by_value('01')
-        print("✓ Municipio seleccionado")
-    except Exception as e:
-        print(f"✗ Error seleccionando municipio: {e}")
-
-    WebDriverWait(driver,
-                  10).until(EC.presence_of_element_located((By.ID, "sector")))
+            # En caso de error, intentar eliminar el archivo
+            try:
+                os.remove(file_path)
+            except:
+                pass
+            return responder(f"Error al procesar el archivo: {e}", 500)
+
+    return responder("Archivo no permitido. Solo se permiten archivos .xlsx, .xls o .csv", 400)
+
+
+@app.route('/jobs/<trabajo_id>')
+def estado_trabajo(trabajo_id):
+    seguimiento = progreso.obtener(trabajo_id)
+    if seguimiento is not None:
+        resumen = seguimiento.resumen()
+        resumen.pop('momento')
+        return jsonify(resumen)
+    # Trabajos de arranques anteriores: solo el conteo guardado en la base
+    resumen = almacen.resumen(trabajo_id)
+    if resumen is None:
+        abort(404)
+    return jsonify(resumen)
+
+
+@app.route('/jobs/<trabajo_id>/stream')
+def stream_trabajo(trabajo_id):
+    seguimiento = progreso.obtener(trabajo_id)
+    if seguimiento is None:
+        abort(404)
+
+    def eventos():
+        desde = None
+        while True:
+            resumen = seguimiento.resumen(desde)
+            desde = resumen.pop('momento')
+            yield f"data: {json.dumps(resumen, ensure_ascii=False)}\n\n"
+            if resumen['estado'] in ('completado', 'error'):
+                fin = {'estado': resumen['estado'], 'error': resumen['error']}
+                yield f"event: fin\ndata: {json.dumps(fin, ensure_ascii=False)}\n\n"
+                return
+            time.sleep(1)
 
-    # Seleccionar sector - con mejor manejo
-    try:
-        sector_element = driver.find_element(By.ID, "sector")
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", sector_element)
-        time.sleep(0.5)
-        sector_select = Select(sector_element)
-        sector_select.select_by_visible_text("Santo Domingo de Guzmán")
-        print("✓ Sector seleccionado")
-    except Exception as e:
-        print(f"✗ Error seleccionando sector: {e}")
+    return Response(eventos(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "newsector")))
 
-    # Esperar que el <option> deseado esté presente
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located(
-            (By.XPATH,
-             '//select[@id="newsector"]/option[@value="03100101010106500"]')))
+def leer_validadas(ruta, seguimiento):
+    # Las filas con datos incompletos o inválidos se reportan sin pasar por un navegador
+    return validacion.validar(leer_filas(ruta), seguimiento.rechazar)
 
-    # Seleccionar newsector - con mejor manejo
-    try:
-        select_element = driver.find_element(By.ID, "newsector")
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", select_element)
-        time.sleep(0.5)
-        valor = "03100101010106500"
-        driver.execute_script(
-            "arguments[0].value = arguments[1]; arguments[0].dispatchEvent(new Event('change'));",
-            select_element, valor)
-        print("✓ Newsector seleccionado")
-    except Exception as e:
-        print(f"✗ Error seleccionando newsector: {e}")
 
-    # Calle con mejor manejo
+# Procesamiento en segundo plano de un trabajo
+def procesar_trabajo(seguimiento, filas, file_path=None, motor='navegador', peso=1.0, limite=None):
+    # Selenium y los navegadores se cargan aquí, con el primer trabajo, y no al arrancar la web
     try:
-        calle = driver.find_element(By.ID, 'calle')
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", calle)
-        time.sleep(0.3)
-        calle.clear()
-        calle.send_keys('arzobispo portes')
-        print("✓ Calle rellenada")
+        import automatizacion
     except Exception as e:
-        print(f"✗ Error con calle: {e}")
-
-    campo = driver.find_element(By.ID, 'salario')
-    valor = (datos['salario'])  # Asegúrate de que sea string
-
-    driver.execute_script("arguments[0].value = arguments[1];", campo, valor)
-
-    empleador = driver.find_element(
-        By.ID, 'empleador_dominicado')  # Cambia el 'name' por el real
-    empleador.send_keys(datos['profesion'])
-
-    # Enviar el formulario 1
-
-    boton_enviar = wait.until(
-        EC.presence_of_element_located((
-            By.XPATH,
-            "//div[contains(@class, 'f-right')]//button[contains(text(), 'Siguiente')]"
-        )))
-
-    # Scroll para asegurarte que esté visible
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
-                          boton_enviar)
-
-    # Click con JavaScript
-    driver.execute_script("arguments[0].click();", boton_enviar)
+        print(f"✗ No se pudo cargar el motor de automatización: {e}")
+        seguimiento.terminar(e)
+        return
 
-    # Esperar a que cargue el segundo formulario (puedes ajustar el ID más representativo si existe)
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, 'sobre_empresa')))
+    automatizacion.procesar_trabajo(seguimiento, filas, file_path, motor, peso, limite)
 
-    # Rellenar los campos con datos por defecto
-    empresa = driver.find_element(By.ID, 'sobre_empresa')
-    empresa.send_keys(datos['empresa'])
 
-    rnc = driver.find_element(By.ID, 'rnc')
-    rnc.send_keys(datos['rnc'])
+def iniciar_trabajo(seguimiento, filas, file_path=None, motor='navegador', peso=1.0, limite=None):
+    hilo_procesamiento = threading.Thread(target=procesar_trabajo,
+                                          args=(seguimiento, filas, file_path, motor, peso, limite),
+                                          name=f"procesamiento-{seguimiento.id}")
+    hilo_procesamiento.daemon = True  # El estado queda en la base: se reanuda al reiniciar
+    hilo_procesamiento.start()
+    return hilo_procesamiento
 
-    tsocietario = driver.find_element(By.ID, 'tipo_societario')
-    tsocietario.send_keys(datos['societario'])
 
-    personaacargo = driver.find_element(By.ID, 'persona_cargo')
-    personaacargo.send_keys(datos['profesion'])
+def reanudar_trabajos():
+    """Retoma los trabajos que quedaron a medias al caerse el proceso, todos a la vez."""
+    for trabajo_id in almacen.trabajos_inconclusos():
+        if os.environ.get("REANUDAR_TRABAJOS", "1") == "0":
+            almacen.abandonar_trabajo(trabajo_id)
+            continue
+        print(f"↻ Reanudando trabajo {trabajo_id}")
+        file_path = almacen.ruta_trabajo(trabajo_id)
+        motor = almacen.motor_trabajo(trabajo_id)
+        seguimiento = progreso.registrar(trabajo_id, os.path.basename(file_path), motor)
+        filas = almacen.filas_para_reanudar(
+            trabajo_id, lambda ruta: leer_validadas(ruta, seguimiento), seguimiento.omitir)
+        # Cada uno en su hilo: comparten los trabajadores del planificador como los subidos
+        iniciar_trabajo(seguimiento, filas, file_path, motor)
 
-    # Dar click en el botón "Siguiente"
-    boton_siguiente = wait.until(
-        EC.presence_of_element_located((
-            By.XPATH,
-            "//div[contains(@class, 'f-right')]//button[contains(text(), 'Siguiente')]"
-        )))
 
-    # Scroll para asegurarte que esté visible
-    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
-                          boton_siguiente)
+@app.route('/metrics')
+def metrics():
+    return Response(metricas.exportar_prometheus(),
+                    mimetype='text/plain; version=0.0.4; charset=utf-8')
 
-    # Click con JavaScript
-    driver.execute_script("arguments[0].click();", boton_siguiente)
 
-    # Esperar a que cargue el segundo formulario (puedes ajustar el ID más representativo si existe)
+@app.route('/metrics.json')
+def metrics_json():
+    return jsonify(metricas.exportar_json())
 
-    # Espera un poco para asegurarse de que el formulario se haya enviado
-    time.sleep(3)
-    print("Formulario enviado correctamente")
-    print("completado, no te preocupes por lo que sigue.")
 
+def precalentar_navegadores():
+    import automatizacion
 
-# Paso 5: Ejecutar el flujo completo
-def ejecutar():
-    global driver, wait
-    if driver is None:
-        initialize_driver()
-    # Leer datos desde el archivo Excel
-    datos_excel = pd.read_excel('datos_usuarios.xlsx')
-    lista_datos = datos_excel.to_dict(orient='records')
+    automatizacion.gestor_sesiones.precalentar()
 
-    for datos in lista_datos:
-        try:
-            iniciar_sesion(datos)
-            time.sleep(2)
-
-            # Aquí puedes navegar si hace falta
-            # driver.get("https://...")
-
-            navegar_a_enlace()
-
-            try:
-                completar_formulario()
-            except Exception as e:
-                print(
-                    f"[ERROR] Fallo llenando formulario para: {datos['usuario']}"
-                )
-                print(f"→ Error: {e}")
-                cerrar_sesion()
-                continue  # Saltar al siguiente usuario
-
-            time.sleep(1)
 
-            # Intentar hacer clic en "Siguiente"
-            formulario(datos)
+def arrancar_segundo_plano():
+    """Precalentado de navegadores y reanudación de trabajos, en el proceso que atiende.
 
-            try:
+    Importar la app no lo arranca: lo llaman los puntos de entrada, una vez por
+    proceso que atiende (`servidor_desarrollo` y `post_worker_init` de gunicorn).
+    """
+    # Arrancar los navegadores junto con la app (si no, se lanzan con el primer lote)
+    if os.environ.get("PRECALENTAR_NAVEGADORES") == "1":
+        threading.Thread(target=precalentar_navegadores, name="precalentar-navegadores",
+                         daemon=True).start()
 
-                siguiente_btn = driver.find_element(
-                    By.XPATH, '//button[contains(text(), "Siguiente")]')
-                siguiente_btn.click()
-            except:
-                print("Botón 'Siguiente' no encontrado.")
+    # Retomar los lotes que quedaron a medias (los procesos de `lote.py` no: lo hace la app)
+    if os.environ.get("REANUDAR_AL_ARRANCAR", "1") == "1":
+        threading.Thread(target=reanudar_trabajos, name="reanudar-trabajos", daemon=True).start()
 
-            # Cerrar sesión y reiniciar para el próximo usuario
-            cerrar_sesion()
 
-        except Exception as e:
-            print(
-                f"[ERROR] Fallo con el usuario: {datos.get('usuario', 'desconocido')}"
-            )
-            print(f"→ Error: {e}")
+def servidor_desarrollo(**opciones):
+    """`app.run` con el recargador de werkzeug, que carga la app en dos procesos.
 
-    try:
-        driver.quit()
-    except:
-        pass
+    Solo el hijo que atiende (WERKZEUG_RUN_MAIN) reanuda y precalienta: si no,
+    cada trabajo interrumpido se reanudaría dos veces.
+    """
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        arrancar_segundo_plano()
+    app.run(debug=True, **opciones)
 
 
-# Note: ejecutar() is called only when needed, not at module import
+if __name__ == '__main__':
+    servidor_desarrollo()
@@ -0,0 +1,79 @@
+"""Atajos de navegación aprendidos durante el lote.
+
+El camino completo hasta el formulario (LISTA DE APLICACIONES, buscar la
+solicitud en `tblLinks`, "Aplicar") cuesta dos o tres cargas de página por
+usuario. La primera vez que se recorre se guarda la URL de cada destino y
+los usuarios siguientes van directo a ella mientras no caduque. Si el atajo
+no lleva a la página esperada se olvida y se vuelve al camino completo; ese
+destino no se vuelve a aprender en el resto del trabajo, para no pagar un
+atajo fallido por cada usuario.
+
+Cada trabajo tiene su propia caché (ver `procesar_trabajo`), que se
+descarta al terminarlo.
+"""
+import os
+import threading
+import time
+
+# Segundos que vale una URL aprendida (ATAJOS_TTL=0 desactiva los atajos)
+ATAJOS_TTL = float(os.environ.get("ATAJOS_TTL", "1800"))
+
+
+class CacheAtajos:
+    """URLs de destino por nombre ('formulario', 'renovacion') con caducidad."""
+
+    def __init__(self, ttl=ATAJOS_TTL):
+        self.ttl = ttl
+        self._urls = {}  # nombre -> (url, momento en que caduca)
+        self._descartados = set()  # nombres cuyo atajo falló: no se vuelven a aprender
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.aprendidos = 0
+
+    def obtener(self, nombre):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entrada = self._urls.get(nombre)
+            if entrada is None:
+                return None
+            url, caduca = entrada
+            if time.monotonic() >= caduca:
+                del self._urls[nombre]
+                return None
+            return url
+
+    def aprender(self, nombre, url):
+        if self.ttl <= 0 or not url:
+            return
+        with self._lock:
+            if nombre in self._descartados:
+                return
+            anterior = self._urls.get(nombre)
+            self._urls[nombre] = (url, time.monotonic() + self.ttl)
+            if anterior is None or anterior[0] != url:
+                self.aprendidos += 1
+                print(f"↪ Atajo '{nombre}' aprendido: {url}")
+
+    def acierto(self):
+        with self._lock:
+            self.aciertos += 1
+
+    def olvidar(self, nombre):
+        with self._lock:
+            self.fallos += 1
+            self._descartados.add(nombre)
+            if self._urls.pop(nombre, None) is not None:
+                print(f"↩ Atajo '{nombre}' descartado, se vuelve al camino completo")
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'atajos_conocidos': sorted(self._urls),
+                'atajos_descartados': sorted(self._descartados),
+                'atajos_aciertos': self.aciertos,
+                'atajos_fallos': self.fallos,
+                'atajos_aprendidos': self.aprendidos,
+            }
@@ -0,0 +1,860 @@
+"""Motor de envío con navegadores: Firefox, pasos del flujo del portal y trabajadores.
+
+La web (`app.py`) lo importa con el primer trabajo y `lote.py` en cada
+proceso: Selenium y los gestores de navegadores no pesan en el arranque de
+gunicorn ni en cada página. `ejecutar` procesa un archivo de principio a fin
+en este proceso.
+"""
+from selenium import webdriver
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import (TimeoutException, NoSuchElementException,
+                                        InvalidCookieDomainException, UnableToSetCookieException)
+import os
+import time
+import threading
+import atexit
+
+from pool_navegadores import ContextoTrabajador, Planificador, calcular_num_trabajadores
+from sesiones import GestorSesiones, Relevos
+from perfiles import GestorPerfiles
+from memoria import VigilanteMemoria
+from capturas import CapturasFallo
+from cookies_sesion import CacheCookies
+import esperas
+import metricas
+from metricas import medir_paso
+from llenado import llenar_campos, campos_fallidos, campos_formulario, campos_empresa
+import llenado
+from lectura import leer_filas
+import validacion
+import progreso
+from atajos import CacheAtajos
+import paginas
+from paginas import (PaginaLogin, PaginaInicio, PaginaAplicaciones, PaginaRenovacion,
+                     PaginaFormulario, PaginaEmpresa)
+import motor_http
+import fallos
+import limitador
+from esperas import esperar, esperar_pagina_lista, desplazar_a, en_lugar_de
+from trabajos import MOTOR_ENVIO, PASO_ENVIANDO
+from persistencia import almacen
+
+# Portal de migración (se puede apuntar al portal simulado para pruebas de carga)
+PORTAL_URL = os.environ.get("PORTAL_URL", "https://personal.migracion.gob.do").rstrip('/')
+
+
+# =======================
+# CONFIGURACIÓN DEL DRIVER
+# =======================
+
+# PERFIL_LIGERO=1: sin imágenes, multimedia ni fuentes web, carga "eager" y
+# sin prefetch, telemetría ni restauración de sesión (el flujo solo necesita el DOM)
+PERFIL_LIGERO = os.environ.get("PERFIL_LIGERO", "0") == "1"
+
+PREFERENCIAS_LIGERAS = {
+    # Imágenes, multimedia y fuentes
+    "permissions.default.image": 2,
+    "media.autoplay.default": 5,
+    "media.autoplay.blocking_policy": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+    # Conexiones especulativas y prefetch
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.predictor.enabled": False,
+    "network.http.speculative-parallel-limit": 0,
+    "browser.urlbar.speculativeConnect.enabled": False,
+    # Telemetría, estudios y servicios en segundo plano
+    "toolkit.telemetry.enabled": False,
+    "toolkit.telemetry.unified": False,
+    "toolkit.telemetry.archive.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "app.normandy.enabled": False,
+    "app.shield.optoutstudies.enabled": False,
+    "browser.ping-centre.telemetry": False,
+    "app.update.auto": False,
+    "extensions.update.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    # Restauración de sesión e historial
+    "browser.sessionstore.resume_from_crash": False,
+    "browser.sessionstore.max_tabs_undo": 0,
+    "browser.sessionstore.interval": 1800000,
+    "browser.sessionhistory.max_entries": 2,
+    "browser.startup.page": 0,
+    "browser.newtabpage.enabled": False,
+}
+
+
+# Cada trabajador del pool tiene su propio driver y espera
+def preferencias_navegador():
+    # Configuración para Firefox - deshabilitar notificaciones y prompts
+    preferencias = {
+        "dom.webnotifications.enabled": False,
+        "dom.push.enabled": False,
+        "signon.rememberSignons": False,
+        "browser.privatebrowsing.autostart": True,
+    }
+    if PERFIL_LIGERO:
+        preferencias.update(PREFERENCIAS_LIGERAS)
+    return preferencias
+
+
+def opciones_firefox(perfil):
+    options = webdriver.FirefoxOptions()
+    options.add_argument('--headless')  # 👉 Oculta el navegador
+    options.add_argument('--no-sandbox')  # Necesario en entornos de servidor
+    # Firefox no necesita configuración especial de binary_location
+
+    # Perfil propio copiado de la plantilla (geckodriver lo usa en su sitio, sin copiarlo a /tmp)
+    options.add_argument('-profile')
+    options.add_argument(perfil)
+    for nombre, valor in preferencias_navegador().items():
+        options.set_preference(nombre, valor)
+
+    if PERFIL_LIGERO:
+        # Los estilos se mantienen: las esperas de visibilidad dependen de ellos
+        options.page_load_strategy = 'eager'  # volver con DOMContentLoaded, sin esperar a load
+    return options
+
+
+def precalentar_plantilla(ruta):
+    # Un primer arranque deja el perfil inicializado para todas las copias
+    driver = webdriver.Firefox(service=Service(), options=opciones_firefox(ruta))
+    driver.quit()
+
+
+# Plantilla de perfil y copias por navegador
+gestor_perfiles = GestorPerfiles(
+    preferencias_navegador(),
+    precalentar_plantilla if os.environ.get("PRECALENTAR_PLANTILLA", "1") == "1" else None)
+
+# RSS de cada navegador entre usuarios
+vigilante_memoria = VigilanteMemoria()
+
+# Captura de pantalla, HTML y tiempos de cada fila que falla, escritos en segundo plano
+capturas_fallo = CapturasFallo()
+
+
+# Segundos que puede tardar un comando de WebDriver antes de dar el navegador por colgado
+TIEMPO_COMANDO_NAVEGADOR = max(float(os.environ.get("TIEMPO_COMANDO_NAVEGADOR", "90")),
+                               esperas.TIEMPO_MAXIMO_SCRIPT + 15)
+
+
+def initialize_driver(id_trabajador=0):
+    perfil = gestor_perfiles.nuevo(id_trabajador)
+    options = opciones_firefox(perfil)
+
+    # Usar GeckoDriver del sistema
+    try:
+        service = Service()  # Usar geckodriver del PATH
+        driver = webdriver.Firefox(service=service, options=options)
+        print(f"✓ Firefox iniciado exitosamente [N{id_trabajador}]")
+    except Exception as firefox_error:
+        print(f"Error iniciando Firefox: {firefox_error}")
+        gestor_perfiles.descartar(perfil)
+        raise
+    esperas.preparar_driver(driver)
+    # Un comando sin respuesta en este tiempo es un navegador colgado
+    driver.command_executor.client_config.timeout = TIEMPO_COMANDO_NAVEGADOR
+    wait = WebDriverWait(driver, 30, poll_frequency=esperas.POLL_ESPERA)  # Más tiempo para elementos lentos
+    ctx = ContextoTrabajador(id_trabajador, driver, wait)
+    ctx.perfil = perfil
+    return ctx
+
+
+def cerrar_driver(ctx):
+    try:
+        ctx.driver.quit()
+    except:
+        pass
+    gestor_perfiles.descartar(getattr(ctx, 'perfil', None))
+
+
+# Navegadores calientes compartidos entre lotes
+gestor_sesiones = GestorSesiones(
+    initialize_driver, cerrar_driver, calcular_num_trabajadores(),
+    keepalive=int(os.environ.get("KEEPALIVE_NAVEGADORES", "60")),
+    inactividad_max=int(os.environ.get("INACTIVIDAD_MAX_NAVEGADORES", "900")))
+
+
+def limpiar_al_salir():
+    # Que los trabajadores devuelvan sus navegadores antes de cerrarlos
+    for planificador in planificadores.values():
+        planificador.detener()
+    relevos.esperar()
+    relevos.cerrar_todos()
+    capturas_fallo.esperar()
+    gestor_sesiones.cerrar_todos()
+
+    # Borrar solo los perfiles creados por esta app
+    gestor_perfiles.limpiar()
+    print("✓ Perfiles de Firefox eliminados")
+
+
+atexit.register(limpiar_al_salir)
+
+# URLs del formulario aprendidas para saltar la lista de aplicaciones, por trabajo:
+# se crean al empezar cada trabajo y se descartan al terminarlo
+atajos_por_trabajo = {}
+SIN_ATAJOS = CacheAtajos(ttl=0)  # filas procesadas fuera de `procesar_trabajo`
+
+# Cookies de sesiones ya autenticadas para reintentos sin repetir el login
+cache_cookies = CacheCookies()
+
+# Filas en vuelo contra el portal por motor; AIMD las baja si el portal se vuelve lento
+controles = {
+    'navegador': limitador.ControlConcurrencia(
+        'navegador', calcular_num_trabajadores(), calcular_num_trabajadores()),
+    'http': limitador.ControlConcurrencia(
+        'http', motor_http.NUM_SESIONES_HTTP, motor_http.NUM_SESIONES_HTTP),
+}
+
+# Navegadores de más que terminan el envío y el cierre de sesión de una fila
+# mientras su trabajador ya hace el login de la siguiente (0 = sin solapar);
+# cada final en relevo cuenta como una fila en vuelo del motor navegador
+relevos = Relevos(gestor_sesiones, int(os.environ.get("NAVEGADORES_RELEVO", "0")), controles['navegador'])
+
+# Cola central: las filas de todos los trabajos activos se reparten entre los mismos trabajadores
+planificadores = {
+    'navegador': Planificador(calcular_num_trabajadores(), gestor_sesiones.obtener, gestor_sesiones.liberar,
+                              controles['navegador']),
+    'http': Planificador(motor_http.NUM_SESIONES_HTTP, motor_http.crear_contexto, motor_http.cerrar_contexto,
+                         controles['http']),
+}
+
+# Filas del motor HTTP que caen al navegador a la vez (no más que navegadores)
+respaldo_navegador = threading.BoundedSemaphore(calcular_num_trabajadores())
+
+# reiniciar
+
+
+@medir_paso('cerrar_sesion')
+def cerrar_sesion(ctx):
+    try:
+        # Intenta encontrar y hacer clic en el botón de cerrar sesión
+        limitador.peticion()
+        ctx.driver.get(f'{PORTAL_URL}/Account/Logout')
+        ctx.pagina = None
+        print("Sesión cerrada.")
+    except:
+        print("No se pudo cerrar sesión (quizás no estás logueado).")
+
+
+def reiniciar_navegador(ctx, motivo='fallo'):
+    cerrar_driver(ctx)
+
+    nuevo = initialize_driver(ctx.id)
+    ctx.driver = nuevo.driver
+    ctx.wait = nuevo.wait
+    ctx.perfil = nuevo.perfil
+    ctx.pagina = None
+    metricas.incrementar('reinicios_navegador_total', motivo)
+    print(f"Navegador reiniciado [N{ctx.id}].")
+
+
+# Limpiar campos del formulario
+def limpiar_campos(ctx, lista_selectores):
+    for selector in lista_selectores:
+        try:
+            campo = ctx.driver.find_element(By.CSS_SELECTOR, selector)
+            campo.clear()
+            campo.send_keys(Keys.CONTROL + "a")
+            campo.send_keys(Keys.DELETE)
+        except Exception as e:
+            print(f"No se pudo limpiar el campo: {selector}. Error: {e}")
+
+
+def restaurar_sesion(ctx, usuario):
+    """Entra con las cookies guardadas de una sesión anterior; False si no hay o ya no valen."""
+    cookies = cache_cookies.tomar(usuario)
+    if cookies is None:
+        return False
+    # Las cookies solo se pueden poner estando en el dominio del portal
+    limitador.peticion()
+    ctx.driver.get(f'{PORTAL_URL}/Account/Login')
+    try:
+        for cookie in cookies:
+            ctx.driver.add_cookie(cookie)
+    except (InvalidCookieDomainException, UnableToSetCookieException) as e:
+        cache_cookies.resultado(False)
+        ctx.driver.delete_all_cookies()
+        print(f"No se pudieron poner las cookies guardadas: {e}")
+        return False
+    limitador.peticion()
+    ctx.driver.get(f'{PORTAL_URL}/')
+    esperar_pagina_lista(ctx)
+
+    inicio = PaginaInicio(ctx)
+    valida = inicio.buscar('bienvenida') is not None
+    cache_cookies.resultado(valida)
+    if not valida:
+        # El portal mandó al login: se entra normalmente desde un navegador sin esas cookies
+        ctx.driver.delete_all_cookies()
+        print("Sesión guardada rechazada por el portal, se inicia sesión de nuevo.")
+        return False
+
+    popup = inicio.buscar('aceptar_popup')
+    if popup is not None and popup.is_displayed():
+        popup.click()
+    ctx.pagina = inicio
+    print("Sesión restaurada con cookies guardadas.")
+    return True
+
+
+def guardar_sesion(ctx, fila):
+    """Guarda las cookies si la fila ya pasó el login; True si quedaron guardadas."""
+    if fila.paso is None or cache_cookies.ttl <= 0:
+        return False
+    try:
+        cache_cookies.guardar(fila.usuario, fila.trabajo.id, ctx.driver.get_cookies())
+    except Exception:
+        return False
+    return cache_cookies.tiene(fila.usuario)
+
+
+@medir_paso('iniciar_sesion')
+def iniciar_sesion(ctx, datos):
+    if restaurar_sesion(ctx, datos['usuario']):
+        return
+
+    limitador.login()
+    limitador.peticion()
+    ctx.driver.get(f'{PORTAL_URL}/Account/Login')
+    print("Página de login cargada.")
+
+    # Llenar usuario y contraseña (espera a que cargue el formulario) y entrar
+    pagina_login = PaginaLogin(ctx)
+    pagina_login.esperar('usuario', 'login')
+    limitador.peticion()
+    pagina_login.entrar(datos['usuario'], datos['contra'])
+    print("Intentando iniciar sesión...")
+
+    # Esperar que se cargue la página de bienvenida
+    inicio = PaginaInicio(ctx)
+    try:
+        inicio.esperar('bienvenida', 'bienvenida')
+    except (TimeoutException, NoSuchElementException):
+        rechazo = PaginaLogin(ctx).rechazo()
+        if rechazo is not None:
+            raise fallos.CredencialesInvalidas(rechazo or "Login rechazado")
+        raise
+    print("Sesión iniciada correctamente.")
+
+    # Cerrar popup si aparece (antes se esperaban 30 s cuando no salía)
+    inicio_popup = time.perf_counter()
+    try:
+        inicio.esperar('aceptar_popup', 'popup', visible=True).click()
+        print("Popup de cambio de contraseña cerrado.")
+    except (TimeoutException, NoSuchElementException):
+        esperado = time.perf_counter() - inicio_popup
+        esperas.registrar(ctx, 30, esperado)
+        descontar_espera(ctx, esperado)  # el popup que no sale no es latencia del portal
+        print("No apareció popup de cambio de contraseña.")
+    ctx.pagina = inicio
+
+
+@medir_paso('navegar_a_enlace')
+def navegar_a_enlace(ctx):
+    inicio = paginas.actual(ctx, PaginaInicio)
+    enlace = inicio.esperar('lista_aplicaciones', 'enlace_lista', visible=True)
+    limitador.peticion()
+    enlace.click()
+    print("Navegando a sección LISTA DE APLICACIONES...")
+
+    # Esperar a que cargue tabla o indicador de que la página cargó
+    ctx.pagina = PaginaAplicaciones(ctx)
+    ctx.pagina.esperar('tabla', 'tabla_aplicaciones')
+    print("Sección del formulario cargada.")
+
+
+@medir_paso('completar_formulario')
+def completar_formulario(ctx):
+    aplicaciones = paginas.actual(ctx, PaginaAplicaciones)
+
+    try:
+        input_element = aplicaciones.esperar('solicitud', 'solicitud', visible=True)
+
+        # Scroll al elemento para asegurarnos que esté visible
+        desplazar_a(ctx, input_element)
+
+        limitador.peticion()
+        input_element.click()
+        print(
+            "Click realizado en el formulario de renovación carnet de trabajadores temporeros."
+        )
+
+    except (TimeoutException, NoSuchElementException) as e:
+        print("No se pudo encontrar o hacer clic en el elemento:", e)
+    except Exception as e:
+        print("Error al hacer click, intentando con JavaScript:", e)
+        try:
+            ctx.driver.execute_script("arguments[0].click();", input_element)
+            print("Click realizado con JavaScript.")
+        except Exception as js_e:
+            print("También falló el click con JavaScript:", js_e)
+
+    # Esperar que cargue la siguiente página o sección
+    renovacion = PaginaRenovacion(ctx)
+    try:
+        renovacion.esperar('contenedor', 'pagina_renovacion', visible=True)
+        ctx.atajos.aprender('renovacion', ctx.driver.current_url)
+        print("Formulario cargado correctamente.")
+
+    except (TimeoutException, NoSuchElementException):
+        print("No se pudo confirmar la carga de la siguiente página.")
+
+    aplicar_solicitud(renovacion)
+
+
+def aplicar_solicitud(renovacion):
+    ctx = renovacion.ctx
+    limitador.peticion()
+    renovacion.pulsar('aplicar', 'boton_aplicar')
+
+    # Espera hasta que el campo 'nombre' esté disponible
+    formulario_pagina = PaginaFormulario(ctx)
+    formulario_pagina.esperar('nombre', 'formulario')
+    ctx.atajos.aprender('formulario', ctx.driver.current_url)
+
+    seleccionar_sede(formulario_pagina)
+
+
+def seleccionar_sede(formulario_pagina):
+    ctx = formulario_pagina.ctx
+    # Seleccionar sede con mejor manejo
+    try:
+        sede = formulario_pagina.elemento('sede')
+        desplazar_a(ctx, sede)
+        sede.click()
+        print("✓ Sede seleccionada")
+    except Exception as e:
+        print(f"✗ Error seleccionando sede: {e}")
+    ctx.pagina = formulario_pagina
+
+
+@medir_paso('atajo_formulario')
+def atajo_formulario(ctx):
+    """Va directo al formulario (o a la página de renovación) con la URL aprendida.
+
+    Devuelve False si no hay atajo vigente o si no llevó a la página esperada;
+    en ese caso el navegador queda en la página de inicio para el camino completo.
+    """
+    destinos = (('formulario', PaginaFormulario, 'nombre', seleccionar_sede),
+                ('renovacion', PaginaRenovacion, 'contenedor', aplicar_solicitud))
+    intentado = False
+    for nombre, clase_pagina, clave, continuar in destinos:
+        url = ctx.atajos.obtener(nombre)
+        if url is None:
+            continue
+        intentado = True
+        try:
+            limitador.peticion()
+            ctx.driver.get(url)
+            pagina = clase_pagina(ctx)
+            pagina.esperar(clave, 'atajo', visible=True)
+            continuar(pagina)
+        except (TimeoutException, NoSuchElementException) as e:
+            print(f"Atajo '{nombre}' no funcionó ({type(e).__name__}), se intenta el siguiente.")
+            ctx.atajos.olvidar(nombre)
+            continue
+        ctx.atajos.acierto()
+        print(f"↪ Formulario abierto por atajo '{nombre}'.")
+        return True
+
+    if intentado:
+        limitador.peticion()
+        ctx.driver.get(f'{PORTAL_URL}/')
+        ctx.pagina = None
+    return False
+
+
+def verificar_campos(reporte):
+    fallidos = campos_fallidos(reporte)
+    for id_campo, motivo in fallidos.items():
+        print(f"✗ Error con {id_campo}: {motivo}")
+    obligatorios = sorted(set(fallidos) - llenado.CAMPOS_OPCIONALES)
+    if obligatorios:
+        raise NoSuchElementException(f"No se pudieron rellenar: {', '.join(obligatorios)}")
+
+
+# Rellenar el formulario
+@medir_paso('formulario')
+def formulario(ctx, datos, al_enviar=None):
+    pagina = paginas.actual(ctx, PaginaFormulario)
+
+    # Pasaporte, visa, carnet, teléfonos, dirección, salario y empleador en una sola llamada
+    reporte = llenar_campos(ctx, {
+        **campos_formulario(datos),
+        'municipio': llenado.MUNICIPIO,  # Dispara la carga de sectores
+    })
+    verificar_campos(reporte)
+
+    # Esperar a que el municipio cargue las opciones de sector
+    pagina.esperar('sector', 'sector')
+    verificar_campos(llenar_campos(ctx, {'sector': {'texto': llenado.SECTOR}}))
+
+    # Esperar que el <option> deseado esté presente
+    pagina.esperar('newsector', 'newsector')
+    verificar_campos(llenar_campos(ctx, {'newsector': llenado.NEWSECTOR}))
+    print("✓ Formulario 1 rellenado")
+    esperas.registrar(ctx, 2.4, 0.0)  # sleeps tras cada scrollIntoView campo a campo
+
+    # Enviar el formulario 1
+    limitador.peticion()
+    pagina.pulsar('siguiente', 'boton_siguiente')
+
+    # Esperar a que cargue el segundo formulario
+    empresa = PaginaEmpresa(ctx)
+    ctx.pagina = empresa
+    empresa.esperar('sobre_empresa', 'formulario_empresa')
+
+    # Rellenar los campos con datos por defecto
+    verificar_campos(llenar_campos(ctx, campos_empresa(datos)))
+
+    # Dar click en el botón "Siguiente" (`al_enviar` justo antes del clic)
+    limitador.peticion()
+    return empresa.pulsar('siguiente', 'boton_siguiente', al_enviar)
+
+
+@medir_paso('confirmar_envio')
+def confirmar_envio(ctx, boton_siguiente):
+    # Esperar a que el portal reciba el envío (el botón desaparece al cambiar de página)
+    with en_lugar_de(ctx, 3):
+        try:
+            esperar(ctx, EC.staleness_of(boton_siguiente), 'envio')
+            esperar_pagina_lista(ctx, 'envio')
+        except TimeoutException:
+            print("No se pudo confirmar el cambio de página tras el envío.")
+    ctx.pagina = None
+    print("Formulario enviado correctamente")
+    print("completado, no te preocupes por lo que sigue.")
+
+
+# Flujo completo para un usuario dentro de un trabajador del pool
+def empezar_intento(ctx, motor):
+    """Al empezar cada intento de una fila, tras la espera del reintento o el relanzamiento.
+
+    `motor` es el que hace el intento: una fila HTTP que cae al navegador
+    cuenta en el control de concurrencia del navegador, no en el del HTTP.
+    """
+    ctx.motor = motor
+    ctx.envio_en_curso = False
+    ctx.inicio_paso = time.monotonic()
+    ctx.espera_propia = 0.0
+    limitador.esperado()  # las esperas de ritmo anteriores no son de este paso
+
+
+def descontar_espera(ctx, segundos):
+    """Tiempo del paso que esperamos nosotros (un elemento opcional que no salió), no el portal."""
+    ctx.espera_propia += segundos
+
+
+def paso_completado(ctx, fila, paso):
+    # Latencia del paso para el control de concurrencia del motor que lo hizo: lo
+    # que tardó el portal, sin las esperas de los cubos del limitador ni las propias
+    portal = time.monotonic() - ctx.inicio_paso - limitador.esperado() - ctx.espera_propia
+    controles[ctx.motor].observar(max(0.0, portal))
+    almacen.marcar_paso(fila.id, paso)
+    fila.avanzar(paso)
+    ctx.inicio_paso = time.monotonic()
+    ctx.espera_propia = 0.0
+
+
+def marcar_envio(ctx, fila):
+    """Justo antes del último envío: desde aquí un error no dice si la solicitud llegó al portal."""
+    ctx.envio_en_curso = True
+    almacen.marcar_paso(fila.id, PASO_ENVIANDO)
+    fila.avanzar(PASO_ENVIANDO)
+
+
+def preparar_siguiente(ctx):
+    # Tras cerrar sesión: perfil con demasiados usuarios, navegador que creció
+    # de más o que no se deja limpiar: se relanza
+    if gestor_perfiles.usar(getattr(ctx, 'perfil', None)):
+        reiniciar_navegador(ctx, 'perfil')
+    elif vigilante_memoria.excedida(ctx):
+        reiniciar_navegador(ctx, 'memoria')
+    elif not gestor_sesiones.resetear(ctx):
+        reiniciar_navegador(ctx, 'reseteo')
+
+
+def terminar_envio(ctx, boton_envio):
+    """Confirmación del envío, cierre de sesión y limpieza; False si el navegador quedó inservible."""
+    try:
+        confirmar_envio(ctx, boton_envio)
+        cerrar_sesion(ctx)
+        preparar_siguiente(ctx)
+        return True
+    except Exception as e:
+        print(f"✗ [N{ctx.id}] No se pudo dejar listo el navegador: {e}")
+        return False
+
+
+def flujo_usuario(ctx, fila, desde_formulario=False):
+    """Login y formulario hasta el envío; con `desde_formulario` se reusa la sesión abierta.
+
+    Devuelve el botón pulsado para enviar, que `terminar_envio` espera a que desaparezca.
+    """
+    datos = fila.datos
+    empezar_intento(ctx, 'navegador')
+    ctx.atajos = atajos_por_trabajo.get(fila.trabajo.id, SIN_ATAJOS)
+    if desde_formulario:
+        limitador.peticion()
+        ctx.driver.get(f'{PORTAL_URL}/')
+        ctx.pagina = None
+    else:
+        iniciar_sesion(ctx, datos)
+        with en_lugar_de(ctx, 2):
+            esperar_pagina_lista(ctx)
+        paso_completado(ctx, fila, 'iniciar_sesion')
+        # Si la fila falla más adelante, el reintento entra con estas cookies
+        guardar_sesion(ctx, fila)
+
+    # Con un atajo vigente se salta la lista de aplicaciones
+    if not atajo_formulario(ctx):
+        navegar_a_enlace(ctx)
+        paso_completado(ctx, fila, 'navegar_a_enlace')
+        completar_formulario(ctx)
+    with en_lugar_de(ctx, 1):
+        esperar_pagina_lista(ctx, 'formulario')
+    paso_completado(ctx, fila, 'completar_formulario')
+
+    boton_envio = formulario(ctx, datos, lambda: marcar_envio(ctx, fila))
+    paso_completado(ctx, fila, 'formulario')
+    return boton_envio
+
+
+def fallar_fila(ctx, fila, clase, error):
+    descripcion = fallos.describir(clase, error)
+    print(f"✗ [N{ctx.id}] Error procesando usuario {fila.usuario}: {descripcion}")
+    # Antes de relanzar o limpiar el navegador, mientras muestra el error
+    capturas_fallo.capturar(ctx, fila, clase, error)
+    metricas.incrementar('filas_total', 'fallo')
+    almacen.marcar_resultado(fila.id, False, descripcion)
+    fila.terminar(False, descripcion)
+
+
+def fallar_sin_procesar(fila, error):
+    """Fila que se quedó sin navegador o cuyo flujo reventó antes de tener resultado."""
+    if fila.fin is not None:
+        return
+    descripcion = fallos.describir(fallos.clasificar(error), error)
+    metricas.incrementar('filas_total', 'fallo')
+    almacen.marcar_resultado(fila.id, False, descripcion)
+    fila.terminar(False, descripcion)
+
+
+def procesar_usuario(ctx, fila):
+    usuario = fila.usuario
+    print(f"[N{ctx.id}] Procesando usuario: {usuario}")
+    esperas.iniciar_fila(ctx)
+    fila.iniciar()
+
+    intentos = {}  # clase de error -> reintentos usados
+    desde_formulario = False
+    while True:
+        paso_anterior = fila.paso
+        try:
+            # Ejecutar la automatización para este usuario
+            boton_envio = flujo_usuario(ctx, fila, desde_formulario)
+            break
+        except Exception as user_error:
+            # Tras pulsar el último Siguiente el error es 'incierto': no se reintenta
+            clase = fallos.clasificar(user_error, ctx.envio_en_curso)
+            politica = fallos.POLITICAS[clase]
+            metricas.incrementar('fallos_total', clase)
+            if clase == 'portal':
+                controles[ctx.motor].fallo_portal()
+            intentos[clase] = intentos.get(clase, 0) + 1
+
+            if intentos[clase] > politica.reintentos:
+                fallar_fila(ctx, fila, clase, user_error)
+                # Solo se guardan sesiones para los reintentos de la fila: al fallar
+                # se cierra, que no quede abierta en el portal sin nadie que la use
+                cache_cookies.descartar(usuario)
+                try:
+                    if politica.reiniciar:
+                        reiniciar_navegador(ctx)  # que no arrastre a las filas siguientes
+                    else:
+                        cerrar_sesion(ctx)
+                        preparar_siguiente(ctx)
+                except Exception as e:
+                    print(f"✗ [N{ctx.id}] No se pudo dejar listo el navegador: {e}")
+                return False
+
+            espera = fallos.espera_reintento(politica, intentos[clase])
+            print(f"↻ [N{ctx.id}] {usuario}: {fallos.describir(clase, user_error)}; reintento "
+                  f"{intentos[clase]}/{politica.reintentos} en {espera:.1f} s")
+            metricas.incrementar('reintentos_total', clase)
+            try:
+                if politica.reiniciar:
+                    reiniciar_navegador(ctx)
+                    desde_formulario = False
+                    continue
+                time.sleep(espera)
+                # Si el intento avanzó, se retoma con la sesión abierta; si no, se empieza de cero
+                desde_formulario = fila.paso is not None and fila.paso != paso_anterior
+                if not desde_formulario:
+                    # Con la sesión guardada el reintento entra con sus cookies, sin cerrarla
+                    if not guardar_sesion(ctx, fila):
+                        cerrar_sesion(ctx)
+                    if not gestor_sesiones.resetear(ctx):
+                        reiniciar_navegador(ctx, 'reseteo')
+            except Exception as e:
+                fallar_fila(ctx, fila, 'navegador', e)
+                return False
+
+    almacen.marcar_resultado(fila.id, True)
+    fila.terminar(True)
+    cache_cookies.descartar(usuario)  # la sesión se cierra a continuación
+    # El formulario ya salió: confirmación, cierre de sesión y limpieza en un
+    # navegador de relevo si hay uno libre, si no aquí mismo
+    if not relevos.relevar(ctx, lambda saliente: terminar_envio(saliente, boton_envio)):
+        if not terminar_envio(ctx, boton_envio):
+            try:
+                reiniciar_navegador(ctx)
+            except Exception as e:
+                print(f"✗ [N{ctx.id}] No se pudo relanzar el navegador: {e}")
+    real, legada = esperas.cerrar_fila(ctx)
+    metricas.incrementar('filas_total', 'exito')
+    print(f"✓ [N{ctx.id}] Usuario {usuario} procesado exitosamente "
+          f"(esperas: {real:.1f} s, antes {legada:.1f} s)")
+    return True
+
+
+def procesar_usuario_http(ctx, fila):
+    """Fila por HTTP; si el portal muestra algo inesperado se repite con un navegador."""
+    usuario = fila.usuario
+    print(f"[H{ctx.id}] Procesando usuario: {usuario}")
+    fila.iniciar()
+
+    intentos = 0
+    while True:
+        empezar_intento(ctx, 'http')
+        try:
+            motor_http.procesar(ctx, fila.datos, PORTAL_URL, lambda paso: paso_completado(ctx, fila, paso),
+                                lambda: marcar_envio(ctx, fila))
+            almacen.marcar_resultado(fila.id, True)
+            fila.terminar(True)
+            metricas.incrementar('filas_total', 'exito')
+            print(f"✓ [H{ctx.id}] Usuario {usuario} procesado exitosamente por HTTP")
+            return True
+
+        except Exception as user_error:
+            # Tras lanzar el POST final el error es 'incierto': sin reintento ni respaldo
+            clase = fallos.clasificar(user_error, ctx.envio_en_curso)
+            if isinstance(user_error, motor_http.FlujoNoReconocido) and clase != 'incierto':
+                print(f"↷ [H{ctx.id}] {usuario}: {user_error}. Se repite con el navegador.")
+                motor_http.cerrar_sesion(ctx, PORTAL_URL)
+                metricas.incrementar('filas_respaldo_total', 'navegador')
+                break
+
+            # Sin navegador solo hay fallos del portal que reintentar (siempre desde el login)
+            politica = fallos.POLITICAS[clase]
+            metricas.incrementar('fallos_total', clase)
+            if clase == 'portal':
+                controles[ctx.motor].fallo_portal()
+            motor_http.cerrar_sesion(ctx, PORTAL_URL)
+            intentos += 1
+            if clase != 'portal' or intentos > politica.reintentos:
+                descripcion = fallos.describir(clase, user_error)
+                print(f"✗ [H{ctx.id}] Error procesando usuario {usuario}: {descripcion}")
+                metricas.incrementar('filas_total', 'fallo')
+                almacen.marcar_resultado(fila.id, False, descripcion)
+                fila.terminar(False, descripcion)
+                return False
+            espera = fallos.espera_reintento(politica, intentos)
+            print(f"↻ [H{ctx.id}] {usuario}: {fallos.describir(clase, user_error)}; reintento "
+                  f"{intentos}/{politica.reintentos} en {espera:.1f} s")
+            metricas.incrementar('reintentos_total', clase)
+            time.sleep(espera)
+
+    with respaldo_navegador:
+        try:
+            navegador = gestor_sesiones.obtener(ctx.id)
+        except Exception as e:
+            print(f"✗ [H{ctx.id}] No se pudo abrir un navegador de respaldo: {e}")
+            fallar_sin_procesar(fila, e)
+            return False
+        try:
+            return procesar_usuario(navegador, fila)
+        finally:
+            gestor_sesiones.liberar(navegador)
+
+
+# Procesamiento en segundo plano de un trabajo
+def procesar_trabajo(seguimiento, filas, file_path=None, motor='navegador', peso=1.0, limite=None):
+    trabajo_id = seguimiento.id
+    atajos = atajos_por_trabajo[trabajo_id] = CacheAtajos()
+    try:
+        # Los trabajadores de cada motor se comparten entre todos los trabajos activos
+        planificador = planificadores[motor]
+        procesar = procesar_usuario_http if motor == 'http' else procesar_usuario
+        print(f"Trabajo {trabajo_id} en cola: {planificador.num_trabajadores} trabajador(es) {motor} "
+              f"compartidos, peso {peso:g}, límite {limite or 'sin tope'}")
+        usuarios_procesados, usuarios_fallidos = planificador.procesar(
+            trabajo_id, seguimiento.seguir(filas), procesar, peso, limite, fallar_sin_procesar)
+        almacen.terminar_trabajo(trabajo_id)
+        seguimiento.terminar()
+
+        print(f"✓ PROCESAMIENTO COMPLETADO: {usuarios_procesados} exitosos, {usuarios_fallidos} fallidos")
+        print(f"♻ Reutilización de navegadores: {gestor_sesiones.estadisticas()}")
+        if relevos.maximo:
+            print(f"⇄ Relevos: {relevos.estadisticas()}")
+        print(f"🗂 Perfiles: {gestor_perfiles.estadisticas()}")
+        print(f"🧠 Memoria de navegadores: {vigilante_memoria.estadisticas()}")
+        print(f"📷 Capturas de fallos: {capturas_fallo.estadisticas()}")
+        print(f"⏱ Esperas: {esperas.estadisticas_esperas()}")
+        print(f"↪ Atajos: {atajos.estadisticas()}")
+        print(f"🍪 Sesiones reusadas: {cache_cookies.estadisticas()}")
+        print(f"⇅ Concurrencia: {controles[motor].estadisticas()}")
+
+    except Exception as e:
+        # El trabajo queda en curso en la base y se reanudará en el próximo arranque
+        print(f"✗ Error general en procesamiento: {e}")
+        seguimiento.terminar(e)
+        return
+    finally:
+        # Las sesiones abiertas y los atajos de este trabajo no sobreviven a su final
+        cache_cookies.descartar_trabajo(trabajo_id)
+        atajos_por_trabajo.pop(trabajo_id, None)
+
+    # Los navegadores quedan calientes para el siguiente lote
+
+    # Eliminar el archivo Excel (solo al terminar: si el proceso muere se relee al reanudar)
+    if file_path:
+        try:
+            os.remove(file_path)
+            print(f"✓ Archivo Excel eliminado: {file_path}")
+        except Exception as cleanup_error:
+            print(f"Advertencia: No se pudo eliminar el archivo: {cleanup_error}")
+
+
+
+# Paso 5: Ejecutar el flujo completo
+def ejecutar(ruta='datos_usuarios.xlsx', motor=MOTOR_ENVIO, trabajo_id=None, filas=None):
+    """Procesa un archivo en este proceso y devuelve el id del trabajo.
+
+    Con `filas` ((numero, fila) ya validadas, ver `lote.py`) se procesan esas
+    en lugar de leer el archivo.
+    """
+    if filas is None:
+        faltantes = validacion.columnas_faltantes_archivo(ruta, leer_filas)
+        if faltantes:
+            raise ValueError(f"Faltan columnas obligatorias en {ruta}: {', '.join(faltantes)}")
+    trabajo_id = almacen.crear_trabajo(os.path.abspath(ruta), trabajo_id, motor=motor)
+    seguimiento = progreso.registrar(trabajo_id, os.path.basename(ruta), motor)
+    if filas is None:
+        # Leer datos desde el archivo Excel fila a fila; las inválidas se reportan sin navegador
+        filas = validacion.validar(leer_filas(ruta), seguimiento.rechazar)
+    procesar_trabajo(seguimiento, almacen.registrar_filas(trabajo_id, filas, seguimiento.omitir),
+                     motor=motor)
+    return trabajo_id
+
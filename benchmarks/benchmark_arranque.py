@@ -0,0 +1,132 @@
+"""Benchmark de arranque de la web.
+
+Cada repetición usa un intérprete nuevo y mide:
+- el tiempo de `import app` (y si con él se cargaron selenium o pandas),
+- lo que cuesta después `import automatizacion`, que paga el primer trabajo,
+- el tiempo hasta la primera respuesta de `/` con el servidor elegido:
+  gunicorn con `gunicorn.conf.py` (precarga) o el servidor de desarrollo.
+
+Uso:
+    python benchmarks/benchmark_arranque.py --repeticiones 5
+    python benchmarks/benchmark_arranque.py --servidor flask --json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_MEDIR_IMPORTS = """
+import json, sys, time
+inicio = time.perf_counter()
+import app
+web = time.perf_counter() - inicio
+cargados = {m: m in sys.modules for m in ('selenium', 'pandas', 'automatizacion')}
+inicio = time.perf_counter()
+import automatizacion
+motor = time.perf_counter() - inicio
+print(json.dumps({'import_app_s': web, 'import_automatizacion_s': motor, 'cargados': cargados}))
+"""
+
+
+def entorno(carpeta):
+    return {
+        **os.environ,
+        'DATABASE_URL': f"sqlite:///{os.path.join(carpeta, 'arranque.db')}",
+        'REANUDAR_AL_ARRANCAR': '0',
+        'PRECALENTAR_NAVEGADORES': '0',
+        'PRECALENTAR_PLANTILLA': '0',
+    }
+
+
+def medir_imports(env):
+    salida = subprocess.run([sys.executable, '-c', _MEDIR_IMPORTS], cwd=RAIZ, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    # Al salir, automatizacion imprime la limpieza de perfiles tras el JSON
+    return json.loads(next(l for l in salida.splitlines() if l.startswith('{')))
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def comando_servidor(servidor, puerto):
+    if servidor == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{puerto}', 'main:app']
+    return [sys.executable, '-c', f"from app import app; app.run(port={puerto})"]
+
+
+def primera_respuesta(servidor, env, tiempo_max=60):
+    """Segundos desde lanzar el servidor hasta el primer 200 de `/`."""
+    puerto = puerto_libre()
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(comando_servidor(servidor, puerto), cwd=RAIZ, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - inicio < tiempo_max:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{puerto}/', timeout=1) as respuesta:
+                    if respuesta.status == 200:
+                        return time.perf_counter() - inicio
+            except (urllib.error.URLError, ConnectionError, OSError):
+                if proceso.poll() is not None:
+                    raise RuntimeError(f"El servidor {servidor} terminó con código {proceso.returncode}")
+                time.sleep(0.01)
+        raise RuntimeError(f"El servidor {servidor} no respondió en {tiempo_max} s")
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(10)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la web")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--servidor', choices=['gunicorn', 'flask'], default='gunicorn')
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args()
+
+    imports, respuestas = [], []
+    with tempfile.TemporaryDirectory(prefix='arranque-') as carpeta:
+        env = entorno(carpeta)
+        medir_imports(env)  # crea las tablas y calienta la caché de bytecode
+        for _ in range(args.repeticiones):
+            imports.append(medir_imports(env))
+            respuestas.append(primera_respuesta(args.servidor, env))
+
+    resultado = {
+        'servidor': args.servidor,
+        'repeticiones': args.repeticiones,
+        'import_app_ms': round(statistics.median(m['import_app_s'] for m in imports) * 1000, 1),
+        'import_automatizacion_ms': round(
+            statistics.median(m['import_automatizacion_s'] for m in imports) * 1000, 1),
+        'primera_respuesta_ms': round(statistics.median(respuestas) * 1000, 1),
+        'cargados_con_app': imports[-1]['cargados'],
+    }
+
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"import app:                {resultado['import_app_ms']:>8} ms (mediana de {args.repeticiones})")
+    print(f"import automatizacion:     {resultado['import_automatizacion_ms']:>8} ms (lo paga el primer trabajo)")
+    print(f"primera respuesta de / ({args.servidor}): {resultado['primera_respuesta_ms']:>8} ms")
+    print("cargados con la web: " + ', '.join(
+        f"{modulo} {'sí' if cargado else 'no'}" for modulo, cargado in resultado['cargados_con_app'].items()))
+
+
+if __name__ == '__main__':
+    main()
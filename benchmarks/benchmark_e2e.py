@@ -0,0 +1,261 @@
+"""Benchmark de extremo a extremo contra el portal simulado.
+
+Genera Excels sintéticos de 10/100/1000 filas, los pasa por `upload_file`
+(o por `ejecutar`) con Firefox real apuntando a `portal_simulado`, y reporta
+filas por minuto y latencias p50/p95 de cada paso.
+
+Cada ejecución usa una base de trabajos temporal y usuarios distintos por
+tamaño, para que la deduplicación de envíos no omita filas de corridas
+anteriores; las filas por minuto se cuentan sobre las filas terminadas.
+
+Uso:
+    python benchmarks/benchmark_e2e.py --filas 10 100 --navegadores 4 --latencia-ms 200
+    python benchmarks/benchmark_e2e.py --modo ejecutar --prob-fallo 0.05 --json
+    python benchmarks/benchmark_e2e.py --motor http --sesiones-http 40 --filas 1000
+    python benchmarks/benchmark_e2e.py --filas 100 --perfil ligero   # comparar con --perfil normal
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import portal_simulado  # noqa: E402
+
+PASOS = ['iniciar_sesion', 'atajo_formulario', 'navegar_a_enlace', 'completar_formulario', 'formulario', 'confirmar_envio', 'cerrar_sesion']
+PASOS_HTTP = ['iniciar_sesion', 'completar_formulario', 'formulario', 'cerrar_sesion']
+
+
+def generar_excel(ruta, filas, prefijo='usuario'):
+    import pandas as pd
+
+    registros = [{
+        'usuario': f'{prefijo}{i:05d}',
+        'contra': 'clave123',
+        'expedicion': '01/01/2024',
+        'expiracion': '01/01/2030',
+        'e_no': f'{100000 + i}',
+        'e_expedicion': '01/01/2024',
+        'e_expiracion': '01/01/2026',
+        'salario': '25000',
+        'profesion': 'Agricultor',
+        'empresa': 'Finca Ejemplo SRL',
+        'rnc': '101000001',
+        'societario': 'SRL',
+    } for i in range(filas)]
+    pd.DataFrame(registros).to_excel(ruta, index=False)
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def cronometrar(modulo, tiempos, pasos=PASOS):
+    """Envuelve las funciones de paso del módulo para medir cada llamada."""
+    lock = threading.Lock()
+
+    def envolver(nombre, funcion):
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                with lock:
+                    tiempos[nombre].append(time.perf_counter() - inicio)
+        return medida
+
+    for nombre in pasos:
+        setattr(modulo, nombre, envolver(nombre, getattr(modulo, nombre)))
+
+
+def rss_navegadores_mb():
+    """RSS total de los procesos firefox y geckodriver, leído de /proc."""
+    total_kb = 0
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/comm') as comm:
+                nombre = comm.read().strip()
+            if not nombre.startswith(('firefox', 'geckodriver', 'Web Content', 'WebExtensions',
+                                      'Isolated', 'Privileged', 'RDD Process', 'Socket Process',
+                                      'Utility Process')):
+                continue
+            with open(f'/proc/{pid}/status') as status:
+                for linea in status:
+                    if linea.startswith('VmRSS:'):
+                        total_kb += int(linea.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class MuestreoMemoria:
+    """Muestrea la memoria de los navegadores en segundo plano y guarda el pico."""
+
+    def __init__(self, intervalo=0.5):
+        self.intervalo = intervalo
+        self.pico_mb = 0.0
+        self.muestras = []
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            rss = rss_navegadores_mb()
+            self.muestras.append(rss)
+            self.pico_mb = max(self.pico_mb, rss)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._hilo.join()
+
+    def media_mb(self):
+        return sum(self.muestras) / len(self.muestras) if self.muestras else 0.0
+
+
+def correr_upload(app_modulo, ruta):
+    """Sube el archivo, espera a que termine su trabajo y devuelve el id."""
+    cliente = app_modulo.app.test_client()
+    nombre = os.path.basename(ruta)
+    with open(ruta, 'rb') as archivo:
+        respuesta = cliente.post('/upload', data={'file': (io.BytesIO(archivo.read()), nombre)},
+                                 content_type='multipart/form-data',
+                                 headers={'Accept': 'application/json'})
+    cuerpo = respuesta.get_json()
+    print(cuerpo['mensaje'])
+    if respuesta.status_code != 202:
+        raise RuntimeError(f"La subida falló ({respuesta.status_code}): {cuerpo['mensaje']}")
+    for hilo in threading.enumerate():
+        if hilo.name == f"procesamiento-{cuerpo['trabajo_id']}":
+            hilo.join()
+    return cuerpo['trabajo_id']
+
+
+def correr_ejecutar(app_modulo, ruta):
+    import automatizacion
+
+    return automatizacion.ejecutar(ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo")
+    parser.add_argument('--filas', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--modo', choices=['upload', 'ejecutar'], default='upload')
+    parser.add_argument('--navegadores', type=int, default=0,
+                        help="NUM_NAVEGADORES (0 = automático)")
+    parser.add_argument('--motor', choices=['navegador', 'http'], default='navegador',
+                        help="Motor de envío de cada trabajo")
+    parser.add_argument('--sesiones-http', type=int, default=20,
+                        help="NUM_SESIONES_HTTP con --motor http")
+    parser.add_argument('--latencia-ms', type=float, default=100)
+    parser.add_argument('--prob-fallo', type=float, default=0.0)
+    parser.add_argument('--prob-popup', type=float, default=0.2)
+    parser.add_argument('--relevo', type=int, default=0,
+                        help="NAVEGADORES_RELEVO (0 = sin solapar filas)")
+    parser.add_argument('--perfil', choices=['normal', 'ligero'], default='normal',
+                        help="Perfil de Firefox (ligero = PERFIL_LIGERO=1)")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args()
+
+    # Base propia: en la de la app los usuarios de corridas anteriores se omitirían como ya enviados
+    base_datos = tempfile.TemporaryDirectory(prefix='benchmark-e2e-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(base_datos.name, 'trabajos.db')}"
+    os.environ['REANUDAR_AL_ARRANCAR'] = '0'
+
+    url, servidor = portal_simulado.iniciar_en_hilo(
+        latencia_ms=args.latencia_ms, prob_fallo=args.prob_fallo, prob_popup=args.prob_popup)
+    os.environ['PORTAL_URL'] = url
+    os.environ['NUM_NAVEGADORES'] = str(args.navegadores)
+    os.environ['MOTOR_ENVIO'] = args.motor
+    os.environ['PERFIL_LIGERO'] = '1' if args.perfil == 'ligero' else '0'
+    os.environ['NUM_SESIONES_HTTP'] = str(args.sesiones_http)
+    os.environ['NAVEGADORES_RELEVO'] = str(args.relevo)
+
+    import app as app_modulo
+    import automatizacion
+    import motor_http
+    import progreso
+
+    tiempos = defaultdict(list)
+    pasos = PASOS
+    if args.motor == 'http':
+        pasos = PASOS_HTTP
+        cronometrar(motor_http, tiempos, pasos)
+    else:
+        cronometrar(automatizacion, tiempos)
+    correr = correr_upload if args.modo == 'upload' else correr_ejecutar
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for corrida, filas in enumerate(args.filas):
+            tiempos.clear()
+            ruta = os.path.join(carpeta, f'sintetico_{corrida}_{filas}.xlsx')
+            # Usuarios distintos en cada tamaño: los de uno anterior se omitirían
+            generar_excel(ruta, filas, prefijo=f'bench{corrida}_')
+
+            inicio = time.perf_counter()
+            with MuestreoMemoria() as memoria:
+                trabajo_id = correr(app_modulo, ruta)
+            duracion = time.perf_counter() - inicio
+
+            resumen = progreso.obtener(trabajo_id).resumen()
+            terminadas = resumen['enviado'] + resumen['fallido']
+            if terminadas != filas:
+                print(f"⚠ {filas} filas pedidas pero {terminadas} terminadas "
+                      f"({resumen['omitidas']} omitidas, {resumen['rechazadas']} rechazadas)")
+
+            resultados.append({
+                'filas': filas,
+                'terminadas': terminadas,
+                'enviadas': resumen['enviado'],
+                'fallidas': resumen['fallido'],
+                'perfil': args.perfil,
+                'duracion_s': round(duracion, 2),
+                'filas_por_minuto': round(terminadas / duracion * 60, 1),
+                'memoria_pico_mb': round(memoria.pico_mb, 1),
+                'memoria_media_mb': round(memoria.media_mb(), 1),
+                'pasos': {
+                    paso: {
+                        'n': len(tiempos[paso]),
+                        'p50_s': round(percentil(tiempos[paso], 50), 3),
+                        'p95_s': round(percentil(tiempos[paso], 95), 3),
+                    } for paso in pasos
+                },
+            })
+
+    servidor.shutdown()
+    base_datos.cleanup()
+
+    if args.json:
+        print(json.dumps(resultados, indent=2, ensure_ascii=False))
+        return
+
+    for resultado in resultados:
+        print(f"\n== {resultado['terminadas']}/{resultado['filas']} filas terminadas ({resultado['perfil']}): "
+              f"{resultado['duracion_s']} s, "
+              f"{resultado['filas_por_minuto']} filas/min, memoria pico {resultado['memoria_pico_mb']} MB "
+              f"(media {resultado['memoria_media_mb']} MB) ==")
+        print(f"{'paso':<22}{'n':>6}{'p50 (s)':>10}{'p95 (s)':>10}")
+        for paso, datos in resultado['pasos'].items():
+            print(f"{paso:<22}{datos['n']:>6}{datos['p50_s']:>10}{datos['p95_s']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""Micro-benchmark de localización de elementos por página.
+
+Recorre el portal simulado con un Firefox real y, en cada página, compara
+las búsquedas que hacían antes los pasos (XPath en línea, el `translate()`
+sobre `tblLinks`, elementos buscados dos veces) con las del registro de
+`paginas` (CSS/ID y elementos guardados por página). Cada repetición usa un
+objeto página nuevo, así que la primera búsqueda de cada elemento se paga.
+
+Uso:
+    python benchmarks/benchmark_localizadores.py --repeticiones 200
+    python benchmarks/benchmark_localizadores.py --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import portal_simulado  # noqa: E402
+
+_XPATH_SIGUIENTE = "//div[contains(@class, 'f-right')]//button[contains(text(), 'Siguiente')]"
+
+# Búsquedas que hacía cada paso antes del registro, en el mismo orden
+BUSQUEDAS_ANTES = {
+    'login': [('name', 'id'), ('name', 'id'), ('name', 'password'),
+              ('xpath', '//input[@type="submit" and @value="Iniciar Sesión"]')],
+    'inicio': [('css selector', '.welcome'), ('xpath', '//button[contains(text(), "Aceptar")]'),
+               ('link text', 'LISTA DE APLICACIONES')],
+    'aplicaciones': [('css selector', '#tblLinks'), (
+        'xpath', "//td[a[contains(translate(normalize-space(.), 'abcdefghijklmnopqrstuvwxyzáéíóúü', "
+                 "'ABCDEFGHIJKLMNOPQRSTUVWXYZÁÉÍÓÚÜ'), 'SOLICITUD DE RENOVACIÓN CARNET DE TRABAJADORES "
+                 "TEMPOREROS')]]/following-sibling::td/input[@type='image']")],
+    'renovacion': [('css selector', '.rc-wrap-t'),
+                   ('xpath', "//div[contains(@class, 'f-right')]//button[contains(text(), 'Aplicar')]")],
+    'formulario': [('css selector', '#nombre'), ('id', 'radio_button_3'),
+                   ('xpath', '//select[@id="sector"]/option[normalize-space()="{sector}"]'),
+                   ('css selector', '#newsector option[value="{newsector}"]'),
+                   ('xpath', _XPATH_SIGUIENTE)],
+    'empresa': [('css selector', '#sobre_empresa'), ('xpath', _XPATH_SIGUIENTE)],
+}
+
+# Elementos que piden ahora los pasos a la página (los repetidos salen de la caché)
+BUSQUEDAS_REGISTRO = {
+    'login': ['usuario', 'usuario', 'contrasena', 'entrar'],
+    'inicio': ['bienvenida', 'aceptar_popup', 'lista_aplicaciones'],
+    'aplicaciones': ['tabla', 'solicitud'],
+    'renovacion': ['contenedor', 'aplicar'],
+    'formulario': ['nombre', 'sede', 'sector', 'newsector', 'siguiente'],
+    'empresa': ['sobre_empresa', 'siguiente'],
+}
+
+
+def medir(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def medir_pagina(ctx, nombre, repeticiones):
+    import llenado
+    import paginas
+
+    clase = next(c for c in paginas.Pagina.__subclasses__() if c.nombre == nombre)
+    antes = [(por, valor.format(sector=llenado.SECTOR, newsector=llenado.NEWSECTOR))
+             for por, valor in BUSQUEDAS_ANTES[nombre]]
+
+    def como_antes():
+        for por, valor in antes:
+            ctx.driver.find_element(por, valor)
+
+    llamadas = []
+
+    def con_registro():
+        pagina = clase(ctx)
+        for clave in BUSQUEDAS_REGISTRO[nombre]:
+            pagina.elemento(clave)
+        llamadas.append(pagina.busquedas)
+
+    como_antes()  # que todo esté en la página antes de medir
+    con_registro()
+    return {
+        'pagina': nombre,
+        'antes_ms': round(medir(como_antes, repeticiones) * 1000, 3),
+        'registro_ms': round(medir(con_registro, repeticiones) * 1000, 3),
+        'llamadas_antes': len(antes),
+        'llamadas_registro': llamadas[-1],
+    }
+
+
+def recorrer(ctx, url, repeticiones):
+    """Lleva el navegador por cada página del flujo y mide al llegar a cada una."""
+    import automatizacion
+    import llenado
+    import paginas
+
+    resultados = []
+    ctx.driver.get(f'{url}/Account/Login')
+    resultados.append(medir_pagina(ctx, 'login', repeticiones))
+
+    paginas.PaginaLogin(ctx).entrar('usuario00001', 'clave123')
+    inicio = paginas.PaginaInicio(ctx)
+    inicio.esperar('aceptar_popup', 'popup', visible=True)  # el portal lo muestra siempre
+    resultados.append(medir_pagina(ctx, 'inicio', repeticiones))
+
+    inicio.elemento('aceptar_popup').click()
+    automatizacion.navegar_a_enlace(ctx)
+    resultados.append(medir_pagina(ctx, 'aplicaciones', repeticiones))
+
+    ctx.pagina.elemento('solicitud').click()
+    paginas.PaginaRenovacion(ctx).esperar('contenedor', 'pagina_renovacion', visible=True)
+    resultados.append(medir_pagina(ctx, 'renovacion', repeticiones))
+
+    paginas.PaginaRenovacion(ctx).pulsar('aplicar', 'boton_aplicar')
+    formulario = paginas.PaginaFormulario(ctx)
+    formulario.esperar('nombre', 'formulario')
+    automatizacion.llenar_campos(ctx, {'municipio': llenado.MUNICIPIO})
+    formulario.esperar('sector', 'sector')
+    automatizacion.llenar_campos(ctx, {'sector': {'texto': llenado.SECTOR}})
+    formulario.esperar('newsector', 'newsector')
+    resultados.append(medir_pagina(ctx, 'formulario', repeticiones))
+
+    formulario.pulsar('siguiente', 'boton_siguiente')
+    paginas.PaginaEmpresa(ctx).esperar('sobre_empresa', 'formulario_empresa')
+    resultados.append(medir_pagina(ctx, 'empresa', repeticiones))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de localizar elementos por página")
+    parser.add_argument('--repeticiones', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args()
+
+    url, servidor = portal_simulado.iniciar_en_hilo(prob_popup=1.0)
+    os.environ['PORTAL_URL'] = url
+
+    import automatizacion
+
+    ctx = automatizacion.initialize_driver(0)
+    try:
+        resultados = recorrer(ctx, url, args.repeticiones)
+    finally:
+        automatizacion.cerrar_driver(ctx)
+        servidor.shutdown()
+
+    if args.json:
+        print(json.dumps(resultados, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{'página':<14}{'antes (ms)':>12}{'registro (ms)':>15}{'llamadas':>12}")
+    for r in resultados:
+        print(f"{r['pagina']:<14}{r['antes_ms']:>12}{r['registro_ms']:>15}"
+              f"{r['llamadas_antes']:>6} → {r['llamadas_registro']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Capturas de diagnóstico de las filas que fallan.
+
+Al fallar una fila el trabajador solo pide al navegador lo que no puede
+esperar (captura de pantalla en base64, HTML y URL) y lo deja en una cola;
+un hilo aparte lo decodifica, lo empaqueta en un `.tar.gz` por fila en
+`DIRECTORIO_CAPTURAS` junto con los tiempos de cada paso, y borra las más
+antiguas cuando la carpeta pasa de `CAPTURAS_MAX_MB`. Las filas exitosas
+no pasan por aquí. Si la cola está llena la captura se descarta en lugar
+de frenar al trabajador.
+
+Con un navegador muerto (clase `navegador`) no se le pide nada: solo se
+guardan el error y los tiempos. Los datos de la fila (contraseña incluida)
+nunca se escriben.
+"""
+import base64
+import io
+import json
+import os
+import queue
+import re
+import tarfile
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import metricas
+
+# "0" desactiva las capturas
+CAPTURAS_FALLOS = os.environ.get("CAPTURAS_FALLOS", "1") == "1"
+DIRECTORIO_CAPTURAS = os.environ.get("DIRECTORIO_CAPTURAS", "capturas")
+# Tamaño total de la carpeta a partir del cual se borran las capturas más antiguas
+CAPTURAS_MAX_MB = float(os.environ.get("CAPTURAS_MAX_MB", "200"))
+# Capturas esperando al hilo escritor; las que no caben se descartan
+CAPTURAS_EN_COLA = int(os.environ.get("CAPTURAS_EN_COLA", "50"))
+
+# Clases de error con el navegador inservible: no se le piden capturas
+_SIN_NAVEGADOR = ('navegador',)
+
+
+def _nombre_seguro(texto):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(texto))[:40] or 'desconocido'
+
+
+class CapturasFallo:
+    """Cola de capturas de fallo y el hilo que las escribe comprimidas."""
+
+    def __init__(self, directorio=DIRECTORIO_CAPTURAS, max_mb=CAPTURAS_MAX_MB,
+                 en_cola=CAPTURAS_EN_COLA, activas=CAPTURAS_FALLOS):
+        self.directorio = directorio
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.activas = activas
+        self._cola = queue.Queue(maxsize=max(1, en_cola))
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._archivos = deque()  # (ruta, bytes) de la más antigua a la más nueva
+        self._bytes = 0
+
+        self.capturadas = 0
+        self.escritas = 0
+        self.descartadas = 0
+        self.borradas = 0
+        self.tiempo_captura = 0.0
+
+    # ---- lado del trabajador ----
+
+    def capturar(self, ctx, fila, clase, error):
+        """Toma lo necesario del navegador y lo encola; nunca lanza."""
+        if not self.activas:
+            return
+        inicio = time.perf_counter()
+        captura = {
+            'trabajo': fila.trabajo.id,
+            'fila': fila.numero,
+            'usuario': fila.usuario,
+            'clase': clase,
+            'error': f"{type(error).__name__}: {error}"[:2000],
+            'paso': fila.paso,
+            'tiempos': [(paso, round(segundos, 3)) for paso, segundos in fila.tiempos or ()],
+            'duracion_s': round(time.monotonic() - fila.inicio, 3) if fila.inicio else None,
+            'momento': datetime.now().isoformat(timespec='seconds'),
+            'trabajador': ctx.id,
+        }
+        driver = getattr(ctx, 'driver', None)
+        if driver is not None and clase not in _SIN_NAVEGADOR:
+            for clave, leer in (('url', lambda: driver.current_url),
+                                ('captura_b64', driver.get_screenshot_as_base64),
+                                ('html', lambda: driver.page_source)):
+                try:
+                    captura[clave] = leer()
+                except Exception as e:
+                    captura[f'{clave}_error'] = str(e)[:300]
+        duracion = time.perf_counter() - inicio
+
+        self._iniciar()
+        try:
+            self._cola.put_nowait(captura)
+        except queue.Full:
+            with self._lock:
+                self.descartadas += 1
+            metricas.incrementar('capturas_fallo_total', 'descartada')
+            return
+        with self._lock:
+            self.capturadas += 1
+            self.tiempo_captura += duracion
+
+    # ---- hilo escritor ----
+
+    def _iniciar(self):
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(target=self._escribir_siempre, name="capturas-fallo",
+                                          daemon=True)
+        self._hilo.start()
+
+    def _inventario(self):
+        """Capturas que ya había en la carpeta, de la más antigua a la más nueva."""
+        os.makedirs(self.directorio, exist_ok=True)
+        existentes = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.tar.gz'):
+                ruta = os.path.join(self.directorio, nombre)
+                try:
+                    estado = os.stat(ruta)
+                except OSError:
+                    continue
+                existentes.append((estado.st_mtime, ruta, estado.st_size))
+        for _, ruta, tamano in sorted(existentes):
+            self._archivos.append((ruta, tamano))
+            self._bytes += tamano
+
+    def _escribir_siempre(self):
+        try:
+            self._inventario()
+            self._recortar()
+        except OSError as e:
+            print(f"✗ No se pudo preparar la carpeta de capturas {self.directorio}: {e}")
+        while True:
+            captura = self._cola.get()
+            try:
+                self._escribir(captura)
+                metricas.incrementar('capturas_fallo_total', 'escrita')
+            except Exception as e:
+                metricas.incrementar('capturas_fallo_total', 'error')
+                print(f"✗ No se pudo guardar la captura de {captura.get('usuario')}: {e}")
+            finally:
+                self._cola.task_done()
+
+    def _escribir(self, captura):
+        imagen = captura.pop('captura_b64', None)
+        html = captura.pop('html', None)
+        nombre = (f"{captura['momento'].replace(':', '')}_{_nombre_seguro(captura['trabajo'])}_"
+                  f"{captura['fila']}_{_nombre_seguro(captura['usuario'])}_{captura['clase']}.tar.gz")
+        ruta = os.path.join(self.directorio, nombre)
+
+        contenido = [('datos.json', json.dumps(captura, ensure_ascii=False, indent=2).encode('utf-8'))]
+        if imagen:
+            contenido.append(('captura.png', base64.b64decode(imagen)))
+        if html is not None:
+            contenido.append(('pagina.html', html.encode('utf-8')))
+
+        temporal = ruta + '.tmp'
+        with tarfile.open(temporal, 'w:gz') as paquete:
+            for archivo, datos in contenido:
+                info = tarfile.TarInfo(archivo)
+                info.size = len(datos)
+                info.mtime = time.time()
+                paquete.addfile(info, io.BytesIO(datos))
+        os.replace(temporal, ruta)
+
+        tamano = os.path.getsize(ruta)
+        with self._lock:
+            self.escritas += 1
+        self._archivos.append((ruta, tamano))
+        self._bytes += tamano
+        self._recortar()
+
+    def _recortar(self):
+        """Borra las capturas más antiguas hasta quedar bajo el tope (nunca la última)."""
+        while self._bytes > self.max_bytes and len(self._archivos) > 1:
+            ruta, tamano = self._archivos.popleft()
+            self._bytes -= tamano
+            try:
+                os.remove(ruta)
+            except OSError:
+                continue
+            with self._lock:
+                self.borradas += 1
+
+    def esperar(self, espera=10):
+        """Da tiempo al hilo escritor a vaciar la cola (al cerrar el proceso)."""
+        limite = time.monotonic() + espera
+        while self._hilo is not None and self._cola.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.05)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'capturadas': self.capturadas,
+                'escritas': self.escritas,
+                'descartadas': self.descartadas,
+                'borradas_por_espacio': self.borradas,
+                'en_cola': self._cola.qsize(),
+                'captura_media_ms': round(self.tiempo_captura / self.capturadas * 1000, 1)
+                if self.capturadas else 0.0,
+                'carpeta_mb': round(self._bytes / 1024 / 1024, 1),
+            }
@@ -0,0 +1,88 @@
+"""Cookies de sesiones ya autenticadas en el portal, por usuario.
+
+Iniciar sesión cuesta la página de login, el envío, la espera de la
+bienvenida y la del popup. Tras un login correcto se guardan en memoria
+las cookies del navegador, y si la fila se reintenta se ponen en un
+navegador limpio en lugar de repetir el login. Si el portal ya no las
+acepta se descartan y se entra normalmente. Cuando la fila termina (bien
+o mal) su entrada se descarta y la sesión se cierra en el portal.
+
+Cada entrada se usa una sola vez y caduca a los `TTL_COOKIES_SESION`
+segundos; las de un trabajo se borran cuando el trabajo termina. Nunca se
+escriben a disco.
+"""
+import os
+import threading
+import time
+
+import metricas
+
+# Segundos que se guardan las cookies de una sesión (0 desactiva la caché)
+TTL_COOKIES_SESION = float(os.environ.get("TTL_COOKIES_SESION", "600"))
+
+# Atributos de cookie que acepta add_cookie; el dominio lo pone la página actual
+_ATRIBUTOS = ('name', 'value', 'path', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+
+class CacheCookies:
+    """usuario -> cookies de su última sesión abierta, con caducidad."""
+
+    def __init__(self, ttl=TTL_COOKIES_SESION):
+        self.ttl = ttl
+        self._entradas = {}  # usuario -> (cookies, momento en que caduca, trabajo_id)
+        self._lock = threading.Lock()
+
+        self.guardadas = 0
+        self.reusadas = 0
+        self.rechazadas = 0
+
+    def guardar(self, usuario, trabajo_id, cookies):
+        if self.ttl <= 0 or not cookies:
+            return
+        limpias = [{clave: cookie[clave] for clave in _ATRIBUTOS if clave in cookie}
+                   for cookie in cookies]
+        with self._lock:
+            self._entradas[usuario] = (limpias, time.monotonic() + self.ttl, trabajo_id)
+            self.guardadas += 1
+
+    def tomar(self, usuario):
+        """Las cookies guardadas del usuario (y las quita), o None."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entrada = self._entradas.pop(usuario, None)
+        if entrada is None or time.monotonic() >= entrada[1]:
+            return None
+        return entrada[0]
+
+    def tiene(self, usuario):
+        with self._lock:
+            entrada = self._entradas.get(usuario)
+        return entrada is not None and time.monotonic() < entrada[1]
+
+    def resultado(self, valida):
+        """Si el portal aceptó las cookies puestas con `tomar`."""
+        metricas.incrementar('sesiones_restauradas_total', 'reusada' if valida else 'rechazada')
+        with self._lock:
+            if valida:
+                self.reusadas += 1
+            else:
+                self.rechazadas += 1
+
+    def descartar(self, usuario):
+        with self._lock:
+            self._entradas.pop(usuario, None)
+
+    def descartar_trabajo(self, trabajo_id):
+        with self._lock:
+            for usuario in [u for u, (_, _, t) in self._entradas.items() if t == trabajo_id]:
+                del self._entradas[usuario]
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'sesiones_guardadas': len(self._entradas),
+                'guardadas': self.guardadas,
+                'reusadas': self.reusadas,
+                'rechazadas': self.rechazadas,
+            }
@@ -0,0 +1,240 @@
+"""Esperas que terminan en cuanto la página está lista.
+
+Sustituye los `time.sleep` fijos y el sondeo de 0.5 s de WebDriverWait por:
+- un MutationObserver dentro del navegador que avisa cuando aparece el
+  elemento (sin ir y volver al geckodriver cada medio segundo), y
+- un sondeo fino como respaldo cuando la página navega durante la espera.
+
+También lleva la cuenta del tiempo que antes se perdía en sleeps fijos.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import (JavascriptException, NoSuchElementException, TimeoutException,
+                                        WebDriverException)
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import metricas
+
+# Frecuencia de sondeo de respaldo (WebDriverWait usa 0.5 s por defecto)
+POLL_ESPERA = float(os.environ.get("POLL_ESPERA", "0.05"))
+
+# Tiempo máximo por paso, en segundos. Se puede cambiar con TIEMPO_ESPERA_<PASO>
+TIEMPOS_ESPERA = {
+    'login': 30,
+    'bienvenida': 30,
+    'popup': 5,  # antes 30 s perdidos cada vez que el popup no aparecía
+    'enlace_lista': 30,
+    'tabla_aplicaciones': 30,
+    'solicitud': 30,
+    'pagina_renovacion': 30,
+    'boton_aplicar': 30,
+    'formulario': 10,
+    'atajo': 5,  # si el atajo no lleva al formulario se vuelve al camino completo
+    'sector': 10,
+    'newsector': 10,
+    'boton_siguiente': 30,
+    'formulario_empresa': 10,
+    'envio': 10,
+    'pagina_lista': 30,
+}
+for _paso in TIEMPOS_ESPERA:
+    _valor = os.environ.get(f"TIEMPO_ESPERA_{_paso.upper()}")
+    if _valor:
+        TIEMPOS_ESPERA[_paso] = float(_valor)
+
+TIEMPO_MAXIMO_SCRIPT = max(TIEMPOS_ESPERA.values()) + 5
+
+# Pasos cuyo elemento llega por una petición del script después de cargar la página:
+# si no aparece, el que tardó es el portal aunque el documento esté completo
+PASOS_POR_SCRIPT = ('sector', 'newsector')
+
+# Primer elemento de `selector`; con `texto`, el primero cuyo texto (en mayúsculas y
+# con espacios normalizados) lo contiene; con `objetivo`, el descendiente que lo cumple
+_JS_BUSCAR = """
+function esVisible(el) {
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+}
+function buscar(selector, visible, texto, objetivo) {
+    if (!texto && !objetivo) {
+        var unico = document.querySelector(selector);
+        return unico && (!visible || esVisible(unico)) ? unico : null;
+    }
+    var candidatos = document.querySelectorAll(selector);
+    for (var i = 0; i < candidatos.length; i++) {
+        var el = candidatos[i];
+        if (texto && (el.textContent || '').replace(/\\s+/g, ' ').toUpperCase().indexOf(texto) < 0) {
+            continue;
+        }
+        if (objetivo) {
+            el = el.querySelector(objetivo);
+            if (!el) { continue; }
+        }
+        if (!visible || esVisible(el)) { return el; }
+    }
+    return null;
+}
+"""
+
+_JS_ENCONTRAR = _JS_BUSCAR + """
+return buscar(arguments[0], arguments[1], arguments[2], arguments[3]);
+"""
+
+_JS_OBSERVAR = _JS_BUSCAR + """
+var selector = arguments[0], visible = arguments[1], texto = arguments[2], objetivo = arguments[3];
+var limite = arguments[4];
+var listo = arguments[arguments.length - 1];
+var encontrado = buscar(selector, visible, texto, objetivo);
+if (encontrado) { listo(encontrado); return; }
+var temporizador;
+var observador = new MutationObserver(function () {
+    var el = buscar(selector, visible, texto, objetivo);
+    if (el) { observador.disconnect(); clearTimeout(temporizador); listo(el); }
+});
+observador.observe(document.documentElement,
+                   {childList: true, subtree: true, attributes: true});
+temporizador = setTimeout(function () { observador.disconnect(); listo(null); }, limite);
+"""
+
+_lock = threading.Lock()
+_totales = {'filas': 0, 'espera_real_s': 0.0, 'espera_legada_s': 0.0}
+
+
+def tiempo_espera(paso):
+    return TIEMPOS_ESPERA.get(paso, 30)
+
+
+def preparar_driver(driver):
+    """Ajustes del driver que necesitan las esperas asíncronas."""
+    driver.set_script_timeout(TIEMPO_MAXIMO_SCRIPT)
+
+
+def nueva_espera(driver, paso):
+    return WebDriverWait(driver, tiempo_espera(paso), poll_frequency=POLL_ESPERA)
+
+
+def esperar(ctx, condicion, paso):
+    """Igual que wait.until pero con el tiempo del paso y sondeo fino."""
+    with metricas.medir('espera_duracion_segundos', paso):
+        return nueva_espera(ctx.driver, paso).until(condicion)
+
+
+def encontrar(driver, selector, visible=False, texto=None, objetivo=None):
+    """Busca sin esperar (una sola llamada al navegador); None si no está."""
+    if not texto and not objetivo and not visible:
+        elementos = driver.find_elements('css selector', selector)
+        return elementos[0] if elementos else None
+    return driver.execute_script(_JS_ENCONTRAR, selector, visible, texto, objetivo)
+
+
+def esperar_selector(ctx, selector, paso, visible=False, texto=None, objetivo=None):
+    """Espera un elemento CSS con un MutationObserver; sondeo si la página navega.
+
+    `texto` y `objetivo` afinan la búsqueda como en `encontrar`: así los botones
+    y enlaces que solo se distinguen por su texto no necesitan XPath.
+    """
+    with metricas.medir('espera_duracion_segundos', paso):
+        return _observar_selector(ctx, selector, paso, visible, texto, objetivo)
+
+
+def _observar_selector(ctx, selector, paso, visible, texto=None, objetivo=None):
+    limite = tiempo_espera(paso)
+    inicio = time.monotonic()
+    try:
+        elemento = ctx.driver.execute_async_script(
+            _JS_OBSERVAR, selector, visible, texto, objetivo, int(limite * 1000))
+        if elemento is None:
+            raise _no_aparecio(ctx, selector, paso, limite)
+        return elemento
+    except (JavascriptException, WebDriverException) as e:
+        if isinstance(e, (TimeoutException, NoSuchElementException)):
+            raise
+        # La página se descargó durante la espera: seguir con sondeo fino
+        restante = max(POLL_ESPERA, limite - (time.monotonic() - inicio))
+        espera = WebDriverWait(ctx.driver, restante, poll_frequency=POLL_ESPERA)
+        if texto or objetivo:
+            condicion = lambda d: encontrar(d, selector, visible, texto, objetivo)
+        else:
+            localizar = EC.visibility_of_element_located if visible else EC.presence_of_element_located
+            condicion = localizar(('css selector', selector))
+        try:
+            return espera.until(condicion)
+        except TimeoutException:
+            raise _no_aparecio(ctx, selector, paso, limite) from None
+
+
+def _no_aparecio(ctx, selector, paso, limite):
+    """Error para un selector que no apareció a tiempo.
+
+    Si el documento ya terminó de cargar, la página llegó pero no tiene el
+    elemento (cambió o es otra): NoSuchElementException, que no se reintenta.
+    Si seguía cargando, el lento es el portal: TimeoutException.
+    """
+    if paso not in PASOS_POR_SCRIPT:
+        try:
+            cargada = ctx.driver.execute_script("return document.readyState") == 'complete'
+        except WebDriverException:
+            cargada = False
+        if cargada:
+            return NoSuchElementException(f"[{paso}] La página cargó sin '{selector}'")
+    return TimeoutException(f"[{paso}] No apareció '{selector}' en {limite} s")
+
+
+def esperar_pagina_lista(ctx, paso='pagina_lista'):
+    """Espera a que el documento actual termine de cargar."""
+    return esperar(
+        ctx, lambda d: d.execute_script("return document.readyState") != 'loading', paso)
+
+
+def desplazar_a(ctx, elemento, legado=0.5):
+    """scrollIntoView instantáneo; antes se dormía `legado` segundos después."""
+    ctx.driver.execute_script(
+        "arguments[0].scrollIntoView({block: 'center', behavior: 'instant'});", elemento)
+    registrar(ctx, legado, 0.0)
+
+
+@contextmanager
+def en_lugar_de(ctx, segundos_legado):
+    """Mide una espera real que sustituye a un `time.sleep(segundos_legado)`."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(ctx, segundos_legado, time.perf_counter() - inicio)
+
+
+# ---- contabilidad del tiempo ahorrado ----
+
+def registrar(ctx, legado, real):
+    ctx.espera_legada += legado
+    ctx.espera_real += real
+
+
+def iniciar_fila(ctx):
+    ctx.espera_legada = 0.0
+    ctx.espera_real = 0.0
+
+
+def cerrar_fila(ctx):
+    """Suma la fila a los totales y devuelve (espera_real, espera_legada)."""
+    with _lock:
+        _totales['filas'] += 1
+        _totales['espera_real_s'] += ctx.espera_real
+        _totales['espera_legada_s'] += ctx.espera_legada
+    return ctx.espera_real, ctx.espera_legada
+
+
+def estadisticas_esperas():
+    with _lock:
+        filas = _totales['filas']
+        real = _totales['espera_real_s']
+        legada = _totales['espera_legada_s']
+    return {
+        'filas': filas,
+        'espera_real_s': round(real, 2),
+        'espera_legada_s': round(legada, 2),
+        'ahorro_por_fila_s': round((legada - real) / filas, 2) if filas else 0.0,
+    }
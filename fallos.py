@@ -0,0 +1,109 @@
+"""Clasificación de errores por fila y política de reintento de cada clase.
+
+- portal: el portal tardó o devolvió un error (timeouts de carga o de
+  respuesta, 5xx, página de error de red). Se reintenta con espera
+  exponencial desde el último paso completado.
+- navegador: la sesión de WebDriver murió o dejó de responder. Se relanza
+  solo el navegador de ese trabajador y se repite la fila desde el login.
+- credenciales: el portal rechazó usuario o contraseña. Falla sin reintento.
+- elemento: falta un campo o botón esperado (también el que no aparece
+  en una página ya cargada, ver `esperas`), o el portal rechazó el
+  formulario. Falla sin reintento: repetir daría lo mismo.
+- desconocido: cualquier otro error. Falla sin reintento, como antes.
+- incierto: el error llegó con el último envío en curso (timeout o 5xx del
+  POST final, navegador caído tras pulsar Siguiente). No se sabe si el
+  portal registró la solicitud: falla sin reintento ni respaldo con el
+  navegador, para no enviarla dos veces.
+"""
+import os
+import random
+from collections import namedtuple
+
+import requests
+from selenium.common.exceptions import (
+    ElementClickInterceptedException, ElementNotInteractableException, InvalidSessionIdException,
+    NoSuchElementException, NoSuchWindowException, StaleElementReferenceException, TimeoutException,
+    WebDriverException)
+from urllib3.exceptions import HTTPError as ErrorUrllib3
+
+
+class CredencialesInvalidas(Exception):
+    """El portal rechazó el usuario o la contraseña."""
+
+
+class EnvioSinConfirmar(Exception):
+    """El último formulario se envió pero el portal no lo aceptó."""
+
+
+# reintentos: intentos extra; reiniciar: relanzar el navegador antes de reintentar;
+# espera_base: segundos antes del primer reintento (se duplica en cada uno)
+Politica = namedtuple('Politica', 'reintentos reiniciar espera_base')
+
+POLITICAS = {
+    'portal': Politica(int(os.environ.get("REINTENTOS_PORTAL", "3")), False,
+                       float(os.environ.get("ESPERA_REINTENTO", "2"))),
+    'navegador': Politica(int(os.environ.get("REINTENTOS_NAVEGADOR", "2")), True, 0.0),
+    'credenciales': Politica(0, False, 0.0),
+    'elemento': Politica(int(os.environ.get("REINTENTOS_ELEMENTO", "0")), False, 0.0),
+    'desconocido': Politica(0, False, 0.0),
+    'incierto': Politica(0, True, 0.0),
+}
+
+# Tope de la espera entre reintentos, en segundos
+ESPERA_REINTENTO_MAX = float(os.environ.get("ESPERA_REINTENTO_MAX", "30"))
+
+# Mensajes de WebDriverException que indican un navegador muerto o colgado
+_NAVEGADOR_MUERTO = (
+    'invalid session id', 'session deleted', 'no such window', 'browsing context has been discarded',
+    'failed to decode response from marionette', 'tried to run command without establishing a connection',
+    'connection refused', 'session not created', 'process unexpectedly closed',
+)
+
+# Mensajes de WebDriverException que son errores de red hacia el portal
+_ERROR_DE_RED = ('about:neterror', 'reached error page', 'ns_error_net', 'ns_error_connection',
+                 'ns_error_unknown_host', 'dnsnotfound', 'netreset', 'nettimeout')
+
+
+def clasificar(error, enviando=False):
+    """Clase de un error: portal, navegador, credenciales, elemento, desconocido o incierto.
+
+    Con `enviando` el error llegó después de lanzar el último envío: salvo que
+    el portal lo haya rechazado de forma visible, es 'incierto'.
+    """
+    if enviando and not isinstance(error, EnvioSinConfirmar):
+        return 'incierto'
+    if isinstance(error, CredencialesInvalidas):
+        return 'credenciales'
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException, ErrorUrllib3, ConnectionError)):
+        # urllib3/ConnectionError: geckodriver no responde o se cayó
+        return 'navegador'
+    if isinstance(error, TimeoutException):
+        return 'portal'
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, requests.HTTPError)):
+        return 'portal'
+    if isinstance(error, (NoSuchElementException, ElementNotInteractableException,
+                          ElementClickInterceptedException, StaleElementReferenceException,
+                          EnvioSinConfirmar)):
+        return 'elemento'
+    if isinstance(error, WebDriverException):
+        mensaje = (error.msg or str(error)).lower()
+        if any(texto in mensaje for texto in _ERROR_DE_RED):
+            return 'portal'
+        if any(texto in mensaje for texto in _NAVEGADOR_MUERTO):
+            return 'navegador'
+    return 'desconocido'
+
+
+def espera_reintento(politica, intento):
+    """Espera exponencial con jitter antes del reintento número `intento` (1, 2, ...)."""
+    if politica.espera_base <= 0:
+        return 0.0
+    tope = min(ESPERA_REINTENTO_MAX, politica.espera_base * 2 ** (intento - 1))
+    return random.uniform(tope / 2, tope)
+
+
+def describir(clase, error):
+    """Texto guardado como error de la fila."""
+    # WebDriverException agrega al str() un enlace a la documentación
+    mensaje = (getattr(error, 'msg', None) or str(error)).strip() or type(error).__name__
+    return f"[{clase}] {mensaje}"
@@ -0,0 +1,33 @@
+"""Configuración de gunicorn: `gunicorn -c gunicorn.conf.py main:app`.
+
+La web (Flask, SQLAlchemy, plantillas) se carga una sola vez en el proceso
+maestro antes del fork (`preload_app`): un worker nuevo o relanzado atiende
+sin volver a importarla. Selenium y los navegadores no se cargan aquí, sino
+con el primer trabajo (ver `automatizacion.py`).
+
+Los trabajos, su progreso en memoria y los navegadores viven en el proceso
+que recibe la subida, por eso hay un solo worker, con varios hilos.
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_HILOS", "8"))
+preload_app = True
+# Los streams SSE de /jobs/<id>/stream mantienen la conexión abierta
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+
+def post_fork(server, worker):
+    # Las conexiones que abrió el maestro al crear las tablas no se comparten con el worker
+    from persistencia import soltar_conexiones
+
+    soltar_conexiones()
+
+
+def post_worker_init(worker):
+    # Reanudación y precalentado solo aquí, en el worker ya creado (importar la app no los arranca)
+    from app import arrancar_segundo_plano
+
+    arrancar_segundo_plano()
@@ -0,0 +1,78 @@
+"""Lectura en streaming de las hojas de usuarios (.xlsx, .xls y .csv).
+
+`leer_filas` es un generador: cada fila se entrega en cuanto se parsea, de
+modo que el primer navegador arranca mientras el resto del archivo se sigue
+leyendo y la memoria no crece con el número de filas.
+"""
+import csv
+import os
+
+
+def _encabezados(fila):
+    return [str(valor).strip() if valor is not None else '' for valor in fila]
+
+
+def _vacia(valores):
+    return all(valor is None or valor == '' for valor in valores)
+
+
+def _filas_xlsx(ruta):
+    import openpyxl
+
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = _encabezados(next(filas, ()))
+        for valores in filas:
+            if not _vacia(valores):
+                yield dict(zip(encabezados, valores))
+    finally:
+        libro.close()
+
+
+def _filas_xls(ruta):
+    # xlrd no tiene modo streaming para .xls: on_demand evita al menos cargar
+    # las demás hojas del libro
+    import xlrd
+
+    libro = xlrd.open_workbook(ruta, on_demand=True)
+    try:
+        hoja = libro.sheet_by_index(0)
+        if hoja.nrows == 0:
+            return
+        encabezados = _encabezados(hoja.row_values(0))
+        for numero in range(1, hoja.nrows):
+            valores = []
+            for celda in hoja.row(numero):
+                if celda.ctype == xlrd.XL_CELL_DATE:
+                    valores.append(xlrd.xldate_as_datetime(celda.value, libro.datemode))
+                else:
+                    valores.append(celda.value)
+            if not _vacia(valores):
+                yield dict(zip(encabezados, valores))
+    finally:
+        libro.release_resources()
+
+
+def _filas_csv(ruta):
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        lector = csv.reader(archivo)
+        encabezados = _encabezados(next(lector, []))
+        for valores in lector:
+            if not _vacia(valores):
+                yield dict(zip(encabezados, valores))
+
+
+LECTORES = {
+    'xlsx': _filas_xlsx,
+    'xls': _filas_xls,
+    'csv': _filas_csv,
+}
+
+
+def leer_filas(ruta):
+    """Genera un dict por fila usando la primera fila como encabezados."""
+    extension = os.path.splitext(ruta)[1].lower().lstrip('.')
+    if extension not in LECTORES:
+        raise ValueError(f"Formato no soportado: .{extension}")
+    return LECTORES[extension](ruta)
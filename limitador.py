@@ -0,0 +1,223 @@
+"""Ritmo y concurrencia hacia el portal, compartidos por todos los trabajadores.
+
+- `CuboTokens`: como mucho `tasa` peticiones por segundo (con ráfagas de
+  hasta `rafaga`). Hay un cubo para cualquier carga de página o envío de
+  formulario y otro, más estricto, para los logins. Las esperas se reservan
+  en orden de llegada, sin sondeo.
+- `ControlConcurrencia`: cuántas filas pueden estar en vuelo a la vez, con
+  AIMD. Se decide cada `VENTANA_AIMD` pasos: si más de `TASA_FALLOS_AIMD`
+  de ellos terminaron en timeout o error del portal, o su latencia media
+  pasa de `LATENCIA_MAX_PASO` (o de `TOLERANCIA_AIMD` veces la menor media
+  de las últimas `VENTANAS_REFERENCIA_AIMD` ventanas), el límite se
+  multiplica por `FACTOR_AIMD`; si no, sube en 1. Así el portal no llega a
+  las respuestas lentas que acaban en los timeouts de 30 s de las esperas.
+  La latencia de cada paso es solo la del portal: las esperas de los cubos
+  se descuentan con `esperado()`.
+
+Con `lote.py` cada proceso recibe su parte de la tasa.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import metricas
+
+# Peticiones por segundo al portal entre todos los trabajadores (0 = sin límite)
+TASA_PORTAL = float(os.environ.get("TASA_PORTAL", "10"))
+RAFAGA_PORTAL = float(os.environ.get("RAFAGA_PORTAL", "20"))
+
+# Logins por segundo (0 = sin límite)
+TASA_LOGINS = float(os.environ.get("TASA_LOGINS", "2"))
+RAFAGA_LOGINS = float(os.environ.get("RAFAGA_LOGINS", "4"))
+
+# Pasos observados antes de decidir si el límite sube o baja
+VENTANA_AIMD = int(os.environ.get("VENTANA_AIMD", "20"))
+# Multiplicador del límite ante un timeout o latencia alta
+FACTOR_AIMD = float(os.environ.get("FACTOR_AIMD", "0.5"))
+# Latencia media por paso que se considera lenta (0 = TOLERANCIA_AIMD veces la mejor vista)
+LATENCIA_MAX_PASO = float(os.environ.get("LATENCIA_MAX_PASO", "0"))
+TOLERANCIA_AIMD = float(os.environ.get("TOLERANCIA_AIMD", "2"))
+# Ventanas recientes cuya menor media sirve de referencia (el portal puede volverse más lento)
+VENTANAS_REFERENCIA_AIMD = int(os.environ.get("VENTANAS_REFERENCIA_AIMD", "10"))
+# Fracción de pasos con timeout o error del portal que se tolera en una ventana
+TASA_FALLOS_AIMD = float(os.environ.get("TASA_FALLOS_AIMD", "0.1"))
+
+
+class CuboTokens:
+    def __init__(self, tasa, rafaga=None):
+        self.tasa = tasa
+        self.capacidad = max(1.0, rafaga or tasa)
+        self._tokens = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def tomar(self):
+        """Toma un token, durmiendo lo necesario; devuelve los segundos esperados."""
+        if self.tasa <= 0:
+            return 0.0
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            # Saldo negativo = turno reservado: cada llamada duerme hasta el suyo
+            self._tokens -= 1
+            espera = -self._tokens / self.tasa if self._tokens < 0 else 0.0
+        if espera:
+            time.sleep(espera)
+        return espera
+
+
+class ControlConcurrencia:
+    """Semáforo cuyo tamaño ajusta AIMD según la latencia y los timeouts."""
+
+    def __init__(self, motor, inicial, maximo, minimo=1, ventana=VENTANA_AIMD, factor=FACTOR_AIMD,
+                 latencia_max=LATENCIA_MAX_PASO, tolerancia=TOLERANCIA_AIMD,
+                 tasa_fallos=TASA_FALLOS_AIMD, ventanas_referencia=VENTANAS_REFERENCIA_AIMD):
+        self.motor = motor
+        self.maximo = max(minimo, maximo)
+        self.minimo = minimo
+        self.ventana = ventana
+        self.factor = factor
+        self.latencia_max = latencia_max
+        self.tolerancia = tolerancia
+        self.tasa_fallos = tasa_fallos
+
+        self.limite = max(minimo, min(inicial, self.maximo))
+        self._en_vuelo = 0
+        self._muestras = []
+        self._fallos = 0
+        self._medias = deque(maxlen=max(1, ventanas_referencia))  # medias de las últimas ventanas
+        self._cond = threading.Condition()
+
+        self.subidas = 0
+        self.bajadas = 0
+        self._publicar()
+
+    def _publicar(self):
+        metricas.fijar('limite_concurrencia', self.motor, self.limite)
+        metricas.fijar('filas_en_vuelo', self.motor, self._en_vuelo)
+
+    def entrar(self):
+        with self._cond:
+            while self._en_vuelo >= self.limite:
+                self._cond.wait()
+            self._en_vuelo += 1
+            self._publicar()
+
+    def intentar_entrar(self):
+        """Como `entrar`, pero sin esperar: False si no hay lugar."""
+        with self._cond:
+            if self._en_vuelo >= self.limite:
+                return False
+            self._en_vuelo += 1
+            self._publicar()
+            return True
+
+    def salir(self):
+        with self._cond:
+            self._en_vuelo -= 1
+            self._publicar()
+            self._cond.notify()
+
+    def observar(self, segundos):
+        """Lo que tardó el portal en un paso terminado, sin esperas de ritmo ni de reintento."""
+        with self._cond:
+            self._muestras.append(segundos)
+            self._evaluar()
+
+    def fallo_portal(self):
+        """Un paso terminó en timeout o error del portal."""
+        with self._cond:
+            self._fallos += 1
+            self._evaluar()
+
+    def _evaluar(self):
+        pasos = len(self._muestras) + self._fallos
+        if pasos < self.ventana:
+            return
+        fallos = self._fallos / pasos
+        media = sum(self._muestras) / len(self._muestras) if self._muestras else None
+        self._muestras.clear()
+        self._fallos = 0
+
+        if media is not None:
+            self._medias.append(media)
+        referencia = min(self._medias) if self._medias else 0
+        umbral = self.latencia_max or referencia * self.tolerancia
+        if fallos > self.tasa_fallos:
+            self._bajar(f"{fallos:.0%} de pasos con timeout o error del portal")
+        elif media is not None and media > umbral:
+            self._bajar(f"latencia media {media:.1f} s > {umbral:.1f} s")
+        else:
+            self._subir()
+
+    def _subir(self):
+        if self.limite >= self.maximo:
+            return
+        self.limite += 1
+        self.subidas += 1
+        metricas.incrementar('ajustes_concurrencia_total', 'sube')
+        self._publicar()
+        self._cond.notify_all()
+
+    def _bajar(self, motivo):
+        if self.limite <= self.minimo:
+            return
+        anterior = self.limite
+        self.limite = max(self.minimo, int(self.limite * self.factor))
+        self.bajadas += 1
+        metricas.incrementar('ajustes_concurrencia_total', 'baja')
+        self._publicar()
+        print(f"⇣ Concurrencia {self.motor}: {anterior} → {self.limite} ({motivo})")
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                'limite': self.limite,
+                'en_vuelo': self._en_vuelo,
+                'maximo': self.maximo,
+                'subidas': self.subidas,
+                'bajadas': self.bajadas,
+            }
+
+
+_peticiones = CuboTokens(TASA_PORTAL, RAFAGA_PORTAL)
+_logins = CuboTokens(TASA_LOGINS, RAFAGA_LOGINS)
+
+# Segundos dormidos en los cubos por cada hilo trabajador desde su última consulta
+_esperas = threading.local()
+
+
+def _sumar_espera(espera):
+    _esperas.segundos = getattr(_esperas, 'segundos', 0.0) + espera
+
+
+def peticion():
+    """Antes de cada carga de página o envío de formulario al portal."""
+    espera = _peticiones.tomar()
+    if espera:
+        _sumar_espera(espera)
+        metricas.observar('espera_ritmo_segundos', 'peticion', espera)
+
+
+def login():
+    """Antes de cada intento de login (además de su petición)."""
+    espera = _logins.tomar()
+    if espera:
+        _sumar_espera(espera)
+        metricas.observar('espera_ritmo_segundos', 'login', espera)
+
+
+def esperado():
+    """Segundos que este hilo durmió en los cubos desde la llamada anterior."""
+    segundos = getattr(_esperas, 'segundos', 0.0)
+    _esperas.segundos = 0.0
+    return segundos
+
+
+def repartir_entre(procesos):
+    """Deja a este proceso su parte de las tasas cuando varios comparten el portal."""
+    global _peticiones, _logins
+    _peticiones = CuboTokens(TASA_PORTAL / procesos, RAFAGA_PORTAL / procesos)
+    _logins = CuboTokens(TASA_LOGINS / procesos, RAFAGA_LOGINS / procesos)
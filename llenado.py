@@ -0,0 +1,136 @@
+"""Llenado masivo de formularios en una sola llamada al navegador.
+
+En lugar de un find_element + send_keys por campo (cada uno es un viaje
+de ida y vuelta al geckodriver), se envía el mapa completo de campos en un
+único execute_script que asigna los valores, dispara los eventos input y
+change, y devuelve un reporte por campo. Los campos que fallan, o los que
+necesitan teclearse de verdad, se rellenan con send_keys uno a uno.
+"""
+import os
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import Select
+
+# LLENADO_MASIVO=0 vuelve a teclear todos los campos con send_keys
+LLENADO_MASIVO = os.environ.get("LLENADO_MASIVO", "1") != "0"
+
+# Campos que el portal solo acepta tecleados (separados por comas)
+CAMPOS_TECLEADOS = {c.strip() for c in os.environ.get("CAMPOS_TECLEADOS", "").split(",") if c.strip()}
+
+_JS_LLENAR = """
+var campos = arguments[0], reporte = {};
+Object.keys(campos).forEach(function (id) {
+    var el = document.getElementById(id), valor = campos[id];
+    if (!el) { reporte[id] = 'no encontrado'; return; }
+    try {
+        if (el.tagName === 'SELECT' && valor !== null && typeof valor === 'object') {
+            var opcion = Array.prototype.find.call(el.options, function (o) {
+                return o.text.trim() === valor.texto;
+            });
+            if (!opcion) { reporte[id] = 'opción no encontrada'; return; }
+            valor = opcion.value;
+        }
+        var prototipo = Object.getPrototypeOf(el);
+        var descriptor = Object.getOwnPropertyDescriptor(prototipo, 'value');
+        if (descriptor && descriptor.set) { descriptor.set.call(el, valor); } else { el.value = valor; }
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        reporte[id] = el.value === String(valor) ? 'ok' : 'valor rechazado';
+    } catch (e) {
+        reporte[id] = String(e);
+    }
+});
+return reporte;
+"""
+
+
+# Campos que nunca detuvieron el flujo si fallaban (teléfonos, calle y dirección)
+CAMPOS_OPCIONALES = {'telefonos1', 'celular', 'calle', 'municipio', 'sector', 'newsector'}
+
+TELEFONO = '111-111-1111'
+MUNICIPIO = '01'
+SECTOR = "Santo Domingo de Guzmán"
+NEWSECTOR = "03100101010106500"
+
+
+def campos_formulario(datos):
+    """Pasaporte, visa, carnet, teléfonos, dirección, salario y empleador."""
+    return {
+        'p_tipo': 'p',
+        'p_fecha_expedicion': datos['expedicion'],
+        'p_fecha_expiracion': datos['expiracion'],
+        'p_pais_emisor': 'hti',
+        'v_no': '11111111111',
+        'v_tipo': 'p',
+        'v_fecha_expedicion': datos['expedicion'],
+        'v_fecha_expiracion': datos['expiracion'],
+        'e_no': datos['e_no'],
+        'e_tipo': 'tt1',
+        'e_fecha_expedicion': datos['e_expedicion'],
+        'e_fecha_expiracion': datos['e_expiracion'],
+        'telefonos1': TELEFONO,
+        'celular': TELEFONO,
+        'calle': 'arzobispo portes',
+        'salario': datos['salario'],
+        'empleador_dominicado': datos['profesion'],
+    }
+
+
+def campos_empresa(datos):
+    return {
+        'sobre_empresa': datos['empresa'],
+        'rnc': datos['rnc'],
+        'tipo_societario': datos['societario'],
+        'persona_cargo': datos['profesion'],
+    }
+
+
+def como_texto(valor):
+    """Convierte un valor del Excel al texto que se escribe en el portal."""
+    if valor is None or valor != valor:  # None o NaN
+        return ''
+    if isinstance(valor, dict):
+        return valor
+    return str(valor)
+
+
+def _teclear(ctx, id_campo, valor):
+    elemento = ctx.driver.find_element(By.ID, id_campo)
+    if elemento.tag_name == 'select':
+        select = Select(elemento)
+        if isinstance(valor, dict):
+            select.select_by_visible_text(valor['texto'])
+        else:
+            select.select_by_value(valor)
+        return
+    elemento.clear()
+    elemento.send_keys(valor)
+
+
+def llenar_campos(ctx, campos):
+    """Rellena {id: valor} y devuelve {id: 'ok' | motivo del fallo}.
+
+    Un valor {'texto': ...} en un <select> elige la opción por su texto.
+    """
+    campos = {id_campo: como_texto(valor) for id_campo, valor in campos.items()}
+
+    reporte = {}
+    if LLENADO_MASIVO:
+        masivos = {k: v for k, v in campos.items() if k not in CAMPOS_TECLEADOS}
+        if masivos:
+            reporte = ctx.driver.execute_script(_JS_LLENAR, masivos) or {}
+
+    # Respaldo campo a campo con teclado real
+    for id_campo, valor in campos.items():
+        if reporte.get(id_campo) == 'ok':
+            continue
+        try:
+            _teclear(ctx, id_campo, valor)
+            reporte[id_campo] = 'ok'
+        except Exception as e:
+            reporte[id_campo] = reporte.get(id_campo) or (str(e).strip() or type(e).__name__).splitlines()[0]
+    return reporte
+
+
+def campos_fallidos(reporte):
+    return {id_campo: motivo for id_campo, motivo in reporte.items() if motivo != 'ok'}
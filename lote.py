@@ -0,0 +1,194 @@
+"""Lotes grandes desde la línea de comandos, repartidos en varios procesos.
+
+Valida el archivo una sola vez, reparte las filas válidas por turnos en N
+fragmentos y lanza un proceso por fragmento, cada uno con sus propios
+navegadores: un geckodriver colgado solo frena a su proceso. Cada proceso
+recibe sus filas en memoria, así las contraseñas no pasan por archivos
+intermedios. Al terminar junta el resultado de todos (más las filas
+rechazadas en la validación) en un único CSV o XLSX, en el orden del
+archivo original.
+
+Uso:
+    python lote.py datos_usuarios.xlsx --procesos 8
+    python lote.py datos.csv --procesos 4 --navegadores-por-proceso 2 --salida resultados.xlsx
+    python lote.py datos.xlsx --motor http --tiempo-max 21600   # desde cron
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import Counter, namedtuple
+
+from lectura import leer_filas
+import limitador
+from pool_navegadores import calcular_num_trabajadores
+from trabajos import MOTORES, MOTOR_ENVIO, clave, nuevo_id_trabajo
+import validacion
+
+COLUMNAS_RESULTADO = ('fila', 'usuario', 'e_no', 'estado', 'ultimo_paso', 'error', 'proceso')
+
+# indice: número de proceso; filas: sus (numero, fila) validadas; trabajo_id: su trabajo en la base
+Fragmento = namedtuple('Fragmento', 'indice filas trabajo_id')
+
+
+def repartir(ruta, num_fragmentos):
+    """Valida el archivo y reparte las filas válidas por turnos entre los fragmentos.
+
+    Devuelve (fragmentos no vacíos, asignadas, rechazadas): `asignadas` es una
+    lista de (numero, indice, usuario, e_no) de las filas válidas y
+    `rechazadas` un dict numero -> (usuario, motivos).
+    """
+    rechazadas = {}
+    por_fragmento = [[] for _ in range(num_fragmentos)]
+    asignadas = []
+    filas = validacion.validar(leer_filas(ruta),
+                               lambda numero, usuario, motivos: rechazadas.update(
+                                   {numero: (usuario, motivos)}))
+    for posicion, (numero, fila) in enumerate(filas):
+        indice = posicion % num_fragmentos
+        por_fragmento[indice].append((numero, fila))
+        asignadas.append((numero, indice, clave(fila.get('usuario')), clave(fila.get('e_no'))))
+
+    fragmentos = [Fragmento(indice, filas, nuevo_id_trabajo())
+                  for indice, filas in enumerate(por_fragmento) if filas]
+    return fragmentos, asignadas, rechazadas
+
+
+def procesar_fragmento(ruta, fragmento, motor, navegadores, num_procesos):
+    """Cuerpo de cada proceso hijo: un `ejecutar` normal sobre su fragmento."""
+    os.environ['NUM_NAVEGADORES'] = str(navegadores)
+    # El límite de ritmo al portal es del lote entero: cada proceso usa su parte
+    limitador.repartir_entre(num_procesos)
+    # Con terminate() también se cierran los navegadores (atexit no corre con SIGTERM)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+
+    import automatizacion
+
+    automatizacion.ejecutar(ruta, motor, fragmento.trabajo_id, fragmento.filas)
+
+
+def lanzar(ruta, fragmentos, motor, navegadores):
+    contexto = multiprocessing.get_context('spawn')  # sin heredar hilos ni drivers del padre
+    procesos = []
+    for fragmento in fragmentos:
+        # Las filas viajan al hijo por la tubería de multiprocessing, no por disco
+        proceso = contexto.Process(target=procesar_fragmento,
+                                   args=(ruta, fragmento, motor, navegadores, len(fragmentos)),
+                                   name=f'lote-{fragmento.indice}')
+        proceso.start()
+        procesos.append(proceso)
+    return procesos
+
+
+def esperar(procesos, tiempo_max=0):
+    """Espera a los procesos; pasado `tiempo_max` segundos (0 = sin límite) los termina."""
+    limite = time.monotonic() + tiempo_max if tiempo_max > 0 else None
+    for proceso in procesos:
+        proceso.join(None if limite is None else max(0.0, limite - time.monotonic()))
+        if proceso.is_alive():
+            print(f"✗ {proceso.name} superó el tiempo máximo, se termina")
+            proceso.terminate()
+            proceso.join(30)
+            if proceso.is_alive():
+                proceso.kill()
+                proceso.join()
+    return [proceso.exitcode for proceso in procesos]
+
+
+def combinar(almacen, fragmentos, codigos, asignadas, rechazadas):
+    """Filas de resultado en el orden del archivo original."""
+    por_fragmento = {}
+    for fragmento, codigo in zip(fragmentos, codigos):
+        if codigo != 0 and almacen.ruta_trabajo(fragmento.trabajo_id) is not None:
+            # Que la app no lo reanude por su cuenta y el próximo lote pueda reenviar lo pendiente
+            almacen.abandonar_trabajo(fragmento.trabajo_id, f'proceso lote-{fragmento.indice} '
+                                                           f'terminó con código {codigo}')
+        por_fragmento[fragmento.indice] = {
+            fila['numero']: fila for fila in almacen.resultados(fragmento.trabajo_id)}
+
+    resultado = {}
+    for numero, indice, usuario, e_no in asignadas:
+        fila = por_fragmento.get(indice, {}).get(numero)
+        resultado[numero] = {
+            'fila': numero + 1,
+            'usuario': usuario,
+            'e_no': e_no,
+            'estado': fila['estado'] if fila else 'sin_procesar',
+            'ultimo_paso': fila['ultimo_paso'] if fila else None,
+            'error': fila['error'] if fila else None,
+            'proceso': indice,
+        }
+    for numero, (usuario, motivos) in rechazadas.items():
+        resultado[numero] = {
+            'fila': numero + 1, 'usuario': usuario, 'e_no': None, 'estado': 'rechazado',
+            'ultimo_paso': None, 'error': '; '.join(motivos), 'proceso': None,
+        }
+    return [resultado[numero] for numero in sorted(resultado)]
+
+
+def escribir_resultados(ruta, filas):
+    if ruta.lower().endswith('.xlsx'):
+        import openpyxl
+
+        libro = openpyxl.Workbook(write_only=True)
+        hoja = libro.create_sheet('resultados')
+        hoja.append(COLUMNAS_RESULTADO)
+        for fila in filas:
+            hoja.append([fila[columna] for columna in COLUMNAS_RESULTADO])
+        libro.save(ruta)
+        return
+    with open(ruta, 'w', newline='', encoding='utf-8-sig') as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS_RESULTADO)
+        escritor.writeheader()
+        escritor.writerows(filas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Procesa un archivo de usuarios en varios procesos")
+    parser.add_argument('archivo', help="Archivo .xlsx, .xls o .csv con los usuarios")
+    parser.add_argument('--procesos', type=int, default=0,
+                        help="Procesos en paralelo (0 = los que permiten núcleos y RAM)")
+    parser.add_argument('--navegadores-por-proceso', type=int, default=1)
+    parser.add_argument('--motor', choices=MOTORES, default=MOTOR_ENVIO)
+    parser.add_argument('--salida', help="CSV o XLSX de resultados (por defecto <archivo>_resultados.csv)")
+    parser.add_argument('--tiempo-max', type=float, default=0,
+                        help="Segundos antes de terminar los procesos que sigan vivos (0 = sin límite)")
+    args = parser.parse_args(argv)
+
+    salida = args.salida or f"{os.path.splitext(args.archivo)[0]}_resultados.csv"
+    num_procesos = args.procesos if args.procesos > 0 else calcular_num_trabajadores()
+
+    faltantes = validacion.columnas_faltantes_archivo(args.archivo, leer_filas)
+    if faltantes:
+        print(f"✗ Faltan columnas obligatorias en {args.archivo}: {', '.join(faltantes)}")
+        return 2
+
+    # Crea las tablas antes de lanzar los hijos (create_all a la vez en SQLite choca)
+    from persistencia import almacen
+
+    inicio = time.perf_counter()
+    fragmentos, asignadas, rechazadas = repartir(args.archivo, num_procesos)
+    print(f"Lote: {len(asignadas)} filas válidas, {len(rechazadas)} rechazadas, "
+          f"{len(fragmentos)} proceso(s) con {args.navegadores_por_proceso} navegador(es) cada uno")
+    procesos = lanzar(args.archivo, fragmentos, args.motor, args.navegadores_por_proceso)
+    codigos = esperar(procesos, args.tiempo_max)
+
+    filas = combinar(almacen, fragmentos, codigos, asignadas, rechazadas)
+    escribir_resultados(salida, filas)
+
+    cuentas = Counter(fila['estado'] for fila in filas)
+    duracion = time.perf_counter() - inicio
+    print(f"✓ LOTE TERMINADO en {duracion:.0f} s: "
+          + ', '.join(f"{estado} {n}" for estado, n in sorted(cuentas.items())))
+    print(f"Resultados en {salida}")
+    for fragmento, codigo in zip(fragmentos, codigos):
+        if codigo != 0:
+            print(f"✗ Proceso lote-{fragmento.indice} terminó con código {codigo}")
+    return 0 if all(codigo == 0 for codigo in codigos) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
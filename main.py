@@ -1,4 +1,4 @@
-from app import app
+from app import app, servidor_desarrollo
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    servidor_desarrollo(host='0.0.0.0', port=5000)
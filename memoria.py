@@ -0,0 +1,115 @@
+"""Memoria de cada navegador, leída de /proc.
+
+Firefox crece con cada ciclo de login, formulario y cierre de sesión, así
+que cada trabajador mide tras cerrar la sesión de un usuario el RSS de su
+árbol de procesos (geckodriver, el Firefox que lanza y sus procesos de
+contenido). Si pasa de `MEMORIA_MAX_NAVEGADOR_MB` el navegador se relanza
+antes del siguiente usuario; el reciclaje cada N usuarios lo hace
+`perfiles.RECICLAR_PERFIL_CADA`. Se guarda el pico de cada trabajador.
+
+Fuera de Linux (sin /proc) no se mide nada y no se recicla por memoria.
+"""
+import os
+import threading
+
+import metricas
+
+# RSS del árbol de un navegador a partir del cual se relanza entre usuarios (0 = no se mira)
+MEMORIA_MAX_NAVEGADOR_MB = float(os.environ.get("MEMORIA_MAX_NAVEGADOR_MB", "1200"))
+
+try:
+    _PAGINA_KB = os.sysconf('SC_PAGE_SIZE') / 1024
+except (AttributeError, ValueError, OSError):
+    _PAGINA_KB = 4.0
+
+
+def _hijos_por_padre():
+    """ppid -> [pid] de todos los procesos visibles."""
+    hijos = {}
+    for nombre in os.listdir('/proc'):
+        if not nombre.isdigit():
+            continue
+        try:
+            with open(f'/proc/{nombre}/stat', 'rb') as stat:
+                linea = stat.read()
+        except OSError:
+            continue
+        # El nombre del proceso va entre paréntesis y puede tener espacios
+        campos = linea[linea.rfind(b')') + 2:].split()
+        hijos.setdefault(int(campos[1]), []).append(int(nombre))
+    return hijos
+
+
+def _rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * _PAGINA_KB
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def rss_arbol_mb(pid):
+    """RSS de `pid` y todos sus descendientes, en MB (0 si no se puede leer)."""
+    if not pid or not os.path.isdir('/proc'):
+        return 0.0
+    hijos = _hijos_por_padre()
+    total_kb = 0
+    pendientes = [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        total_kb += _rss_kb(actual)
+        pendientes.extend(hijos.get(actual, ()))
+    return total_kb / 1024
+
+
+def pid_navegador(driver):
+    """PID de geckodriver, raíz del árbol de procesos del navegador."""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class VigilanteMemoria:
+    """Mide el navegador de cada trabajador y decide si debe relanzarse."""
+
+    def __init__(self, limite_mb=MEMORIA_MAX_NAVEGADOR_MB):
+        self.limite_mb = limite_mb
+        self._lock = threading.Lock()
+        self._picos = {}  # id de trabajador -> MB
+        self.mediciones = 0
+        self.reciclados = 0
+
+    def medir(self, ctx):
+        """RSS actual del navegador del trabajador, en MB."""
+        mb = rss_arbol_mb(pid_navegador(ctx.driver))
+        etiqueta = str(ctx.id)
+        with self._lock:
+            self.mediciones += 1
+            pico = max(mb, self._picos.get(ctx.id, 0.0))
+            self._picos[ctx.id] = pico
+        metricas.fijar('memoria_navegador_mb', etiqueta, round(mb, 1))
+        metricas.fijar('memoria_navegador_pico_mb', etiqueta, round(pico, 1))
+        return mb
+
+    def excedida(self, ctx):
+        """True si el navegador pasó del límite; solo en un punto seguro (sin sesión abierta)."""
+        if self.limite_mb <= 0:
+            return False
+        mb = self.medir(ctx)
+        if mb <= self.limite_mb:
+            return False
+        with self._lock:
+            self.reciclados += 1
+        print(f"⚠ [N{ctx.id}] Navegador con {mb:.0f} MB (límite {self.limite_mb:.0f} MB), se relanza")
+        return True
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'limite_mb': self.limite_mb,
+                'mediciones': self.mediciones,
+                'reciclados': self.reciclados,
+                'pico_mb': round(max(self._picos.values(), default=0.0), 1),
+                'picos_mb': {id_: round(mb, 1) for id_, mb in sorted(self._picos.items())},
+            }
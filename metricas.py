@@ -0,0 +1,166 @@
+"""Histogramas y contadores en memoria para los pasos del flujo y sus esperas.
+
+Se exponen en formato de texto de Prometheus (/metrics) y como JSON
+(/metrics.json). Cada observación cuesta un perf_counter, un bisect y un
+lock por histograma, así que se puede dejar activo en producción.
+"""
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIJO = 'formulario_'
+
+# Límites de los buckets en segundos
+LIMITES = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# nombre -> (tipo, etiqueta, ayuda)
+METRICAS = {
+    'paso_duracion_segundos': ('histogram', 'paso', "Duración de cada paso del flujo por usuario"),
+    'espera_duracion_segundos': ('histogram', 'espera', "Duración de cada espera al portal"),
+    'filas_total': ('counter', 'resultado', "Filas procesadas por resultado"),
+    'filas_respaldo_total': ('counter', 'motor', "Filas del motor HTTP repetidas con otro motor"),
+    'fallos_total': ('counter', 'clase', "Errores por clase (portal, navegador, credenciales, elemento, incierto)"),
+    'reintentos_total': ('counter', 'clase', "Reintentos de fila por clase de error"),
+    'reinicios_navegador_total': ('counter', 'motivo', "Navegadores relanzados por un trabajador"),
+    'espera_ritmo_segundos': ('histogram', 'tipo', "Espera por el límite de peticiones al portal"),
+    'limite_concurrencia': ('gauge', 'motor', "Filas simultáneas permitidas por el control AIMD"),
+    'filas_en_vuelo': ('gauge', 'motor', "Filas en proceso ahora mismo"),
+    'ajustes_concurrencia_total': ('counter', 'direccion', "Cambios del límite de concurrencia"),
+    'memoria_navegador_mb': ('gauge', 'trabajador', "RSS del navegador de cada trabajador al cerrar sesión"),
+    'memoria_navegador_pico_mb': ('gauge', 'trabajador', "Mayor RSS visto del navegador de cada trabajador"),
+    'capturas_fallo_total': ('counter', 'resultado', "Capturas de filas fallidas escritas o descartadas"),
+    'sesiones_restauradas_total': ('counter', 'resultado', "Logins evitados con cookies guardadas, o rechazadas"),
+}
+
+
+class Histograma:
+    __slots__ = ('cuentas', 'suma', 'total', '_lock')
+
+    def __init__(self):
+        self.cuentas = [0] * (len(LIMITES) + 1)
+        self.suma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        indice = bisect.bisect_left(LIMITES, valor)
+        with self._lock:
+            self.cuentas[indice] += 1
+            self.suma += valor
+            self.total += 1
+
+    def instantanea(self):
+        with self._lock:
+            return list(self.cuentas), self.suma, self.total
+
+
+_lock = threading.Lock()
+_histogramas = {}  # (metrica, valor_etiqueta) -> Histograma
+_contadores = {}  # (metrica, valor_etiqueta) -> número
+_medidores = {}  # (metrica, valor_etiqueta) -> último valor
+
+
+def _histograma(metrica, etiqueta):
+    clave = (metrica, etiqueta)
+    histograma = _histogramas.get(clave)
+    if histograma is None:
+        with _lock:
+            histograma = _histogramas.setdefault(clave, Histograma())
+    return histograma
+
+
+def observar(metrica, etiqueta, segundos):
+    _histograma(metrica, etiqueta).observar(segundos)
+
+
+def incrementar(metrica, etiqueta, cantidad=1):
+    with _lock:
+        _contadores[(metrica, etiqueta)] = _contadores.get((metrica, etiqueta), 0) + cantidad
+
+
+def fijar(metrica, etiqueta, valor):
+    with _lock:
+        _medidores[(metrica, etiqueta)] = valor
+
+
+@contextmanager
+def medir(metrica, etiqueta):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(metrica, etiqueta, time.perf_counter() - inicio)
+
+
+def medir_paso(nombre):
+    """Decorador que registra la duración de un paso del flujo."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+            with medir('paso_duracion_segundos', nombre):
+                return funcion(*args, **kwargs)
+        return envuelta
+    return decorador
+
+
+def reiniciar():
+    with _lock:
+        _histogramas.clear()
+        _contadores.clear()
+        _medidores.clear()
+
+
+# ---- exportación ----
+
+def _formato(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exportar_prometheus():
+    with _lock:
+        histogramas = sorted(_histogramas.items())
+        contadores = sorted(_contadores.items()) + sorted(_medidores.items())
+
+    lineas = []
+    for metrica, (tipo, etiqueta, ayuda) in METRICAS.items():
+        nombre = PREFIJO + metrica
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        if tipo == 'histogram':
+            for (clave, valor_etiqueta), histograma in histogramas:
+                if clave != metrica:
+                    continue
+                cuentas, suma, total = histograma.instantanea()
+                acumulado = 0
+                for limite, cuenta in zip(LIMITES + ('+Inf',), cuentas):
+                    acumulado += cuenta
+                    lineas.append(f'{nombre}_bucket{{{etiqueta}="{valor_etiqueta}",le="{limite}"}} {acumulado}')
+                lineas.append(f'{nombre}_sum{{{etiqueta}="{valor_etiqueta}"}} {_formato(suma)}')
+                lineas.append(f'{nombre}_count{{{etiqueta}="{valor_etiqueta}"}} {total}')
+        else:
+            for (clave, valor_etiqueta), valor in contadores:
+                if clave == metrica:
+                    lineas.append(f'{nombre}{{{etiqueta}="{valor_etiqueta}"}} {_formato(valor)}')
+    return "\n".join(lineas) + "\n"
+
+
+def exportar_json():
+    with _lock:
+        histogramas = sorted(_histogramas.items())
+        contadores = sorted(_contadores.items()) + sorted(_medidores.items())
+
+    resultado = {metrica: {} for metrica in METRICAS}
+    for (metrica, valor_etiqueta), histograma in histogramas:
+        cuentas, suma, total = histograma.instantanea()
+        resultado[metrica][valor_etiqueta] = {
+            'total': total,
+            'suma_s': round(suma, 4),
+            'media_s': round(suma / total, 4) if total else 0.0,
+            'buckets': {str(limite): cuenta
+                        for limite, cuenta in zip(LIMITES + ('+Inf',), cuentas)},
+        }
+    for (metrica, valor_etiqueta), valor in contadores:
+        resultado[metrica][valor_etiqueta] = valor
+    return resultado
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import DeclarativeBase
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+db = SQLAlchemy(model_class=Base)
+
+
+class Trabajo(db.Model):
+    """Un archivo subido (o lanzado con ejecutar) y su estado global."""
+    __tablename__ = 'trabajos'
+
+    id = db.Column(db.String(32), primary_key=True)
+    archivo = db.Column(db.String(255), nullable=False)
+    estado = db.Column(db.String(20), nullable=False, default='en_curso')  # en_curso, completado
+    motor = db.Column(db.String(20), nullable=False, default='navegador')  # navegador, http
+    creado = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    terminado = db.Column(db.DateTime)
+
+    filas = db.relationship('FilaTrabajo', backref='trabajo', lazy='dynamic')
+
+
+class FilaTrabajo(db.Model):
+    """Estado de cada usuario del archivo y último paso completado."""
+    __tablename__ = 'filas_trabajo'
+
+    id = db.Column(db.Integer, primary_key=True)
+    trabajo_id = db.Column(db.String(32), db.ForeignKey('trabajos.id'), nullable=False, index=True)
+    numero = db.Column(db.Integer, nullable=False)  # posición en el archivo
+    usuario = db.Column(db.String(120), nullable=False)
+    e_no = db.Column(db.String(120), nullable=False)
+    # pendiente, en_proceso, enviado, fallido, omitido
+    estado = db.Column(db.String(20), nullable=False, default='pendiente', index=True)
+    ultimo_paso = db.Column(db.String(40))
+    error = db.Column(db.Text)
+    actualizado = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_filas_usuario_e_no', 'usuario', 'e_no'),)
@@ -0,0 +1,461 @@
+"""Motor de envío por HTTP, sin navegador.
+
+Recorre el mismo flujo que Selenium (login, lista de aplicaciones,
+renovación, los dos formularios y cerrar sesión) con una sesión HTTP por
+trabajador: lee de cada página el formulario, sus campos ocultos y el token
+antifalsificación, y envía los mismos valores que `llenado`. Sin renderizar
+nada, decenas de filas caben en un solo núcleo.
+
+Cuando una página no tiene la forma esperada se lanza `FlujoNoReconocido`
+y la fila se repite con el navegador. Una vez lanzado el último envío ya no
+hay respaldo ni reintento, para no duplicar la solicitud.
+"""
+import os
+import re
+import threading
+import unicodedata
+from html.parser import HTMLParser
+from urllib.parse import quote, urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import limitador
+import llenado
+from fallos import CredencialesInvalidas, EnvioSinConfirmar
+from metricas import medir_paso
+from pool_navegadores import ContextoTrabajador
+
+# Sesiones HTTP simultáneas entre todos los trabajos: son los trabajadores
+# compartidos del planificador http, no un límite por trabajo
+NUM_SESIONES_HTTP = int(os.environ.get("NUM_SESIONES_HTTP", "20"))
+
+# Segundos por petición (conexión y lectura)
+TIEMPO_ESPERA_HTTP = float(os.environ.get("TIEMPO_ESPERA_HTTP", "30"))
+
+# URL de la cascada de sectores; por defecto se toma del script del formulario
+RUTA_SECTORES_HTTP = os.environ.get("RUTA_SECTORES_HTTP", "")
+
+SOLICITUD = 'SOLICITUD DE RENOVACIÓN CARNET DE TRABAJADORES TEMPOREROS'
+ENLACE_LISTA = 'LISTA DE APLICACIONES'
+
+CABECERAS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.8',
+}
+
+# Un solo pool de conexiones para todas las sesiones; las cookies van aparte
+_adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=NUM_SESIONES_HTTP)
+
+# Cadenas entre comillas de los scripts de la página, para buscar la URL de la cascada
+_CADENA_JS = re.compile(r"""(['"])((?:\\.|(?!\1).)*?)\1""")
+
+# (url de la cascada, municipio, texto) -> valor del sector, resuelto una vez por proceso
+_valores_sector = {}
+_lock_sectores = threading.Lock()
+
+
+class FlujoNoReconocido(Exception):
+    """La página no tiene la forma esperada; la fila se repite con el navegador."""
+
+
+def _normalizar(texto):
+    return ' '.join(unicodedata.normalize('NFC', texto).split()).upper()
+
+
+# ---- lectura de páginas ----
+
+class Formulario:
+    def __init__(self, atributos, texto_fila):
+        self.accion = atributos.get('action') or ''
+        self.metodo = (atributos.get('method') or 'get').lower()
+        self.texto_fila = texto_fila  # texto de la fila de tabla que lo contiene
+        self.campos = []  # dicts con tipo, name, value, id, checked
+        self.selects = {}  # name -> {'id': ..., 'opciones': [(valor, texto, seleccionada)]}
+        self.botones = []  # (texto, atributos)
+
+    def por_id(self, id_campo):
+        """Nombre y definición del campo con ese id, o (None, None)."""
+        for campo in self.campos:
+            if campo.get('id') == id_campo:
+                return campo.get('name'), campo
+        for nombre, select in self.selects.items():
+            if select['id'] == id_campo:
+                return nombre, select
+        return None, None
+
+    def datos(self):
+        """Valores que el navegador enviaría sin tocar nada."""
+        datos = {}
+        for campo in self.campos:
+            nombre, tipo = campo.get('name'), campo['tipo']
+            if not nombre or tipo in ('submit', 'image', 'button', 'reset', 'file'):
+                continue
+            if tipo in ('radio', 'checkbox') and not campo['checked']:
+                continue
+            datos[nombre] = campo.get('value', 'on' if tipo in ('radio', 'checkbox') else '')
+        for nombre, select in self.selects.items():
+            opciones = select['opciones']
+            elegida = next((o for o in opciones if o[2]), opciones[0] if opciones else None)
+            datos[nombre] = elegida[0] if elegida else ''
+        return datos
+
+    def tiene_boton(self, texto):
+        texto = _normalizar(texto)
+        return any(texto in _normalizar(t) for t, _ in self.botones)
+
+
+class _LectorHtml(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.ids = set()
+        self.clases = set()
+        self.enlaces = []  # [href, texto]
+        self.formularios = []
+        self.scripts = []  # texto de los <script> en línea
+        self._script = None
+        self._formulario = None
+        self._select = None
+        self._opcion = None
+        self._boton = None
+        self._enlace = None
+        self._texto_fila = []
+
+    def handle_starttag(self, etiqueta, atributos):
+        atributos = {k: (v if v is not None else '') for k, v in atributos}
+        if 'id' in atributos:
+            self.ids.add(atributos['id'])
+        self.clases.update(atributos.get('class', '').split())
+
+        if etiqueta == 'script':
+            self._script = []
+        elif etiqueta == 'tr':
+            self._texto_fila = []
+        elif etiqueta == 'a':
+            self._enlace = [atributos.get('href', ''), '']
+            self.enlaces.append(self._enlace)
+        elif etiqueta == 'form':
+            self._formulario = Formulario(atributos, ' '.join(self._texto_fila))
+            self.formularios.append(self._formulario)
+        elif self._formulario is None:
+            return
+        elif etiqueta == 'input':
+            tipo = atributos.get('type', 'text').lower()
+            self._formulario.campos.append({
+                'tipo': tipo, 'name': atributos.get('name'), 'id': atributos.get('id'),
+                'checked': 'checked' in atributos, **({'value': atributos['value']} if 'value' in atributos else {})})
+            if tipo in ('submit', 'image'):
+                self._formulario.botones.append((atributos.get('value', atributos.get('alt', '')), atributos))
+        elif etiqueta == 'select':
+            self._select = {'id': atributos.get('id'), 'opciones': []}
+            self._formulario.selects[atributos.get('name') or atributos.get('id') or ''] = self._select
+        elif etiqueta == 'option' and self._select is not None:
+            self._opcion = [atributos.get('value'), '', 'selected' in atributos]
+            self._select['opciones'].append(self._opcion)
+        elif etiqueta == 'textarea':
+            self._formulario.campos.append({'tipo': 'textarea', 'name': atributos.get('name'),
+                                            'id': atributos.get('id'), 'checked': False, 'value': ''})
+        elif etiqueta == 'button':
+            self._boton = ['', atributos]
+            self._formulario.botones.append(self._boton)
+
+    def handle_endtag(self, etiqueta):
+        if etiqueta == 'script' and self._script is not None:
+            self.scripts.append(''.join(self._script))
+            self._script = None
+        elif etiqueta == 'form':
+            self._formulario = None
+        elif etiqueta == 'select':
+            self._select = None
+        elif etiqueta == 'option' and self._opcion is not None:
+            if self._opcion[0] is None:
+                self._opcion[0] = self._opcion[1].strip()
+            self._opcion = None
+        elif etiqueta == 'button':
+            self._boton = None
+        elif etiqueta == 'a':
+            self._enlace = None
+
+    def handle_data(self, texto):
+        if self._script is not None:
+            self._script.append(texto)
+            return
+        self._texto_fila.append(texto)
+        if self._enlace is not None:
+            self._enlace[1] += texto
+        if self._opcion is not None:
+            self._opcion[1] += texto
+        if self._boton is not None:
+            self._boton[0] += texto
+
+
+class Pagina:
+    def __init__(self, respuesta):
+        self.url = respuesta.url
+        self.html = respuesta.text
+        lector = _LectorHtml()
+        lector.feed(self.html)
+        lector.close()
+        self.ids = lector.ids
+        self.clases = lector.clases
+        self.enlaces = lector.enlaces
+        self.formularios = lector.formularios
+        self.scripts = lector.scripts
+
+    def tiene(self, selector):
+        """Solo '#id' y '.clase', lo que usa el flujo para reconocer cada página."""
+        if selector.startswith('#'):
+            return selector[1:] in self.ids
+        return selector.lstrip('.') in self.clases
+
+    def exigir(self, selector, descripcion):
+        if not self.tiene(selector):
+            raise FlujoNoReconocido(f"{descripcion}: no aparece {selector} en {self.url}")
+
+    def enlace(self, texto):
+        texto = _normalizar(texto)
+        for href, contenido in self.enlaces:
+            if _normalizar(contenido) == texto and href and not href.startswith('#'):
+                return urljoin(self.url, href)
+        raise FlujoNoReconocido(f"No hay enlace '{texto}' en {self.url}")
+
+    def formulario(self, condicion, descripcion):
+        for formulario in self.formularios:
+            if condicion(formulario):
+                return formulario
+        raise FlujoNoReconocido(f"No se encontró {descripcion} en {self.url}")
+
+
+# ---- contexto por trabajador ----
+
+def crear_contexto(id_trabajador):
+    sesion = requests.Session()
+    sesion.headers.update(CABECERAS)
+    sesion.mount('http://', _adaptador)
+    sesion.mount('https://', _adaptador)
+    ctx = ContextoTrabajador(id_trabajador, None, None)
+    ctx.sesion = sesion
+    return ctx
+
+
+def cerrar_contexto(ctx):
+    # El adaptador es compartido: solo se descartan las cookies
+    ctx.sesion.cookies.clear()
+
+
+def _pedir(ctx, metodo, url, **kwargs):
+    limitador.peticion()
+    respuesta = ctx.sesion.request(metodo, url, timeout=TIEMPO_ESPERA_HTTP, **kwargs)
+    respuesta.raise_for_status()
+    return Pagina(respuesta)
+
+
+def _enviar(ctx, pagina, formulario, datos, boton=None):
+    if boton is not None:
+        _, atributos = boton
+        nombre = atributos.get('name')
+        if atributos.get('type', '').lower() == 'image':
+            # Las coordenadas del clic, como las manda el navegador
+            prefijo = f"{nombre}." if nombre else ''
+            datos = {**datos, f'{prefijo}x': '8', f'{prefijo}y': '8'}
+        elif nombre:
+            datos = {**datos, nombre: atributos.get('value', '')}
+    url = urljoin(pagina.url, formulario.accion) if formulario.accion else pagina.url
+    if formulario.metodo == 'post':
+        return _pedir(ctx, 'POST', url, data=datos)
+    return _pedir(ctx, 'GET', url, params=datos)
+
+
+def _asignar(formulario, datos, campos):
+    """Pone cada {id: valor} bajo el name del campo; falla si falta uno obligatorio."""
+    faltantes = []
+    for id_campo, valor in campos.items():
+        nombre, _ = formulario.por_id(id_campo)
+        if nombre is None:
+            if id_campo not in llenado.CAMPOS_OPCIONALES:
+                faltantes.append(id_campo)
+            continue
+        datos[nombre] = llenado.como_texto(valor)
+    if faltantes:
+        raise FlujoNoReconocido(f"Campos no encontrados: {', '.join(faltantes)}")
+
+
+def _opcion_por_texto(formulario, id_campo, texto):
+    """Valor de la opción con ese texto entre las que trae el HTML, o None si no trae ninguna."""
+    _, select = formulario.por_id(id_campo)
+    if select is None or 'opciones' not in select:
+        return texto  # el campo no está: `_asignar` decide si es opcional
+    if not any(valor for valor, _, _ in select['opciones']):
+        return None  # se llena por script
+    for valor, contenido, _ in select['opciones']:
+        if _normalizar(contenido) == _normalizar(texto):
+            return valor
+    raise FlujoNoReconocido(f"El campo {id_campo} no tiene la opción '{texto}'")
+
+
+def _ruta_sectores(pagina):
+    """URL que llama el script del formulario para cargar los sectores del municipio."""
+    if RUTA_SECTORES_HTTP:
+        return urljoin(pagina.url, RUTA_SECTORES_HTTP)
+    for script in pagina.scripts:
+        for _, cadena in _CADENA_JS.findall(script):
+            minusculas = cadena.lower()
+            if 'sector' in minusculas and 'newsector' not in minusculas and '/' in cadena:
+                return urljoin(pagina.url, cadena)
+    raise FlujoNoReconocido(f"No se encontró la carga de sectores en los scripts de {pagina.url}")
+
+
+def _opciones_json(respuesta):
+    """[(valor, texto)] de una respuesta de cascada: pares o dicts Value/Text."""
+    opciones = []
+    for opcion in respuesta:
+        if isinstance(opcion, dict):
+            claves = {clave.lower(): valor for clave, valor in opcion.items()}
+            opcion = (claves.get('value'), claves.get('text'))
+        if not isinstance(opcion, (list, tuple)) or len(opcion) < 2:
+            raise FlujoNoReconocido(f"Opción de sector inesperada: {opcion!r}")
+        opciones.append((str(opcion[0]), str(opcion[1])))
+    return opciones
+
+
+def _valor_sector(ctx, pagina, formulario, municipio, texto):
+    """Valor real del sector, como lo carga el portal al elegir el municipio.
+
+    Si las opciones no vienen en el HTML se pide la cascada que llama el
+    script de la página y se toma el valor de la opción con ese texto.
+    """
+    valor = _opcion_por_texto(formulario, 'sector', texto)
+    if valor is not None:
+        return valor
+
+    url = _ruta_sectores(pagina)
+    clave = (url, municipio, _normalizar(texto))
+    with _lock_sectores:
+        if clave in _valores_sector:
+            return _valores_sector[clave]
+
+    nombre_municipio, _ = formulario.por_id('municipio')
+    if url.endswith('='):
+        url, params = url + quote(municipio), None
+    else:
+        params = {nombre_municipio or 'municipio': municipio}
+    limitador.peticion()
+    respuesta = ctx.sesion.get(url, params=params, timeout=TIEMPO_ESPERA_HTTP,
+                               headers={'Accept': 'application/json', 'X-Requested-With': 'XMLHttpRequest'})
+    respuesta.raise_for_status()
+    try:
+        opciones = _opciones_json(respuesta.json())
+    except ValueError:
+        raise FlujoNoReconocido(f"La carga de sectores no devolvió JSON ({respuesta.url})")
+
+    valor = next((v for v, t in opciones if _normalizar(t) == clave[2]), None)
+    if not valor:
+        raise FlujoNoReconocido(f"El municipio {municipio} no tiene el sector '{texto}'")
+    with _lock_sectores:
+        _valores_sector[clave] = valor
+    return valor
+
+
+# ---- pasos ----
+
+@medir_paso('http_iniciar_sesion')
+def iniciar_sesion(ctx, datos, portal_url):
+    limitador.login()
+    pagina = _pedir(ctx, 'GET', f'{portal_url}/Account/Login')
+    formulario = pagina.formulario(
+        lambda f: f.por_id('password')[0] or any(c.get('name') == 'password' for c in f.campos),
+        'el formulario de login')
+    envio = formulario.datos()
+    envio.update({'id': llenado.como_texto(datos['usuario']), 'password': llenado.como_texto(datos['contra'])})
+    pagina = _enviar(ctx, pagina, formulario, envio)
+
+    if pagina.tiene('.validation-summary-errors'):
+        raise CredencialesInvalidas(f"El portal rechazó el login de {datos['usuario']}")
+    pagina.exigir('.welcome', "Login")
+    return pagina
+
+
+@medir_paso('http_completar_formulario')
+def completar_formulario(ctx, inicio):
+    pagina = _pedir(ctx, 'GET', inicio.enlace(ENLACE_LISTA))
+    pagina.exigir('#tblLinks', "Lista de aplicaciones")
+
+    solicitud = _normalizar(SOLICITUD)
+    formulario = pagina.formulario(lambda f: solicitud in _normalizar(f.texto_fila),
+                                   f"la solicitud '{SOLICITUD}'")
+    boton = next((b for b in formulario.botones if b[1].get('type', '').lower() == 'image'), None)
+    pagina = _enviar(ctx, pagina, formulario, formulario.datos(), boton)
+    pagina.exigir('.rc-wrap-t', "Página de renovación")
+
+    formulario = pagina.formulario(lambda f: f.tiene_boton('Aplicar'), "el botón Aplicar")
+    pagina = _enviar(ctx, pagina, formulario, formulario.datos())
+    pagina.exigir('#nombre', "Formulario")
+    return pagina
+
+
+@medir_paso('http_formulario')
+def formulario(ctx, pagina, datos, al_enviar=None):
+    """Envía los dos formularios; devuelve la página final del portal.
+
+    `al_enviar()` se llama justo antes del POST del segundo, el que registra la solicitud.
+    """
+    formulario_1 = pagina.formulario(lambda f: f.por_id('nombre')[0] is not None, "el formulario 1")
+    envio = formulario_1.datos()
+    _asignar(formulario_1, envio, llenado.campos_formulario(datos))
+
+    # Sede
+    nombre_sede, sede = formulario_1.por_id('radio_button_3')
+    if nombre_sede is None:
+        raise FlujoNoReconocido("No se encontró la sede radio_button_3")
+    envio[nombre_sede] = sede.get('value', 'on')
+
+    # Municipio, sector y newsector (los dos últimos los carga el portal por script)
+    _asignar(formulario_1, envio, {
+        'municipio': llenado.MUNICIPIO,
+        'sector': _valor_sector(ctx, pagina, formulario_1, llenado.MUNICIPIO, llenado.SECTOR),
+        'newsector': llenado.NEWSECTOR,
+    })
+    pagina = _enviar(ctx, pagina, formulario_1, envio)
+    pagina.exigir('#sobre_empresa', "Formulario de empresa")
+
+    formulario_2 = pagina.formulario(lambda f: f.por_id('sobre_empresa')[0] is not None, "el formulario 2")
+    envio = formulario_2.datos()
+    _asignar(formulario_2, envio, llenado.campos_empresa(datos))
+    if al_enviar is not None:
+        al_enviar()
+    return _enviar(ctx, pagina, formulario_2, envio)
+
+
+@medir_paso('http_cerrar_sesion')
+def cerrar_sesion(ctx, portal_url):
+    try:
+        limitador.peticion()
+        ctx.sesion.get(f'{portal_url}/Account/Logout', timeout=TIEMPO_ESPERA_HTTP)
+    except requests.RequestException as e:
+        print(f"No se pudo cerrar sesión por HTTP: {e}")
+    ctx.sesion.cookies.clear()
+
+
+def procesar(ctx, datos, portal_url, paso_completado, al_enviar=None):
+    """Flujo completo de una fila. `paso_completado(paso)` se llama tras cada paso.
+
+    Lanza FlujoNoReconocido solo antes de enviar el último formulario, cuando
+    todavía es seguro repetir la fila con el navegador. `al_enviar()` marca
+    el momento a partir del cual ya no lo es.
+    """
+    ctx.sesion.cookies.clear()
+    inicio = iniciar_sesion(ctx, datos, portal_url)
+    paso_completado('iniciar_sesion')
+
+    pagina = completar_formulario(ctx, inicio)
+    paso_completado('completar_formulario')
+
+    final = formulario(ctx, pagina, datos, al_enviar)
+    if final.tiene('#sobre_empresa') or final.tiene('#nombre'):
+        # El portal devolvió el formulario: la solicitud no se registró
+        raise EnvioSinConfirmar(f"El portal no aceptó el formulario ({final.url})")
+    paso_completado('formulario')
+
+    cerrar_sesion(ctx, portal_url)
+
@@ -0,0 +1,164 @@
+"""Páginas del portal (page objects) y registro central de localizadores.
+
+Todos los localizadores están en `LOCALIZADORES`, agrupados por página, y son
+selectores CSS o de ID: los que solo se distinguen por su texto ("Siguiente",
+"Aplicar", la fila de la solicitud en `tblLinks`) llevan además el texto que
+deben contener y se resuelven en una sola llamada de JavaScript, sin el XPath
+con `translate()` sobre cada celda de la página. Así también se esperan con
+el MutationObserver de `esperas` en vez del sondeo de WebDriverWait.
+
+Cada objeto página guarda los elementos que ya encontró: mientras el
+navegador siga en esa página, pedir de nuevo un elemento no vuelve a
+llamar a `find_element`. Al navegar se crea el objeto de la página nueva.
+"""
+from collections import namedtuple
+
+from selenium.common.exceptions import NoSuchElementException
+
+import esperas
+import llenado
+
+# css: selector; texto: lo que debe contener el elemento (sin distinguir mayúsculas);
+# objetivo: selector del descendiente que se devuelve en lugar del elemento
+Localizador = namedtuple('Localizador', 'css texto objetivo')
+
+TEXTO_SOLICITUD = 'SOLICITUD DE RENOVACIÓN CARNET DE TRABAJADORES TEMPOREROS'
+
+
+def localizador(css, texto=None, objetivo=None):
+    """Localizador con el texto ya normalizado como lo compara el navegador."""
+    if texto:
+        texto = ' '.join(texto.split()).upper()
+    return Localizador(css, texto, objetivo)
+
+
+LOCALIZADORES = {
+    'login': {
+        'usuario': localizador('input[name="id"]'),
+        'contrasena': localizador('input[name="password"]'),
+        'entrar': localizador('input[type="submit"][value="Iniciar Sesión"]'),
+        'rechazo': localizador('.validation-summary-errors'),
+    },
+    'inicio': {
+        'bienvenida': localizador('.welcome'),
+        'aceptar_popup': localizador('button', 'Aceptar'),
+        'lista_aplicaciones': localizador('a', 'LISTA DE APLICACIONES'),
+    },
+    'aplicaciones': {
+        'tabla': localizador('#tblLinks'),
+        'solicitud': localizador('#tblLinks tr', TEXTO_SOLICITUD, 'input[type="image"]'),
+    },
+    'renovacion': {
+        'contenedor': localizador('.rc-wrap-t'),
+        'aplicar': localizador('.f-right button', 'Aplicar'),
+    },
+    'formulario': {
+        'nombre': localizador('#nombre'),
+        'sede': localizador('#radio_button_3'),
+        'sector': localizador('#sector option', llenado.SECTOR),
+        'newsector': localizador(f'#newsector option[value="{llenado.NEWSECTOR}"]'),
+        'siguiente': localizador('.f-right button', 'Siguiente'),
+    },
+    'empresa': {
+        'sobre_empresa': localizador('#sobre_empresa'),
+        'siguiente': localizador('.f-right button', 'Siguiente'),
+    },
+}
+
+
+class Pagina:
+    """Una página del portal mientras el navegador está en ella."""
+
+    nombre = None
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.localizadores = LOCALIZADORES[self.nombre]
+        self._elementos = {}
+        self.busquedas = 0  # llamadas al navegador para localizar elementos
+
+    def esperar(self, clave, paso, visible=False):
+        """Espera el elemento (hasta el tiempo del paso) y lo guarda."""
+        elemento = self._elementos.get(clave)
+        if elemento is None:
+            loc = self.localizadores[clave]
+            self.busquedas += 1
+            elemento = esperas.esperar_selector(
+                self.ctx, loc.css, paso, visible, loc.texto, loc.objetivo)
+            self._elementos[clave] = elemento
+        return elemento
+
+    def buscar(self, clave):
+        """El elemento si ya está en la página, sin esperar; None si no está."""
+        elemento = self._elementos.get(clave)
+        if elemento is None:
+            loc = self.localizadores[clave]
+            self.busquedas += 1
+            elemento = esperas.encontrar(self.ctx.driver, loc.css, False, loc.texto, loc.objetivo)
+            if elemento is not None:
+                self._elementos[clave] = elemento
+        return elemento
+
+    def elemento(self, clave):
+        elemento = self.buscar(clave)
+        if elemento is None:
+            raise NoSuchElementException(f"[{self.nombre}] No se encontró '{clave}'")
+        return elemento
+
+    def pulsar(self, clave, paso, antes_de_pulsar=None):
+        """Lleva el botón a la vista y lo pulsa con JavaScript; devuelve el elemento.
+
+        `antes_de_pulsar()` se llama con el botón ya listo, justo antes del clic.
+        """
+        boton = self.esperar(clave, paso)
+        esperas.desplazar_a(self.ctx, boton, legado=0)
+        if antes_de_pulsar is not None:
+            antes_de_pulsar()
+        self.ctx.driver.execute_script("arguments[0].click();", boton)
+        return boton
+
+
+def actual(ctx, clase):
+    """La página que el trabajador dejó en `ctx.pagina` si es de esa clase; si no, una nueva.
+
+    Los pasos se pasan así la página entre sí y los elementos ya encontrados
+    se reusan; cualquier navegación no prevista debe dejar `ctx.pagina = None`.
+    """
+    pagina = getattr(ctx, 'pagina', None)
+    if not isinstance(pagina, clase) or pagina.ctx is not ctx:
+        pagina = clase(ctx)
+    return pagina
+
+
+class PaginaLogin(Pagina):
+    nombre = 'login'
+
+    def entrar(self, usuario, contra):
+        self.esperar('usuario', 'login').send_keys(usuario)
+        self.elemento('contrasena').send_keys(contra)
+        self.elemento('entrar').click()
+
+    def rechazo(self):
+        """Mensaje de error del portal tras el login, o None."""
+        aviso = self.buscar('rechazo')
+        return None if aviso is None else aviso.text.strip()
+
+
+class PaginaInicio(Pagina):
+    nombre = 'inicio'
+
+
+class PaginaAplicaciones(Pagina):
+    nombre = 'aplicaciones'
+
+
+class PaginaRenovacion(Pagina):
+    nombre = 'renovacion'
+
+
+class PaginaFormulario(Pagina):
+    nombre = 'formulario'
+
+
+class PaginaEmpresa(Pagina):
+    nombre = 'empresa'
@@ -0,0 +1,154 @@
+"""Perfiles de Firefox copiados de una plantilla propia.
+
+Se arma una sola vez un perfil plantilla con las preferencias en `user.js`
+(y, si se puede, ya inicializado por un primer arranque de Firefox), y
+cada navegador arranca con `-profile` sobre una copia. La copia usa reflink
+cuando el sistema de archivos lo soporta (btrfs, xfs) y si no una copia
+normal: no se usan hardlinks porque Firefox y geckodriver reescriben en su
+sitio las bases sqlite y `user.js`, lo que alteraría la plantilla.
+
+Solo se borran los directorios creados aquí, y cada copia se descarta tras
+`reciclar_cada` usuarios para que el perfil no crezca durante lotes largos.
+"""
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Usuarios por copia de perfil antes de relanzar con una nueva (0 = nunca)
+RECICLAR_PERFIL_CADA = int(os.environ.get("RECICLAR_PERFIL_CADA", "50"))
+
+# Dónde se crean la plantilla y las copias (por defecto el temporal del sistema)
+DIRECTORIO_PERFILES = os.environ.get("DIRECTORIO_PERFILES") or None
+
+# Archivos que deja el primer arranque y no deben pasar a las copias
+DESCARTABLES = ('lock', '.parentlock', 'parent.lock', 'MarionetteActivePort',
+                'sessionstore.jsonlz4', 'sessionstore-backups', 'cache2', 'crashes',
+                'minidumps', 'datareporting', 'saved-telemetry-pings')
+
+_FICLONE = 0x40049409  # ioctl de Linux para clonar un archivo (reflink)
+_reflink = None  # None: sin probar todavía
+
+
+def _clonar(origen, destino):
+    """Copia por reflink si el sistema de archivos lo permite; si no, copia normal."""
+    global _reflink
+    if _reflink is not False:
+        try:
+            with open(origen, 'rb') as fuente, open(destino, 'wb') as copia:
+                fcntl.ioctl(copia.fileno(), _FICLONE, fuente.fileno())
+            shutil.copystat(origen, destino)
+            _reflink = True
+            return destino
+        except OSError:
+            _reflink = False
+    return shutil.copy2(origen, destino)
+
+
+def escribir_user_js(ruta, preferencias):
+    with open(os.path.join(ruta, 'user.js'), 'w', encoding='utf-8') as archivo:
+        for nombre, valor in preferencias.items():
+            archivo.write(f'user_pref({json.dumps(nombre)}, {json.dumps(valor)});\n')
+
+
+class GestorPerfiles:
+    """Crea la plantilla, entrega copias por navegador y las borra al terminar.
+
+    `precalentar(ruta)`, si se da, arranca Firefox una vez sobre la plantilla
+    para que las copias no paguen la inicialización de un perfil vacío.
+    """
+
+    def __init__(self, preferencias, precalentar=None, reciclar_cada=RECICLAR_PERFIL_CADA,
+                 directorio=DIRECTORIO_PERFILES):
+        self.preferencias = preferencias
+        self.precalentar = precalentar
+        self.reciclar_cada = reciclar_cada
+        self.directorio = directorio
+
+        self._lock = threading.Lock()
+        self._raiz = None
+        self._plantilla = None
+        self._usos = {}  # ruta de la copia -> usuarios atendidos
+
+        self.copias = 0
+        self.tiempo_copias = 0.0
+        self.reciclados = 0
+
+    def plantilla(self):
+        with self._lock:
+            if self._plantilla is None:
+                self._raiz = tempfile.mkdtemp(prefix='formulario-perfiles-', dir=self.directorio)
+                plantilla = os.path.join(self._raiz, 'plantilla')
+                os.mkdir(plantilla)
+                escribir_user_js(plantilla, self.preferencias)
+                if self.precalentar:
+                    try:
+                        self.precalentar(plantilla)
+                    except Exception as e:
+                        print(f"Advertencia: no se pudo precalentar la plantilla de perfil: {e}")
+                    self._limpiar_plantilla(plantilla)
+                self._plantilla = plantilla
+            return self._plantilla
+
+    def _limpiar_plantilla(self, plantilla):
+        for nombre in DESCARTABLES:
+            ruta = os.path.join(plantilla, nombre)
+            if os.path.isdir(ruta):
+                shutil.rmtree(ruta, ignore_errors=True)
+            elif os.path.lexists(ruta):
+                os.remove(ruta)
+        # geckodriver agrega sus preferencias a user.js: se deja solo lo nuestro
+        escribir_user_js(plantilla, self.preferencias)
+
+    def nuevo(self, id_trabajador):
+        """Copia la plantilla para un navegador y devuelve su ruta."""
+        plantilla = self.plantilla()
+        inicio = time.perf_counter()
+        ruta = tempfile.mkdtemp(prefix=f'n{id_trabajador}-', dir=self._raiz)
+        shutil.copytree(plantilla, ruta, copy_function=_clonar, dirs_exist_ok=True)
+        duracion = time.perf_counter() - inicio
+        with self._lock:
+            self._usos[ruta] = 0
+            self.copias += 1
+            self.tiempo_copias += duracion
+        return ruta
+
+    def usar(self, ruta):
+        """Cuenta un usuario más; True si la copia ya debe reciclarse."""
+        with self._lock:
+            if ruta not in self._usos:
+                return False
+            self._usos[ruta] += 1
+            agotado = 0 < self.reciclar_cada <= self._usos[ruta]
+            if agotado:
+                self.reciclados += 1
+            return agotado
+
+    def descartar(self, ruta):
+        """Borra una copia creada aquí (las demás rutas se ignoran)."""
+        with self._lock:
+            if ruta not in self._usos:
+                return
+            del self._usos[ruta]
+        shutil.rmtree(ruta, ignore_errors=True)
+
+    def limpiar(self):
+        """Borra la plantilla y todas las copias; solo lo creado por este gestor."""
+        with self._lock:
+            raiz, self._raiz, self._plantilla = self._raiz, None, None
+            self._usos.clear()
+        if raiz:
+            shutil.rmtree(raiz, ignore_errors=True)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'perfiles_activos': len(self._usos),
+                'copias_perfil': self.copias,
+                'copia_media_ms': round(self.tiempo_copias / self.copias * 1000, 2) if self.copias else 0.0,
+                'perfiles_reciclados': self.reciclados,
+                'reflink': bool(_reflink),
+            }
@@ -0,0 +1,33 @@
+"""Base de trabajos compartida por la web, el motor y `lote.py`.
+
+Flask-SQLAlchemy necesita una app para su contexto: esta es solo para la
+base, sin rutas ni plantillas, así `automatizacion` y `lote.py` usan el
+almacén sin importar la web (`app.py`).
+"""
+import os
+
+from flask import Flask
+
+from models import db
+from trabajos import AlmacenTrabajos
+
+app_datos = Flask(__name__)
+
+# Base de datos de trabajos (SQLite por defecto) para reanudar lotes interrumpidos
+app_datos.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///trabajos.db")
+app_datos.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_recycle": 300, "pool_pre_ping": True}
+if app_datos.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    # Varios navegadores escriben a la vez: esperar el lock en lugar de fallar
+    app_datos.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {"timeout": 30}
+db.init_app(app_datos)
+
+with app_datos.app_context():
+    db.create_all()
+
+almacen = AlmacenTrabajos(app_datos)
+
+
+def soltar_conexiones():
+    """Tras un fork: las conexiones abiertas por el padre no se comparten con el hijo."""
+    with app_datos.app_context():
+        db.engine.dispose(close=False)
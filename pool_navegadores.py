@@ -0,0 +1,275 @@
+"""Pool de navegadores Firefox que procesan filas del Excel en paralelo."""
+import os
+import threading
+from collections import deque
+
+# Memoria aproximada que consume un Firefox headless durante el flujo del portal
+MEMORIA_POR_NAVEGADOR_MB = int(os.environ.get("MEMORIA_POR_NAVEGADOR_MB", "450"))
+
+# Segundos sin filas tras los que un trabajador devuelve su navegador
+ESPERA_OCIOSA = float(os.environ.get("ESPERA_OCIOSA", "2"))
+
+
+class ContextoTrabajador:
+    """Driver y espera propios de cada trabajador del pool."""
+
+    def __init__(self, id_trabajador, driver, wait):
+        self.id = id_trabajador
+        self.driver = driver
+        self.wait = wait
+        # Tiempo de espera real vs el que se habría dormido con sleeps fijos
+        self.espera_real = 0.0
+        self.espera_legada = 0.0
+
+
+def memoria_disponible_mb():
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for linea in meminfo:
+                if linea.startswith('MemAvailable:'):
+                    return int(linea.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def calcular_num_trabajadores(solicitado=None):
+    """Número de navegadores a usar, acotado por núcleos y RAM disponible.
+
+    Si no se pide un número concreto (o NUM_NAVEGADORES vale 0) se usa el
+    máximo que permite la máquina.
+    """
+    if solicitado is None:
+        solicitado = int(os.environ.get("NUM_NAVEGADORES", "0") or 0)
+
+    limite = os.cpu_count() or 1
+    memoria = memoria_disponible_mb()
+    if memoria is not None:
+        limite = min(limite, max(1, memoria // MEMORIA_POR_NAVEGADOR_MB))
+
+    if solicitado <= 0:
+        return limite
+    return max(1, min(solicitado, limite))
+
+
+class TrabajoPlanificado:
+    """Filas de un trabajo dentro del planificador y su reparto."""
+
+    def __init__(self, trabajo_id, procesar_fila, peso, limite, pase, fallar_fila=None):
+        self.id = trabajo_id
+        self.procesar_fila = procesar_fila
+        self.fallar_fila = fallar_fila  # (fila, error) de las que no llegan a procesar_fila o revientan
+        self.peso = peso
+        self.limite = limite  # filas en proceso a la vez como máximo (None = sin tope)
+        self.pase = pase  # tiempo virtual: el trabajo con menor pase recibe la siguiente fila
+        self.cola = deque()
+        self.en_vuelo = 0
+        self.lectura_terminada = False
+        self.error_lectura = None
+        self.exitosos = 0
+        self.fallidos = 0
+        self.terminado = threading.Event()
+
+    def listo(self):
+        return bool(self.cola) and (self.limite is None or self.en_vuelo < self.limite)
+
+    def esperar(self):
+        """Espera a que se procesen todas sus filas y devuelve (exitosos, fallidos).
+
+        Si la lectura de filas falló se relanza su error, después de terminar
+        lo que ya estaba leído.
+        """
+        self.terminado.wait()
+        if self.error_lectura is not None:
+            raise self.error_lectura
+        return self.exitosos, self.fallidos
+
+
+class Planificador:
+    """Reparte las filas de todos los trabajos activos entre N trabajadores.
+
+    Cada trabajador tiene su propio navegador (`crear_contexto(id)`) y lo
+    devuelve con `cerrar_contexto(ctx)` cuando no queda nada por hacer. La
+    siguiente fila sale siempre del trabajo con menor pase, que avanza
+    1/peso por fila: con pesos iguales es round-robin, y un lote chico que
+    llega tarde entra enseguida en lugar de esperar detrás de uno de mil
+    filas. `limite` acota las filas en proceso de un trabajo, y `control`
+    (un `limitador.ControlConcurrencia`) las de todos juntos.
+    """
+
+    def __init__(self, num_trabajadores, crear_contexto, cerrar_contexto, control=None):
+        self.num_trabajadores = max(1, num_trabajadores)
+        self.crear_contexto = crear_contexto
+        self.cerrar_contexto = cerrar_contexto
+        self.control = control
+        # Filas leídas por delante de los trabajadores, por trabajo
+        self.lectura_adelantada = self.num_trabajadores * 2
+
+        self._cond = threading.Condition()
+        self._trabajos = []
+        self._pase = 0.0  # pase de la última fila entregada
+        self._hilos = []
+        self._detenido = False
+
+    def _arrancar(self):
+        if self._hilos:
+            return
+        for id_trabajador in range(self.num_trabajadores):
+            hilo = threading.Thread(target=self._trabajar, args=(id_trabajador,),
+                                    name=f"navegador-{id_trabajador}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def enviar(self, trabajo_id, filas, procesar_fila, peso=1.0, limite=None, fallar_fila=None):
+        """Encola las filas de un trabajo; devuelve su TrabajoPlanificado.
+
+        `filas` puede ser un generador: se lee en un hilo propio y solo unas
+        pocas filas por delante de los trabajadores. `fallar_fila(fila, error)`
+        registra como fallida una fila cuyo navegador no arrancó o cuyo
+        `procesar_fila` lanzó una excepción.
+        """
+        with self._cond:
+            self._arrancar()
+            # Empieza en el pase actual: ni se adelanta a los demás ni espera a que lo alcancen
+            trabajo = TrabajoPlanificado(trabajo_id, procesar_fila, max(peso, 0.01),
+                                         limite if limite and limite > 0 else None, self._pase,
+                                         fallar_fila)
+            self._trabajos.append(trabajo)
+        threading.Thread(target=self._leer, args=(trabajo, filas),
+                         name=f"lectura-{trabajo_id}", daemon=True).start()
+        return trabajo
+
+    def procesar(self, trabajo_id, filas, procesar_fila, peso=1.0, limite=None, fallar_fila=None):
+        """Como `enviar` pero espera al final y devuelve (exitosos, fallidos)."""
+        return self.enviar(trabajo_id, filas, procesar_fila, peso, limite, fallar_fila).esperar()
+
+    def _leer(self, trabajo, filas):
+        try:
+            for datos in filas:
+                with self._cond:
+                    while len(trabajo.cola) >= self.lectura_adelantada:
+                        self._cond.wait()
+                    trabajo.cola.append(datos)
+                    self._cond.notify_all()
+        except Exception as e:
+            # Los trabajadores terminan lo que ya estaba leído
+            trabajo.error_lectura = e
+        finally:
+            with self._cond:
+                trabajo.lectura_terminada = True
+                self._quizas_terminado(trabajo)
+                self._cond.notify_all()
+
+    def _siguiente(self):
+        """(trabajo, fila) del trabajo listo con menor pase, o None."""
+        elegido = None
+        for trabajo in self._trabajos:
+            if trabajo.listo() and (elegido is None or trabajo.pase < elegido.pase):
+                elegido = trabajo
+        if elegido is None:
+            return None
+        self._pase = elegido.pase
+        elegido.pase += 1 / elegido.peso
+        elegido.en_vuelo += 1
+        self._cond.notify_all()  # hay hueco en su cola de lectura
+        return elegido, elegido.cola.popleft()
+
+    def _quizas_terminado(self, trabajo):
+        if trabajo.lectura_terminada and not trabajo.cola and trabajo.en_vuelo == 0:
+            if trabajo in self._trabajos:
+                self._trabajos.remove(trabajo)
+            trabajo.terminado.set()
+
+    def _fallar(self, trabajo, datos, error):
+        if trabajo.fallar_fila is None:
+            return
+        try:
+            trabajo.fallar_fila(datos, error)
+        except Exception as e:
+            print(f"✗ No se pudo registrar el fallo de la fila: {e}")
+
+    def _terminar_fila(self, trabajo, exito):
+        with self._cond:
+            trabajo.en_vuelo -= 1
+            if exito:
+                trabajo.exitosos += 1
+            else:
+                trabajo.fallidos += 1
+            self._quizas_terminado(trabajo)
+            self._cond.notify_all()
+
+    def _esperar_trabajo(self, segundos=None):
+        """True en cuanto hay una fila lista; False si pasan `segundos` sin ninguna."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._detenido or any(t.listo() for t in self._trabajos), segundos)
+
+    def _devolver(self, ctx):
+        if ctx is None:
+            return
+        try:
+            self.cerrar_contexto(ctx)
+        except Exception:
+            pass
+
+    def _trabajar(self, id_trabajador):
+        ctx = None
+        while True:
+            # Un navegador sin filas un rato se devuelve (queda caliente en el gestor)
+            if not self._esperar_trabajo(None if ctx is None else ESPERA_OCIOSA):
+                self._devolver(ctx)
+                ctx = None
+                continue
+            if self._detenido:
+                self._devolver(ctx)
+                return
+
+            if self.control is not None:
+                self.control.entrar()
+            try:
+                with self._cond:
+                    tarea = self._siguiente()
+                if tarea is None:
+                    continue  # se la llevó otro trabajador
+
+                trabajo, datos = tarea
+                if ctx is None:
+                    try:
+                        ctx = self.crear_contexto(id_trabajador)
+                    except Exception as e:
+                        print(f"✗ [N{id_trabajador}] No se pudo iniciar el navegador: {e}")
+                        self._fallar(trabajo, datos, e)
+                        self._terminar_fila(trabajo, False)
+                        continue
+
+                try:
+                    exito = trabajo.procesar_fila(ctx, datos)
+                except Exception as e:
+                    print(f"✗ [N{id_trabajador}] Error inesperado: {e}")
+                    self._fallar(trabajo, datos, e)
+                    exito = False
+                self._terminar_fila(trabajo, exito)
+            finally:
+                if self.control is not None:
+                    self.control.salir()
+
+    def detener(self, espera=10):
+        """Los trabajadores devuelven su navegador y terminan (al cerrar el proceso)."""
+        with self._cond:
+            self._detenido = True
+            self._cond.notify_all()
+        for hilo in self._hilos:
+            hilo.join(espera)
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                'trabajadores': self.num_trabajadores,
+                'trabajos_activos': [{
+                    'id': trabajo.id,
+                    'peso': trabajo.peso,
+                    'limite': trabajo.limite,
+                    'en_proceso': trabajo.en_vuelo,
+                    'en_cola': len(trabajo.cola),
+                } for trabajo in self._trabajos],
+            }
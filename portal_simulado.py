@@ -0,0 +1,292 @@
+"""Réplica local del portal personal.migracion.gob.do para pruebas de carga.
+
+Reproduce solo las páginas y elementos de los que depende la automatización:
+login (`id`/`password`), bienvenida (`welcome`) con popup "Aceptar",
+LISTA DE APLICACIONES (`tblLinks`), la página `rc-wrap-t` con "Aplicar",
+y los dos formularios con los selects en cascada municipio → sector →
+newsector. La latencia y la tasa de fallos del servidor son configurables.
+
+Uso:
+    python portal_simulado.py --puerto 5001 --latencia-ms 300 --prob-fallo 0.02
+    PORTAL_URL=http://127.0.0.1:5001 python main.py
+"""
+import argparse
+import random
+import secrets
+import threading
+import time
+
+from flask import Flask, abort, jsonify, redirect, render_template, request, session, url_for
+from jinja2 import DictLoader
+
+APLICACIONES = [
+    (1, "Solicitud de Residencia Temporal"),
+    (2, "Solicitud de Renovación Carnet de Trabajadores Temporeros"),
+    (3, "Solicitud de Permiso de Salida"),
+    (4, "Consulta de Expediente"),
+]
+
+# (valor, texto) como los devuelve la cascada: el valor es un código, no el nombre
+SECTORES = {'01': [("0101", "Distrito Nacional"), ("0102", "Santo Domingo de Guzmán")]}
+NEWSECTORES = {
+    "0102": [("03100101010106500", "Ensanche Naco"),
+             ("03100101010106600", "Piantini")],
+}
+
+CAMPOS_FORMULARIO_1 = [
+    'p_tipo', 'p_fecha_expedicion', 'p_fecha_expiracion', 'p_pais_emisor',
+    'v_no', 'v_tipo', 'v_fecha_expedicion', 'v_fecha_expiracion',
+    'e_no', 'e_tipo', 'e_fecha_expedicion', 'e_fecha_expiracion',
+    'telefonos1', 'celular', 'calle', 'salario', 'empleador_dominicado',
+]
+CAMPOS_FORMULARIO_2 = ['sobre_empresa', 'rnc', 'tipo_societario', 'persona_cargo']
+
+BASE = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="UTF-8"><title>Portal de Migración (simulado)</title>
+<style>.modal{position:fixed;top:30%;left:30%;padding:2em;background:#eee;border:1px solid #999}</style>
+</head><body>{% block cuerpo %}{% endblock %}</body></html>"""
+
+PAGINAS = {
+    'login': """{% extends 'base' %}{% block cuerpo %}
+<form method="post" action="{{ url_for('login') }}">
+  <input type="hidden" name="__RequestVerificationToken" value="{{ token }}">
+  {% if error %}<div class="validation-summary-errors">{{ error }}</div>{% endif %}
+  <input type="text" name="id">
+  <input type="password" name="password">
+  <input type="submit" value="Iniciar Sesión">
+</form>{% endblock %}""",
+
+    'inicio': """{% extends 'base' %}{% block cuerpo %}
+<div class="welcome">Bienvenido, {{ usuario }}</div>
+<a href="{{ url_for('aplicaciones') }}">LISTA DE APLICACIONES</a>
+<a href="{{ url_for('logout') }}">Cerrar sesión</a>
+{% if popup %}<div class="modal" id="popup">Debe cambiar su contraseña.
+  <button type="button" onclick="document.getElementById('popup').remove()">Aceptar</button>
+</div>{% endif %}{% endblock %}""",
+
+    'aplicaciones': """{% extends 'base' %}{% block cuerpo %}
+<table id="tblLinks">
+{% for id_app, nombre in aplicaciones %}
+  <tr><td><a href="#">{{ nombre }}</a></td>
+      <td><form method="post" action="{{ url_for('seleccionar') }}">
+        <input type="hidden" name="__RequestVerificationToken" value="{{ token }}">
+        <input type="hidden" name="aplicacion" value="{{ id_app }}">
+        <input type="image" src="data:image/gif;base64,R0lGODlhAQABAAAAACw=" alt="Aplicar" width="16" height="16">
+      </form></td></tr>
+{% endfor %}
+</table>{% endblock %}""",
+
+    'renovacion': """{% extends 'base' %}{% block cuerpo %}
+<div class="rc-wrap-t"><h2>Renovación carnet de trabajadores temporeros</h2>
+  <form method="post" action="{{ url_for('aplicar') }}">
+    <input type="hidden" name="__RequestVerificationToken" value="{{ token }}">
+    <div class="f-right"><button type="submit">Aplicar</button></div>
+  </form>
+</div>{% endblock %}""",
+
+    'formulario': """{% extends 'base' %}{% block cuerpo %}
+<form method="post" action="{{ url_for('formulario') }}">
+  <input type="hidden" name="__RequestVerificationToken" value="{{ token }}">
+  <input type="text" id="nombre" name="nombre" value="{{ usuario }}" readonly>
+  <input type="radio" id="radio_button_1" name="sede" value="1">
+  <input type="radio" id="radio_button_3" name="sede" value="3">
+  {% for campo in campos %}<input type="text" id="{{ campo }}" name="{{ campo }}">
+  {% endfor %}
+  {% if error %}<div class="validation-summary-errors">{{ error }}</div>{% endif %}
+  <select id="municipio" name="municipio"><option value="">--</option><option value="01">Santo Domingo</option></select>
+  <select id="sector" name="sector"><option value="">--</option></select>
+  <select id="newsector" name="newsector"><option value="">--</option></select>
+  <div class="f-right"><button type="submit">Siguiente</button></div>
+</form>
+<script>
+function llenar(select, opciones) {
+  select.innerHTML = '<option value="">--</option>';
+  opciones.forEach(function (o) {
+    var op = document.createElement('option'); op.value = o[0]; op.textContent = o[1];
+    select.appendChild(op);
+  });
+}
+document.getElementById('municipio').addEventListener('change', function () {
+  fetch('{{ url_for("api_sectores") }}?municipio=' + this.value).then(function (r) { return r.json(); })
+    .then(function (d) { llenar(document.getElementById('sector'), d); });
+});
+document.getElementById('sector').addEventListener('change', function () {
+  fetch('{{ url_for("api_newsectores") }}?sector=' + encodeURIComponent(this.value))
+    .then(function (r) { return r.json(); })
+    .then(function (d) { llenar(document.getElementById('newsector'), d); });
+});
+</script>{% endblock %}""",
+
+    'empresa': """{% extends 'base' %}{% block cuerpo %}
+<form method="post" action="{{ url_for('empresa') }}">
+  <input type="hidden" name="__RequestVerificationToken" value="{{ token }}">
+  {% for campo in campos %}<input type="text" id="{{ campo }}" name="{{ campo }}">
+  {% endfor %}
+  <div class="f-right"><button type="submit">Siguiente</button></div>
+</form>{% endblock %}""",
+
+    'confirmacion': """{% extends 'base' %}{% block cuerpo %}
+<div class="alert-success" id="confirmacion">Solicitud {{ numero }} recibida.</div>
+<a href="{{ url_for('logout') }}">Cerrar sesión</a>{% endblock %}""",
+}
+
+
+def crear_portal(latencia_ms=0, prob_fallo=0.0, prob_popup=0.2, semilla=None):
+    """Crea la app Flask del portal simulado.
+
+    `latencia_ms` es la latencia media por petición (±50 %) y `prob_fallo`
+    la probabilidad de responder 503 a una página. Los usuarios cuya
+    contraseña sea "invalida" no pueden iniciar sesión.
+    """
+    portal = Flask(__name__, template_folder=None)
+    portal.secret_key = secrets.token_hex(16)
+    portal.config['SESSION_COOKIE_NAME'] = 'ASP.NET_SessionId'
+    portal.jinja_env.loader = DictLoader({'base': BASE, **PAGINAS})
+
+    azar = random.Random(semilla)
+    lock = threading.Lock()
+    portal.config['ENVIOS'] = envios = []
+
+    def token():
+        if '_token' not in session:
+            session['_token'] = secrets.token_hex(16)
+        return session['_token']
+
+    def pagina(nombre, **contexto):
+        return render_template(nombre, token=token(), **contexto)
+
+    def requiere_sesion():
+        if 'usuario' not in session:
+            return redirect(url_for('login'))
+        return None
+
+    def validar_token():
+        if request.form.get('__RequestVerificationToken') != session.get('_token'):
+            abort(400)
+
+    @portal.before_request
+    def simular_servidor():
+        if latencia_ms:
+            with lock:
+                factor = azar.uniform(0.5, 1.5)
+            time.sleep(latencia_ms * factor / 1000)
+        if prob_fallo and not request.path.startswith('/api/'):
+            with lock:
+                falla = azar.random() < prob_fallo
+            if falla:
+                abort(503)
+
+    @portal.route('/Account/Login', methods=['GET', 'POST'])
+    def login():
+        if request.method == 'GET':
+            return pagina('login')
+        validar_token()
+        usuario = request.form.get('id', '').strip()
+        if not usuario or request.form.get('password') == 'invalida':
+            return pagina('login', error="Usuario o contraseña incorrectos")
+        session['usuario'] = usuario
+        with lock:
+            session['popup'] = azar.random() < prob_popup
+        return redirect(url_for('inicio'))
+
+    @portal.route('/Account/Logout')
+    def logout():
+        session.clear()
+        return redirect(url_for('login'))
+
+    @portal.route('/')
+    @portal.route('/Home')
+    def inicio():
+        return requiere_sesion() or pagina(
+            'inicio', usuario=session['usuario'], popup=session.pop('popup', False))
+
+    @portal.route('/Solicitudes')
+    def aplicaciones():
+        return requiere_sesion() or pagina('aplicaciones', aplicaciones=APLICACIONES)
+
+    @portal.route('/Solicitudes/Seleccionar', methods=['POST'])
+    def seleccionar():
+        if requiere_sesion():
+            return requiere_sesion()
+        validar_token()
+        return redirect(url_for('renovacion', aplicacion=request.form.get('aplicacion')))
+
+    @portal.route('/Solicitudes/Renovacion')
+    def renovacion():
+        return requiere_sesion() or pagina('renovacion')
+
+    @portal.route('/Solicitudes/Aplicar', methods=['POST'])
+    def aplicar():
+        if requiere_sesion():
+            return requiere_sesion()
+        validar_token()
+        return redirect(url_for('formulario'))
+
+    @portal.route('/Solicitudes/Formulario', methods=['GET', 'POST'])
+    def formulario():
+        if requiere_sesion():
+            return requiere_sesion()
+        if request.method == 'GET':
+            return pagina('formulario', usuario=session['usuario'], campos=CAMPOS_FORMULARIO_1)
+        validar_token()
+        datos = {campo: request.form.get(campo, '')
+                 for campo in CAMPOS_FORMULARIO_1 + ['sede', 'municipio', 'sector', 'newsector']}
+        # Como el portal real, solo acepta los códigos que ofrece la cascada
+        sectores = [valor for valor, _ in SECTORES.get(datos['municipio'], [])]
+        newsectores = [valor for valor, _ in NEWSECTORES.get(datos['sector'], [])]
+        if datos['sector'] not in sectores or datos['newsector'] not in newsectores:
+            return pagina('formulario', usuario=session['usuario'], campos=CAMPOS_FORMULARIO_1,
+                          error="Seleccione un sector válido")
+        session['formulario'] = datos
+        return redirect(url_for('empresa'))
+
+    @portal.route('/Solicitudes/Empresa', methods=['GET', 'POST'])
+    def empresa():
+        if requiere_sesion():
+            return requiere_sesion()
+        if request.method == 'GET':
+            if 'formulario' not in session:
+                return redirect(url_for('formulario'))
+            return pagina('empresa', campos=CAMPOS_FORMULARIO_2)
+        validar_token()
+        datos = dict(session.pop('formulario', {}))
+        datos.update({campo: request.form.get(campo, '') for campo in CAMPOS_FORMULARIO_2})
+        with lock:
+            envios.append({'usuario': session['usuario'], **datos})
+            numero = len(envios)
+        return redirect(url_for('confirmacion', numero=numero))
+
+    @portal.route('/Solicitudes/Confirmacion')
+    def confirmacion():
+        return requiere_sesion() or pagina('confirmacion', numero=request.args.get('numero'))
+
+    @portal.route('/api/sectores')
+    def api_sectores():
+        return jsonify(SECTORES.get(request.args.get('municipio'), []))
+
+    @portal.route('/api/newsectores')
+    def api_newsectores():
+        return jsonify(NEWSECTORES.get(request.args.get('sector'), []))
+
+    return portal
+
+
+def iniciar_en_hilo(puerto=0, **opciones):
+    """Levanta el portal en un hilo y devuelve (url_base, servidor)."""
+    from werkzeug.serving import make_server
+
+    servidor = make_server('127.0.0.1', puerto, crear_portal(**opciones), threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}", servidor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Portal de migración simulado")
+    parser.add_argument('--puerto', type=int, default=5001)
+    parser.add_argument('--latencia-ms', type=float, default=0)
+    parser.add_argument('--prob-fallo', type=float, default=0.0)
+    parser.add_argument('--prob-popup', type=float, default=0.2)
+    args = parser.parse_args()
+
+    crear_portal(args.latencia_ms, args.prob_fallo, args.prob_popup).run(
+        host='127.0.0.1', port=args.puerto, threaded=True)
@@ -0,0 +1,160 @@
+"""Progreso en memoria de cada trabajo para /jobs/<id> y su stream SSE.
+
+Cada fila la escribe solo el trabajador que la procesa (asignaciones simples
+de atributos), así que actualizar el progreso no necesita locks ni llamadas
+al navegador. Los totales, la velocidad y el ETA se calculan al leer.
+"""
+import threading
+import time
+
+# Trabajos terminados que se conservan en memoria para consultarlos
+MAX_TRABAJOS_TERMINADOS = 20
+
+_trabajos = {}
+_lock = threading.Lock()  # solo para altas y bajas de trabajos, no por fila
+
+
+class ProgresoFila:
+    __slots__ = ('trabajo', 'id', 'numero', 'usuario', 'datos', 'estado', 'paso',
+                 'error', 'inicio', 'fin', 'actualizado', 'tiempos')
+
+    def __init__(self, trabajo, fila_id, numero, datos):
+        self.trabajo = trabajo
+        self.id = fila_id
+        self.numero = numero  # posición en el archivo, la misma de las filas rechazadas
+        self.usuario = str(datos.get('usuario', 'desconocido'))
+        self.datos = datos
+        self.estado = 'pendiente'
+        self.paso = None
+        self.error = None
+        self.inicio = None
+        self.fin = None
+        self.actualizado = time.monotonic()
+        self.tiempos = []  # (paso, segundos) mientras está en proceso, para las capturas de fallo
+
+    def iniciar(self):
+        self.inicio = time.monotonic()
+        self.estado = 'en_proceso'
+        self.actualizado = self.inicio
+        self.tiempos = []
+
+    def avanzar(self, paso):
+        ahora = time.monotonic()
+        self.tiempos.append((paso, ahora - self.actualizado))
+        self.paso = paso
+        self.actualizado = ahora
+
+    def terminar(self, exito, error=None):
+        self.fin = time.monotonic()
+        self.estado = 'enviado' if exito else 'fallido'
+        self.error = None if exito else str(error)[:300]
+        self.datos = None  # no retener los datos de la fila
+        self.tiempos = None
+        self.actualizado = self.fin
+
+    def como_dict(self):
+        return {'numero': self.numero, 'usuario': self.usuario, 'estado': self.estado,
+                'paso': self.paso, 'error': self.error}
+
+
+class ProgresoTrabajo:
+    def __init__(self, trabajo_id, archivo, motor='navegador'):
+        self.id = trabajo_id
+        self.archivo = archivo
+        self.motor = motor
+        self.inicio = time.monotonic()
+        self.fin = None
+        self.error = None  # el trabajo se cortó por un error general
+        self.lectura_terminada = False
+        self.omitidas = 0
+        self.filas = []
+        self.rechazadas = []  # (numero, usuario, motivos, momento) de la validación previa
+
+    def seguir(self, filas):
+        """Envuelve el generador (fila_id, numero, datos) y produce ProgresoFila."""
+        for fila_id, numero, datos in filas:
+            fila = ProgresoFila(self, fila_id, numero, datos)
+            self.filas.append(fila)
+            yield fila
+        self.lectura_terminada = True
+
+    def omitir(self, usuario):
+        self.omitidas += 1
+
+    def rechazar(self, numero, usuario, motivos):
+        print(f"✗ Fila {numero + 1} ({usuario}) rechazada: {', '.join(motivos)}")
+        self.rechazadas.append((numero, usuario, motivos, time.monotonic()))
+
+    def terminar(self, error=None):
+        """Cierra el trabajo; con `error` queda en estado 'error' (se reanuda al reiniciar)."""
+        self.error = None if error is None else str(error)[:300]
+        self.lectura_terminada = True
+        self.fin = time.monotonic()
+        _descartar_antiguos()
+
+    def resumen(self, desde=None):
+        """Estado del trabajo; con `desde` solo incluye las filas cambiadas después."""
+        ahora = time.monotonic()
+        filas = list(self.filas)
+        cuentas = {'pendiente': 0, 'en_proceso': 0, 'enviado': 0, 'fallido': 0}
+        primera = None
+        for fila in filas:
+            cuentas[fila.estado] += 1
+            if fila.inicio is not None and (primera is None or fila.inicio < primera):
+                primera = fila.inicio
+
+        terminadas = cuentas['enviado'] + cuentas['fallido']
+        transcurrido = ((self.fin or ahora) - primera) if primera is not None else 0.0
+        por_minuto = terminadas / transcurrido * 60 if transcurrido > 0 else 0.0
+        total = len(filas) if self.lectura_terminada else None
+        restantes = len(filas) - terminadas
+        eta = restantes / por_minuto * 60 if por_minuto > 0 and total is not None else None
+
+        if self.error is not None:
+            estado = 'error'
+        elif self.fin is not None:
+            estado = 'completado'
+        elif not self.lectura_terminada:
+            estado = 'leyendo'
+        else:
+            estado = 'en_curso'
+
+        return {
+            'id': self.id,
+            'archivo': self.archivo,
+            'motor': self.motor,
+            'estado': estado,
+            'error': self.error,
+            'total': total,
+            'leidas': len(filas),
+            'omitidas': self.omitidas,
+            'rechazadas': len(self.rechazadas),
+            **cuentas,
+            'filas_por_minuto': round(por_minuto, 2),
+            'eta_s': round(eta) if eta is not None else None,
+            'transcurrido_s': round(transcurrido, 1),
+            'filas': [f.como_dict() for f in filas if desde is None or f.actualizado > desde],
+            'errores_validacion': [{'numero': numero, 'usuario': usuario, 'motivos': motivos}
+                                   for numero, usuario, motivos, momento in list(self.rechazadas)
+                                   if desde is None or momento > desde],
+            'momento': ahora,
+        }
+
+
+def registrar(trabajo_id, archivo, motor='navegador'):
+    progreso = ProgresoTrabajo(trabajo_id, archivo, motor)
+    with _lock:
+        _trabajos[trabajo_id] = progreso
+    return progreso
+
+
+def obtener(trabajo_id):
+    return _trabajos.get(trabajo_id)
+
+
+def _descartar_antiguos():
+    with _lock:
+        terminados = sorted((p for p in _trabajos.values() if p.fin is not None),
+                            key=lambda p: p.fin)
+        for progreso in terminados[:-MAX_TRABAJOS_TERMINADOS]:
+            del _trabajos[progreso.id]
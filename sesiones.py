@@ -0,0 +1,310 @@
+"""Navegadores calientes que se reutilizan entre lotes en lugar de relanzarse."""
+import threading
+import time
+
+
+class GestorSesiones:
+    """Mantiene navegadores abiertos y los presta a los trabajadores.
+
+    `fabrica(id)` lanza un navegador nuevo (arranque en frío) y `cerrar(ctx)`
+    lo termina. Al devolver un navegador se limpia (cookies y storage) en
+    lugar de cerrarlo, y un hilo de keep-alive descarta los que mueren o
+    llevan demasiado tiempo sin uso.
+    """
+
+    def __init__(self, fabrica, cerrar, tamano, keepalive=60, inactividad_max=900):
+        self.fabrica = fabrica
+        self.cerrar = cerrar
+        self.tamano = max(1, tamano)
+        self.keepalive = keepalive
+        self.inactividad_max = inactividad_max
+        self.minimo = 0  # navegadores que se mantienen aunque estén inactivos
+
+        self._lock = threading.Lock()
+        self._libres = []  # (ctx, momento en que quedó libre)
+        self._hilo_keepalive = None
+
+        self.arranques = 0
+        self.tiempo_arranques = 0.0
+        self.reutilizaciones = 0
+        self.tiempo_reseteos = 0.0
+        self.reseteos = 0
+
+    # ---- ciclo de vida ----
+
+    def _lanzar(self, id_trabajador):
+        inicio = time.perf_counter()
+        ctx = self.fabrica(id_trabajador)
+        duracion = time.perf_counter() - inicio
+        with self._lock:
+            self.arranques += 1
+            self.tiempo_arranques += duracion
+        return ctx
+
+    def precalentar(self, cantidad=None):
+        """Lanza navegadores en paralelo para que el primer lote no espere."""
+        cantidad = self.tamano if cantidad is None else min(cantidad, self.tamano)
+        self.minimo = cantidad
+        self._iniciar_keepalive()
+
+        def lanzar(id_trabajador):
+            try:
+                ctx = self._lanzar(id_trabajador)
+            except Exception as e:
+                print(f"✗ No se pudo precalentar el navegador {id_trabajador}: {e}")
+                return
+            with self._lock:
+                self._libres.append((ctx, time.monotonic()))
+
+        hilos = [threading.Thread(target=lanzar, args=(i,), daemon=True)
+                 for i in range(cantidad)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        print(f"✓ {len(self._libres)} navegador(es) precalentado(s)")
+
+    def obtener(self, id_trabajador=0):
+        """Devuelve un navegador libre o lanza uno nuevo si no hay."""
+        self._iniciar_keepalive()
+        with self._lock:
+            ctx = self._libres.pop()[0] if self._libres else None
+            if ctx is not None:
+                self.reutilizaciones += 1
+        if ctx is None:
+            ctx = self._lanzar(id_trabajador)
+        ctx.id = id_trabajador
+        return ctx
+
+    def lanzar(self, id_trabajador=0):
+        """Un navegador nuevo que no pasa por la lista de libres (queda a cargo de quien lo pide)."""
+        ctx = self._lanzar(id_trabajador)
+        ctx.id = id_trabajador
+        return ctx
+
+    def devolver(self, ctx):
+        """Deja libre un navegador que ya está limpio."""
+        with self._lock:
+            if len(self._libres) < self.tamano:
+                self._libres.append((ctx, time.monotonic()))
+                return
+        self.cerrar(ctx)
+
+    def liberar(self, ctx):
+        """Limpia el navegador y lo deja disponible para el siguiente trabajo."""
+        if not self.resetear(ctx):
+            self.cerrar(ctx)
+            return
+        self.devolver(ctx)
+
+    def resetear(self, ctx):
+        """Borra cookies y storage sin relanzar Firefox. False si el navegador murió."""
+        inicio = time.perf_counter()
+        try:
+            try:
+                ctx.driver.execute_script(
+                    "try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            except Exception:
+                pass
+            ctx.driver.delete_all_cookies()
+            ctx.driver.get('about:blank')
+        except Exception as e:
+            print(f"✗ [N{ctx.id}] Navegador descartado al limpiarlo: {e}")
+            return False
+        with self._lock:
+            self.reseteos += 1
+            self.tiempo_reseteos += time.perf_counter() - inicio
+        return True
+
+    def cerrar_todos(self):
+        with self._lock:
+            libres, self._libres = self._libres, []
+        for ctx, _ in libres:
+            self.cerrar(ctx)
+
+    # ---- keep-alive ----
+
+    def _iniciar_keepalive(self):
+        with self._lock:
+            if self._hilo_keepalive is not None:
+                return
+            self._hilo_keepalive = threading.Thread(target=self._mantener_vivos,
+                                                    name="keepalive-navegadores",
+                                                    daemon=True)
+        self._hilo_keepalive.start()
+
+    def _mantener_vivos(self):
+        while True:
+            time.sleep(self.keepalive)
+            self.revisar_libres()
+
+    def revisar_libres(self):
+        """Descarta los navegadores libres que murieron o sobran por inactividad.
+
+        Se revisan de a uno: solo el que se está haciendo ping sale de la lista
+        de libres, así un geckodriver colgado no deja a `obtener` sin navegador
+        (y arrancando otros en frío). Los que quedaron libres hace menos de
+        `keepalive` segundos acaban de usarse y no se tocan.
+        """
+        revisados = set()
+        while True:
+            ahora = time.monotonic()
+            with self._lock:
+                # Los libres se apilan: los primeros son los que llevan más tiempo sin uso
+                indice = next((i for i, (ctx, desde) in enumerate(self._libres)
+                               if id(ctx) not in revisados and ahora - desde >= self.keepalive), None)
+                if indice is None:
+                    return
+                ctx, desde = self._libres.pop(indice)
+                sobran = len(self._libres) >= self.minimo
+            revisados.add(id(ctx))
+
+            if sobran and ahora - desde > self.inactividad_max:
+                self.cerrar(ctx)
+                continue
+            try:
+                ctx.driver.title  # ping barato al geckodriver
+            except Exception:
+                print(f"✗ Navegador inactivo sin respuesta, se descarta [N{ctx.id}]")
+                self.cerrar(ctx)
+                continue
+            with self._lock:
+                self._libres.insert(0, (ctx, desde))
+
+    # ---- estadísticas ----
+
+    def estadisticas(self):
+        with self._lock:
+            arranque_medio = self.tiempo_arranques / self.arranques if self.arranques else 0.0
+            reseteo_medio = self.tiempo_reseteos / self.reseteos if self.reseteos else 0.0
+            return {
+                'navegadores_libres': len(self._libres),
+                'arranques_en_frio': self.arranques,
+                'arranque_medio_s': round(arranque_medio, 3),
+                'reutilizaciones': self.reutilizaciones,
+                'reseteos': self.reseteos,
+                'reseteo_medio_s': round(reseteo_medio, 3),
+                'ahorro_estimado_s': round(
+                    max(0.0, arranque_medio - reseteo_medio) * self.reutilizaciones, 1),
+            }
+
+
+class Relevos:
+    """Navegadores de relevo para solapar el final de una fila con la siguiente.
+
+    Cuando una fila ya envió su formulario, `relevar(ctx, terminar)` pasa su
+    navegador a un hilo que hace `terminar(saliente)` (confirmación del envío,
+    cierre de sesión y limpieza) y deja en `ctx` un navegador de relevo ya
+    limpio, con el que el trabajador empieza enseguida el login del
+    siguiente usuario. Los navegadores de relevo son propios, como mucho
+    `maximo`, y no salen del pool del gestor ni vuelven a él: en el cambio
+    cada lado se queda con la misma cantidad de navegadores.
+
+    Con `control`, cada final en relevo ocupa un lugar de concurrencia hasta
+    terminar, como una fila en vuelo; si no hay lugar, el trabajador termina
+    la fila él mismo.
+    """
+
+    def __init__(self, gestor, maximo, control=None):
+        self.gestor = gestor
+        self.maximo = max(0, maximo)
+        self.control = control
+
+        self._lock = threading.Lock()
+        self._libres = []  # navegadores de relevo limpios
+        self._en_curso = set()  # hilos que terminan filas
+        self._lanzados = 0  # navegadores de relevo vivos o arrancando
+
+        self.relevos = 0
+        self.sin_relevo = 0
+
+    def relevar(self, ctx, terminar):
+        """True si el final de la fila sigue en otro hilo; si no, lo hace el trabajador."""
+        if self.maximo == 0:
+            return False
+        with self._lock:
+            libre = self._libres.pop() if self._libres else None
+            if libre is None and self._lanzados < self.maximo:
+                # Este final se hace aquí; el próximo ya tendrá navegador
+                self._lanzados += 1
+                threading.Thread(target=self._lanzar, args=(ctx.id,),
+                                 name=f"relevo-arranque-{ctx.id}", daemon=True).start()
+            if libre is None:
+                self.sin_relevo += 1
+                return False
+        if self.control is not None and not self.control.intentar_entrar():
+            with self._lock:
+                self._libres.append(libre)
+                self.sin_relevo += 1
+            return False
+
+        # `libre` se queda con el navegador de la fila que termina y `ctx` con el limpio
+        libre.id = ctx.id
+        for atributo in ('driver', 'wait', 'perfil', 'pagina'):
+            saliente = getattr(ctx, atributo, None)
+            setattr(ctx, atributo, getattr(libre, atributo, None))
+            setattr(libre, atributo, saliente)
+        ctx.pagina = None
+        hilo = threading.Thread(target=self._terminar, args=(libre, terminar),
+                                name=f"relevo-{ctx.id}", daemon=True)
+        with self._lock:
+            self._en_curso.add(hilo)
+            self.relevos += 1
+        hilo.start()
+        return True
+
+    def _lanzar(self, id_trabajador):
+        try:
+            ctx = self.gestor.lanzar(id_trabajador)
+        except Exception as e:
+            print(f"✗ No se pudo lanzar un navegador de relevo [N{id_trabajador}]: {e}")
+            with self._lock:
+                self._lanzados -= 1
+            return
+        with self._lock:
+            self._libres.append(ctx)
+
+    def _terminar(self, ctx, terminar):
+        listo = False
+        try:
+            try:
+                listo = terminar(ctx)
+            except Exception as e:
+                print(f"✗ [N{ctx.id}] Error terminando la fila en el relevo: {e}")
+                listo = False
+            if not listo:
+                self.gestor.cerrar(ctx)
+        finally:
+            if self.control is not None:
+                self.control.salir()
+            with self._lock:
+                self._en_curso.discard(threading.current_thread())
+                if listo:
+                    self._libres.append(ctx)
+                else:
+                    self._lanzados -= 1  # se podrá lanzar otro en su lugar
+
+    def esperar(self, espera=30):
+        """Espera a que terminen las filas en relevo (al cerrar el proceso)."""
+        with self._lock:
+            hilos = list(self._en_curso)
+        for hilo in hilos:
+            hilo.join(espera)
+
+    def cerrar_todos(self):
+        with self._lock:
+            libres, self._libres = self._libres, []
+            self._lanzados -= len(libres)
+        for ctx in libres:
+            self.gestor.cerrar(ctx)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'maximo': self.maximo,
+                'en_curso': len(self._en_curso),
+                'libres': len(self._libres),
+                'relevos': self.relevos,
+                'sin_relevo': self.sin_relevo,
+                'lanzados': self._lanzados,
+            }
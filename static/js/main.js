@@ -37,11 +37,11 @@ function initFileUpload() {
             }
             
             // Check file extension
-            const allowedExtensions = ['xlsx', 'xls'];
+            const allowedExtensions = ['xlsx', 'xls', 'csv'];
             const fileExtension = file.name.split('.').pop().toLowerCase();
             
             if (!allowedExtensions.includes(fileExtension)) {
-                showAlert('Tipo de archivo no permitido. Use archivos .xlsx o .xls', 'error');
+                showAlert('Tipo de archivo no permitido. Use archivos .xlsx, .xls o .csv', 'error');
                 this.value = '';
                 return;
             }
@@ -71,11 +71,105 @@ function initFileUpload() {
         uploadBtn.disabled = true;
         uploadBtn.innerHTML = 'Procesando...';
         
-        // Show progress message
-        showAlert('Procesando archivo, por favor espere...', 'info');
+        // Without fetch/EventSource fall back to a regular form post
+        if (!window.fetch || !window.EventSource) {
+            showAlert('Procesando archivo, por favor espere...', 'info');
+            return;
+        }
+
+        e.preventDefault();
+        fetch(uploadForm.action, {
+            method: 'POST',
+            body: new FormData(uploadForm),
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(response => response.json().then(data => ({ ok: response.ok, data: data })))
+            .then(function(result) {
+                if (!result.ok) {
+                    throw new Error(result.data.mensaje);
+                }
+                showAlert(result.data.mensaje, 'success');
+                followJob(result.data.stream_url);
+            })
+            .catch(function(error) {
+                showAlert(error.message || 'Error al subir el archivo', 'error');
+            })
+            .finally(function() {
+                uploadBtn.classList.remove('btn-loading');
+                uploadBtn.disabled = false;
+                uploadBtn.innerHTML = '<i data-feather="upload"></i> Procesar Archivo';
+                fileInput.value = '';
+                feather.replace();
+            });
+    });
+}
+
+// Live job progress through server-sent events
+function followJob(streamUrl) {
+    const panel = document.getElementById('progresoTrabajo');
+    const rowsBody = document.getElementById('progresoFilas');
+    if (!panel || !rowsBody) return;
+
+    panel.classList.remove('d-none');
+    rowsBody.innerHTML = '';
+    const rows = {};
+    const badges = { pendiente: 'secondary', en_proceso: 'info', enviado: 'success', fallido: 'danger', rechazado: 'warning' };
+
+    const source = new EventSource(streamUrl);
+    source.onmessage = function(event) {
+        const job = JSON.parse(event.data);
+        const done = job.enviado + job.fallido;
+        const total = job.total !== null ? job.total : job.leidas;
+
+        document.getElementById('progresoEstado').textContent = job.estado.replace('_', ' ');
+        document.getElementById('progresoEnviados').textContent = job.enviado;
+        document.getElementById('progresoFallidos').textContent = job.fallido;
+        document.getElementById('progresoOmitidos').textContent = job.omitidas;
+        document.getElementById('progresoRechazados').textContent = job.rechazadas;
+        document.getElementById('progresoTotal').textContent = job.total !== null ? job.total : job.leidas + '…';
+        document.getElementById('progresoVelocidad').textContent = job.filas_por_minuto;
+        document.getElementById('progresoEta').textContent = job.eta_s !== null ? formatDuration(job.eta_s) : '…';
+        document.getElementById('progresoBarra').style.width = (total ? done / total * 100 : 0) + '%';
+
+        function renderRow(key, numero, usuario, estado, detalle) {
+            let row = rows[key];
+            if (!row) {
+                row = rowsBody.insertRow();
+                rows[key] = row;
+                for (let i = 0; i < 4; i++) row.insertCell();
+            }
+            row.cells[0].textContent = numero + 1;
+            row.cells[1].textContent = usuario;
+            row.cells[2].innerHTML = `<span class="badge bg-${badges[estado] || 'secondary'}"></span>`;
+            row.cells[2].firstChild.textContent = estado.replace('_', ' ');
+            row.cells[3].textContent = detalle;
+            row.title = detalle;
+        }
+
+        // Rows rejected by the pre-flight validation never reach a browser
+        job.errores_validacion.forEach(function(error) {
+            renderRow('r' + error.numero, error.numero, error.usuario, 'rechazado', error.motivos.join(', '));
+        });
+        job.filas.forEach(function(fila) {
+            renderRow(fila.numero, fila.numero, fila.usuario, fila.estado, fila.error || fila.paso || '');
+        });
+    };
+    source.addEventListener('fin', function(event) {
+        source.close();
+        const fin = JSON.parse(event.data);
+        if (fin.estado === 'error') {
+            showAlert('El procesamiento se detuvo: ' + fin.error + '. Se reanudará al reiniciar la aplicación.', 'error');
+        } else {
+            showAlert('Procesamiento completado', 'success');
+        }
     });
 }
 
+function formatDuration(seconds) {
+    const minutes = Math.floor(seconds / 60);
+    return minutes > 0 ? `${minutes} min ${seconds % 60} s` : `${seconds} s`;
+}
+
 function initFormValidation() {
     const dataForm = document.getElementById('dataForm');
     
@@ -151,7 +245,7 @@ function validateExcelFile(file) {
         'application/vnd.ms-excel' // .xls
     ];
     
-    const allowedExtensions = ['xlsx', 'xls'];
+    const allowedExtensions = ['xlsx', 'xls', 'csv'];
     const fileExtension = file.name.split('.').pop().toLowerCase();
     
     return allowedTypes.includes(file.type) || allowedExtensions.includes(fileExtension);
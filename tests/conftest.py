@@ -0,0 +1,18 @@
+"""Entorno de las pruebas: base de trabajos temporal y sin esperas de ritmo.
+
+Las variables se fijan antes de importar cualquier módulo de la app, que
+las lee al cargarse.
+"""
+import os
+import tempfile
+
+_CARPETA = tempfile.mkdtemp(prefix='pruebas-formulario-')
+
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_CARPETA, 'trabajos.db')}"
+os.environ['REANUDAR_AL_ARRANCAR'] = '0'
+os.environ['PRECALENTAR_NAVEGADORES'] = '0'
+os.environ['PRECALENTAR_PLANTILLA'] = '0'
+os.environ['TASA_PORTAL'] = '0'
+os.environ['TASA_LOGINS'] = '0'
+os.environ['CAPTURAS_FALLOS'] = '0'
+os.environ['ESPERA_REINTENTO'] = '0'
@@ -0,0 +1,65 @@
+import automatizacion
+import progreso
+from atajos import CacheAtajos
+from persistencia import almacen
+
+
+def test_aprende_y_acierta():
+    atajos = CacheAtajos(ttl=60)
+    assert atajos.obtener('formulario') is None
+
+    atajos.aprender('formulario', 'http://portal/form')
+    atajos.acierto()
+
+    assert atajos.obtener('formulario') == 'http://portal/form'
+    assert atajos.estadisticas()['atajos_aciertos'] == 1
+
+
+def test_caduca(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr('atajos.time.monotonic', lambda: ahora[0])
+    atajos = CacheAtajos(ttl=60)
+    atajos.aprender('formulario', 'http://portal/form')
+
+    ahora[0] += 61
+    assert atajos.obtener('formulario') is None
+
+
+def test_atajo_fallido_no_se_vuelve_a_aprender():
+    atajos = CacheAtajos(ttl=60)
+    atajos.aprender('formulario', 'http://portal/form')
+    atajos.aprender('renovacion', 'http://portal/renovar')
+
+    atajos.olvidar('formulario')
+    # El camino completo vuelve a pasar por el formulario: no se aprende de nuevo
+    atajos.aprender('formulario', 'http://portal/form')
+
+    assert atajos.obtener('formulario') is None
+    assert atajos.obtener('renovacion') == 'http://portal/renovar'
+    estadisticas = atajos.estadisticas()
+    assert estadisticas['atajos_descartados'] == ['formulario']
+    assert estadisticas['atajos_fallos'] == 1
+
+
+def test_ttl_cero_desactiva_los_atajos():
+    atajos = CacheAtajos(ttl=0)
+    atajos.aprender('formulario', 'http://portal/form')
+    assert atajos.obtener('formulario') is None
+
+
+def test_cada_trabajo_tiene_sus_atajos_y_se_descartan_al_terminar(monkeypatch):
+    vistos = []
+
+    def procesar(trabajo_id, filas, *args, **kwargs):
+        vistos.append(automatizacion.atajos_por_trabajo.get(trabajo_id))
+        return 0, 0
+
+    monkeypatch.setattr(automatizacion.planificadores['http'], 'procesar', procesar)
+    trabajos = [almacen.crear_trabajo(f'atajos{i}.csv', motor='http') for i in range(2)]
+    for trabajo_id in trabajos:
+        automatizacion.procesar_trabajo(progreso.registrar(trabajo_id, 'atajos.csv', 'http'), [],
+                                        motor='http')
+
+    assert all(isinstance(atajos, CacheAtajos) for atajos in vistos)
+    assert vistos[0] is not vistos[1]
+    assert not set(trabajos) & set(automatizacion.atajos_por_trabajo)
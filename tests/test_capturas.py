@@ -0,0 +1,86 @@
+import base64
+import json
+import os
+import tarfile
+import time
+from types import SimpleNamespace
+
+from capturas import CapturasFallo
+
+
+class Driver:
+    def __init__(self, imagen=b'', falla=False):
+        self.imagen = imagen
+        self.falla = falla
+        self.current_url = 'http://portal/Formulario'
+        self.page_source = '<html></html>'
+
+    def get_screenshot_as_base64(self):
+        if self.falla:
+            raise ConnectionError('el navegador no responde')
+        return base64.b64encode(self.imagen).decode()
+
+
+def fila(numero):
+    trabajo = SimpleNamespace(id='t1')
+    return SimpleNamespace(trabajo=trabajo, numero=numero, usuario=f'u{numero}', paso='formulario',
+                           tiempos=[('iniciar_sesion', 1.5)], inicio=time.monotonic())
+
+
+def ctx(driver):
+    return SimpleNamespace(id=1, driver=driver)
+
+
+def paquetes(carpeta):
+    return sorted(nombre for nombre in os.listdir(carpeta) if nombre.endswith('.tar.gz'))
+
+
+def test_borra_las_mas_antiguas_al_pasar_del_tope(tmp_path):
+    # Cada captura pesa unos 40 KB (bytes aleatorios no se comprimen): caben dos
+    capturas = CapturasFallo(str(tmp_path), max_mb=0.1, activas=True)
+    for numero in range(5):
+        capturas.capturar(ctx(Driver(os.urandom(40 * 1024))), fila(numero), 'elemento', ValueError('x'))
+        capturas.esperar()
+
+    restantes = paquetes(tmp_path)
+    assert [nombre.split('_')[2] for nombre in restantes] == ['3', '4']
+    estadisticas = capturas.estadisticas()
+    assert (estadisticas['escritas'], estadisticas['borradas_por_espacio']) == (5, 3)
+
+
+def test_con_la_cola_llena_se_descarta_sin_frenar(tmp_path, monkeypatch):
+    capturas = CapturasFallo(str(tmp_path), en_cola=2, activas=True)
+    monkeypatch.setattr(capturas, '_iniciar', lambda: None)  # nadie vacía la cola
+    for numero in range(3):
+        capturas.capturar(ctx(Driver()), fila(numero), 'portal', TimeoutError('lento'))
+
+    estadisticas = capturas.estadisticas()
+    assert (estadisticas['capturadas'], estadisticas['descartadas'], estadisticas['en_cola']) == (2, 1, 2)
+
+
+def test_una_captura_que_falla_no_hace_fallar_la_fila(tmp_path):
+    capturas = CapturasFallo(str(tmp_path), activas=True)
+
+    capturas.capturar(ctx(Driver(falla=True)), fila(7), 'elemento', ValueError('sin botón'))
+    capturas.esperar()
+
+    [nombre] = paquetes(tmp_path)
+    with tarfile.open(tmp_path / nombre) as paquete:
+        assert sorted(paquete.getnames()) == ['datos.json', 'pagina.html']
+        datos = json.load(paquete.extractfile('datos.json'))
+    assert datos['captura_b64_error'] == 'el navegador no responde'
+    assert datos['error'] == 'ValueError: sin botón'
+    assert 'contra' not in datos
+
+
+def test_sin_navegador_no_se_le_pide_nada(tmp_path):
+    capturas = CapturasFallo(str(tmp_path), activas=True)
+    driver = Driver()
+    driver.get_screenshot_as_base64 = lambda: (_ for _ in ()).throw(AssertionError('no debía pedirla'))
+
+    capturas.capturar(ctx(driver), fila(1), 'navegador', ConnectionError('muerto'))
+    capturas.esperar()
+
+    [nombre] = paquetes(tmp_path)
+    with tarfile.open(tmp_path / nombre) as paquete:
+        assert paquete.getnames() == ['datos.json']
@@ -0,0 +1,96 @@
+from cookies_sesion import CacheCookies
+
+COOKIES = [{'name': 'ASP.NET_SessionId', 'value': 'abc', 'path': '/', 'domain': 'portal', 'httpOnly': True}]
+
+
+def test_se_usan_una_sola_vez():
+    cache = CacheCookies(ttl=60)
+    cache.guardar('u1', 't1', COOKIES)
+
+    assert cache.tiene('u1')
+    assert cache.tomar('u1') == [{'name': 'ASP.NET_SessionId', 'value': 'abc', 'path': '/', 'httpOnly': True}]
+    assert cache.tomar('u1') is None
+    assert not cache.tiene('u1')
+
+
+def test_caducan(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr('cookies_sesion.time.monotonic', lambda: ahora[0])
+    cache = CacheCookies(ttl=60)
+    cache.guardar('u1', 't1', COOKIES)
+
+    ahora[0] += 61
+    assert not cache.tiene('u1')
+    assert cache.tomar('u1') is None
+
+
+def test_se_borran_al_terminar_su_trabajo():
+    cache = CacheCookies(ttl=60)
+    cache.guardar('u1', 't1', COOKIES)
+    cache.guardar('u2', 't2', COOKIES)
+
+    cache.descartar_trabajo('t1')
+
+    assert not cache.tiene('u1')
+    assert cache.tiene('u2')
+
+
+def test_ttl_cero_desactiva_la_cache():
+    cache = CacheCookies(ttl=0)
+    cache.guardar('u1', 't1', COOKIES)
+    assert cache.tomar('u1') is None
+    assert cache.estadisticas()['guardadas'] == 0
+
+
+def test_estadisticas_de_reuso():
+    cache = CacheCookies(ttl=60)
+    cache.guardar('u1', 't1', COOKIES)
+    cache.tomar('u1')
+    cache.resultado(True)
+    cache.resultado(False)
+
+    assert cache.estadisticas() == {'sesiones_guardadas': 0, 'guardadas': 1, 'reusadas': 1, 'rechazadas': 1}
+
+
+def test_fila_fallida_cierra_su_sesion_y_no_la_deja_guardada(monkeypatch):
+    from selenium.common.exceptions import NoSuchElementException
+
+    import automatizacion
+
+    class Driver:
+        def get_cookies(self):
+            return COOKIES
+
+    class Ctx:
+        id = 1
+        driver = Driver()
+        envio_en_curso = False
+
+    class Trabajo:
+        id = 'trabajo-fallido'
+        motor = 'navegador'
+
+    class Fila:
+        id = 0
+        usuario = 'fallido'
+        paso = None
+        trabajo = Trabajo()
+
+        def iniciar(self):
+            pass
+
+    def flujo(ctx, fila, desde_formulario=False):
+        fila.paso = 'iniciar_sesion'
+        automatizacion.guardar_sesion(ctx, fila)  # como tras un login correcto
+        raise NoSuchElementException('falta el formulario')
+
+    cerradas = []
+    monkeypatch.setattr(automatizacion, 'flujo_usuario', flujo)
+    monkeypatch.setattr(automatizacion, 'fallar_fila', lambda *args: None)
+    monkeypatch.setattr(automatizacion, 'cerrar_sesion', cerradas.append)
+    monkeypatch.setattr(automatizacion, 'preparar_siguiente', lambda ctx: None)
+
+    ctx = Ctx()
+    assert automatizacion.procesar_usuario(ctx, Fila()) is False
+    assert cerradas == [ctx]
+    assert not automatizacion.cache_cookies.tiene('fallido')
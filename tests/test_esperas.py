@@ -0,0 +1,41 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+import esperas
+import fallos
+
+
+class Driver:
+    """Driver falso: el observador nunca encuentra el selector."""
+
+    def __init__(self, estado):
+        self.estado = estado
+
+    def execute_async_script(self, script, *args):
+        return None
+
+    def execute_script(self, script, *args):
+        assert script == "return document.readyState"
+        return self.estado
+
+
+class Ctx:
+    def __init__(self, estado):
+        self.driver = Driver(estado)
+
+
+def test_selector_ausente_en_pagina_cargada_es_de_la_pagina():
+    with pytest.raises(NoSuchElementException) as error:
+        esperas.esperar_selector(Ctx('complete'), '#nombre', 'formulario')
+    assert fallos.clasificar(error.value) == 'elemento'
+
+
+def test_selector_ausente_con_la_pagina_cargando_es_del_portal():
+    with pytest.raises(TimeoutException) as error:
+        esperas.esperar_selector(Ctx('interactive'), '#nombre', 'formulario')
+    assert fallos.clasificar(error.value) == 'portal'
+
+
+def test_lo_que_carga_el_script_sigue_siendo_del_portal():
+    with pytest.raises(TimeoutException):
+        esperas.esperar_selector(Ctx('complete'), '#sector option', 'sector')
@@ -0,0 +1,28 @@
+import requests
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchElementException, TimeoutException
+from urllib3.exceptions import ReadTimeoutError
+
+import fallos
+
+
+def test_clases():
+    assert fallos.clasificar(fallos.CredencialesInvalidas("no")) == 'credenciales'
+    assert fallos.clasificar(TimeoutException("lento")) == 'portal'
+    assert fallos.clasificar(requests.HTTPError("503")) == 'portal'
+    assert fallos.clasificar(InvalidSessionIdException("muerto")) == 'navegador'
+    assert fallos.clasificar(ReadTimeoutError(None, '/session', "geckodriver")) == 'navegador'
+    assert fallos.clasificar(NoSuchElementException("#nombre")) == 'elemento'
+    assert fallos.clasificar(ValueError("otro")) == 'desconocido'
+
+
+def test_error_durante_el_envio_final_es_incierto():
+    for error in (requests.Timeout("lectura"), requests.HTTPError("502"),
+                  ReadTimeoutError(None, '/session', "geckodriver")):
+        assert fallos.clasificar(error, enviando=True) == 'incierto'
+    politica = fallos.POLITICAS['incierto']
+    assert politica.reintentos == 0
+
+
+def test_rechazo_visible_del_envio_no_es_incierto():
+    error = fallos.EnvioSinConfirmar("el portal devolvió el formulario")
+    assert fallos.clasificar(error, enviando=True) == 'elemento'
@@ -0,0 +1,63 @@
+import inspect
+
+import openpyxl
+import pytest
+
+from lectura import leer_filas
+
+
+def escribir_csv(ruta, lineas):
+    ruta.write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+    return str(ruta)
+
+
+def escribir_xlsx(ruta, filas):
+    libro = openpyxl.Workbook()
+    for fila in filas:
+        libro.active.append(fila)
+    libro.save(ruta)
+    return str(ruta)
+
+
+@pytest.fixture(params=['csv', 'xlsx'])
+def archivo(request, tmp_path):
+    """Encabezado, dos filas y una vacía entre ellas, en cada formato."""
+    if request.param == 'csv':
+        return escribir_csv(tmp_path / 'lote.csv', ['usuario, e_no', 'ana,1', ',', 'beto,2'])
+    return escribir_xlsx(tmp_path / 'lote.xlsx', [['usuario', ' e_no'], ['ana', '1'], [None, None], ['beto', '2']])
+
+
+def test_una_fila_por_dict_sin_las_vacias(archivo):
+    filas = leer_filas(archivo)
+
+    assert inspect.isgenerator(filas)
+    # La fila vacía no cuenta: la numeración de las siguientes sigue corrida
+    assert list(enumerate(filas)) == [(0, {'usuario': 'ana', 'e_no': '1'}), (1, {'usuario': 'beto', 'e_no': '2'})]
+
+
+def test_lee_a_medida_que_se_pide(tmp_path):
+    # No abre el archivo hasta pedir la primera fila
+    filas = leer_filas(str(tmp_path / 'no_existe.csv'))
+    with pytest.raises(FileNotFoundError):
+        next(filas)
+
+    ruta = escribir_csv(tmp_path / 'lote.csv', ['usuario', 'ana', 'beto'])
+    filas = leer_filas(ruta)
+    assert next(filas) == {'usuario': 'ana'}
+    filas.close()
+
+
+@pytest.mark.parametrize('nombre', ['solo_encabezado.csv', 'solo_encabezado.xlsx'])
+def test_solo_encabezado_no_da_filas(tmp_path, nombre):
+    ruta = tmp_path / nombre
+    if nombre.endswith('.csv'):
+        escribir_csv(ruta, ['usuario,e_no'])
+    else:
+        escribir_xlsx(ruta, [['usuario', 'e_no']])
+
+    assert list(leer_filas(str(ruta))) == []
+
+
+def test_formato_no_soportado():
+    with pytest.raises(ValueError, match='.txt'):
+        leer_filas('lote.txt')
@@ -0,0 +1,118 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import automatizacion
+import limitador
+import progreso
+from persistencia import almacen
+
+
+def control(**opciones):
+    return limitador.ControlConcurrencia('prueba', inicial=4, maximo=8, ventana=2, **opciones)
+
+
+def test_sube_de_a_uno_y_baja_a_la_mitad_con_fallos():
+    c = control()
+    c.observar(1.0)
+    c.observar(1.0)
+    assert c.limite == 5
+
+    c.fallo_portal()
+    c.fallo_portal()
+    assert c.limite == 2
+
+
+def test_baja_si_la_latencia_pasa_de_la_referencia():
+    c = control(tolerancia=2)
+    for segundos in (1.0, 1.0, 3.0, 3.0):
+        c.observar(segundos)
+    assert (c.subidas, c.bajadas, c.limite) == (1, 1, 2)
+
+
+def test_la_referencia_sigue_al_portal_cuando_se_vuelve_mas_lento():
+    c = control(tolerancia=2, ventanas_referencia=3)
+    c.observar(1.0)
+    c.observar(1.0)
+    # El portal pasa a tardar 3 s de forma sostenida: baja unas ventanas y
+    # luego la referencia se olvida de la ventana rápida y vuelve a subir
+    for _ in range(6):
+        c.observar(3.0)
+        c.observar(3.0)
+    assert c.bajadas == 2
+    assert c.subidas >= 2
+
+
+def test_entrar_respeta_el_limite():
+    c = limitador.ControlConcurrencia('prueba', inicial=1, maximo=1)
+    c.entrar()
+    dentro = threading.Event()
+    hilo = threading.Thread(target=lambda: (c.entrar(), dentro.set()), daemon=True)
+    hilo.start()
+    assert not dentro.wait(0.05)
+    c.salir()
+    assert dentro.wait(1)
+
+
+def test_esperado_suma_las_esperas_de_este_hilo(monkeypatch):
+    monkeypatch.setattr(limitador, '_peticiones', limitador.CuboTokens(100, 1))
+    limitador.esperado()
+    inicio = time.monotonic()
+    for _ in range(3):
+        limitador.peticion()
+    transcurrido = time.monotonic() - inicio
+
+    esperado = limitador.esperado()
+    assert 0.015 <= esperado <= transcurrido
+    assert limitador.esperado() == 0.0
+    otro = []
+    hilo = threading.Thread(target=lambda: otro.append(limitador.esperado()))
+    hilo.start()
+    hilo.join()
+    assert otro == [0.0]
+
+
+def test_el_paso_mide_solo_al_portal(monkeypatch):
+    observadas = []
+    monkeypatch.setattr(automatizacion.controles['http'], 'observar', observadas.append)
+    monkeypatch.setattr(limitador, '_peticiones', limitador.CuboTokens(20, 1))
+    trabajo_id = almacen.crear_trabajo('paso.csv', motor='http')
+    seguimiento = progreso.registrar(trabajo_id, 'paso.csv', 'http')
+    [fila] = seguimiento.seguir(almacen.registrar_filas(trabajo_id, [(0, {'usuario': 'paso0', 'e_no': '1'})]))
+    ctx = SimpleNamespace()
+
+    fila.iniciar()
+    time.sleep(0.1)  # la espera de un reintento anterior
+    automatizacion.empezar_intento(ctx, 'http')
+    limitador.peticion()
+    limitador.peticion()  # sin ráfaga: espera su turno unos 50 ms
+    automatizacion.paso_completado(ctx, fila, 'iniciar_sesion')
+
+    assert len(observadas) == 1 and observadas[0] < 0.03
+
+
+def test_el_respaldo_en_navegador_mide_en_su_motor_sin_el_popup(monkeypatch):
+    por_motor = {'http': [], 'navegador': []}
+    for motor, observadas in por_motor.items():
+        monkeypatch.setattr(automatizacion.controles[motor], 'observar', observadas.append)
+    trabajo_id = almacen.crear_trabajo('respaldo.csv', motor='http')
+    seguimiento = progreso.registrar(trabajo_id, 'respaldo.csv', 'http')
+    [fila] = seguimiento.seguir(almacen.registrar_filas(trabajo_id, [(0, {'usuario': 'resp0', 'e_no': '1'})]))
+    ctx = SimpleNamespace()
+
+    fila.iniciar()
+    automatizacion.empezar_intento(ctx, 'navegador')
+    time.sleep(0.1)  # el popup que no apareció
+    automatizacion.descontar_espera(ctx, 0.1)
+    automatizacion.paso_completado(ctx, fila, 'iniciar_sesion')
+
+    assert por_motor['http'] == []
+    assert len(por_motor['navegador']) == 1 and por_motor['navegador'][0] < 0.03
+
+
+def test_intentar_entrar_no_espera():
+    c = limitador.ControlConcurrencia('prueba', inicial=1, maximo=1)
+    assert c.intentar_entrar()
+    assert not c.intentar_entrar()
+    c.salir()
+    assert c.intentar_entrar()
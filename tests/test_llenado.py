@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from selenium.common.exceptions import NoSuchElementException
+
+import llenado
+
+
+class Elemento:
+    tag_name = 'input'
+
+    def __init__(self, id_campo, tecleados):
+        self.id_campo = id_campo
+        self.tecleados = tecleados
+
+    def clear(self):
+        pass
+
+    def send_keys(self, valor):
+        self.tecleados.append((self.id_campo, valor))
+
+
+class Driver:
+    """El llenado masivo deja `rechazados` sin llenar; `ausentes` no existen en la página."""
+
+    def __init__(self, rechazados=(), ausentes=()):
+        self.rechazados = rechazados
+        self.ausentes = ausentes
+        self.masivos = []
+        self.tecleados = []
+
+    def execute_script(self, script, campos):
+        self.masivos.append(dict(campos))
+        return {id_campo: 'valor rechazado' if id_campo in self.rechazados else 'ok' for id_campo in campos}
+
+    def find_element(self, por, id_campo):
+        if id_campo in self.ausentes:
+            raise NoSuchElementException(f'no existe {id_campo}')
+        return Elemento(id_campo, self.tecleados)
+
+
+def test_solo_se_teclean_los_campos_que_fallaron():
+    driver = Driver(rechazados=('salario',))
+    reporte = llenado.llenar_campos(SimpleNamespace(driver=driver), {
+        'e_no': 100000, 'salario': '25000', 'calle': None})
+
+    assert driver.masivos == [{'e_no': '100000', 'salario': '25000', 'calle': ''}]
+    assert driver.tecleados == [('salario', '25000')]
+    assert reporte == {'e_no': 'ok', 'salario': 'ok', 'calle': 'ok'}
+
+
+def test_un_campo_que_tampoco_se_puede_teclear_queda_en_el_reporte():
+    driver = Driver(rechazados=('celular',), ausentes=('celular',))
+    reporte = llenado.llenar_campos(SimpleNamespace(driver=driver), {'e_no': '1', 'celular': '809'})
+
+    assert driver.tecleados == []
+    assert llenado.campos_fallidos(reporte) == {'celular': 'valor rechazado'}
+
+
+def test_campos_tecleados_no_van_en_el_llenado_masivo(monkeypatch):
+    monkeypatch.setattr(llenado, 'CAMPOS_TECLEADOS', {'rnc'})
+    driver = Driver()
+    llenado.llenar_campos(SimpleNamespace(driver=driver), {'e_no': '1', 'rnc': '101'})
+
+    assert driver.masivos == [{'e_no': '1'}]
+    assert driver.tecleados == [('rnc', '101')]
@@ -0,0 +1,59 @@
+import csv
+
+import lote
+from persistencia import almacen
+
+COLUMNAS = ('usuario', 'contra', 'expedicion', 'expiracion', 'e_no', 'e_expedicion', 'e_expiracion',
+            'salario', 'profesion', 'empresa', 'rnc', 'societario')
+
+
+def escribir_csv(ruta, usuarios, invalidas=()):
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(COLUMNAS)
+        for numero, usuario in enumerate(usuarios):
+            salario = '' if numero in invalidas else '25000'
+            escritor.writerow([usuario, 'clave', '01/01/2024', '01/01/2030', f'{numero}00', '01/01/2024',
+                               '01/01/2026', salario, 'Agricultor', 'Finca', '101', 'SRL'])
+
+
+def test_repartir_por_turnos_con_numeros_del_archivo(tmp_path):
+    ruta = tmp_path / 'lote.csv'
+    escribir_csv(ruta, [f'rep{i}' for i in range(6)], invalidas={1})
+
+    fragmentos, asignadas, rechazadas = lote.repartir(str(ruta), 2)
+
+    assert [(f.indice, [numero for numero, _ in f.filas]) for f in fragmentos] == [
+        (0, [0, 3, 5]), (1, [2, 4])]
+    assert [(numero, indice, usuario) for numero, indice, usuario, _ in asignadas] == [
+        (0, 0, 'rep0'), (2, 1, 'rep2'), (3, 0, 'rep3'), (4, 1, 'rep4'), (5, 0, 'rep5')]
+    assert rechazadas == {1: ('rep1', ['falta salario'])}
+    assert not list(tmp_path.glob('fragmento_*')), "las filas no se escriben a disco"
+
+
+def test_combinar_en_el_orden_del_archivo(tmp_path):
+    ruta = tmp_path / 'lote.csv'
+    escribir_csv(ruta, [f'comb{i}' for i in range(5)], invalidas={2})
+    fragmentos, asignadas, rechazadas = lote.repartir(str(ruta), 2)
+
+    # Lo que haría cada proceso: el fragmento 0 termina, el 1 muere tras su primera fila
+    for fragmento in fragmentos:
+        almacen.crear_trabajo(str(ruta), fragmento.trabajo_id)
+        registradas = list(almacen.registrar_filas(fragmento.trabajo_id, fragmento.filas))
+        if fragmento.indice == 0:
+            for fila_id, numero, _ in registradas:
+                almacen.marcar_resultado(fila_id, numero != 3, 'rechazado por el portal')
+        else:
+            almacen.marcar_resultado(registradas[0][0], True)
+
+    filas = lote.combinar(almacen, fragmentos, [0, 1], asignadas, rechazadas)
+
+    assert [(f['fila'], f['usuario'], f['estado'], f['proceso']) for f in filas] == [
+        (1, 'comb0', 'enviado', 0),
+        (2, 'comb1', 'enviado', 1),
+        (3, 'comb2', 'rechazado', None),
+        (4, 'comb3', 'fallido', 0),
+        (5, 'comb4', 'fallido', 1),
+    ]
+    assert filas[4]['error'] == 'proceso lote-1 terminó con código 1'
+    assert almacen.resumen(fragmentos[1].trabajo_id)['estado'] == 'completado'
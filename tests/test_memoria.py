@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+
+import memoria
+
+# geckodriver (100) -> firefox (101) -> procesos de contenido (102, 103); 200 es ajeno
+HIJOS = {1: [100, 200], 100: [101], 101: [102, 103]}
+RSS_KB = {100: 10 * 1024, 101: 300 * 1024, 102: 150 * 1024, 103: 50 * 1024, 200: 4000 * 1024}
+
+
+@pytest.fixture(autouse=True)
+def arbol(monkeypatch):
+    monkeypatch.setattr(memoria, '_hijos_por_padre', lambda: HIJOS)
+    monkeypatch.setattr(memoria, '_rss_kb', lambda pid: RSS_KB.get(pid, 0))
+    monkeypatch.setattr(memoria.os.path, 'isdir', lambda ruta: True)
+
+
+def navegador(id_trabajador, pid=100):
+    driver = SimpleNamespace(service=SimpleNamespace(process=SimpleNamespace(pid=pid)))
+    return SimpleNamespace(id=id_trabajador, driver=driver)
+
+
+def test_suma_el_rss_de_todo_el_arbol_del_navegador():
+    assert memoria.rss_arbol_mb(100) == 510
+    assert memoria.rss_arbol_mb(101) == 500
+    assert memoria.rss_arbol_mb(None) == 0.0
+    assert memoria.pid_navegador(object()) is None
+
+
+def test_relanza_solo_por_encima_del_limite():
+    vigilante = memoria.VigilanteMemoria(limite_mb=500)
+
+    assert vigilante.excedida(navegador(1))
+    assert not vigilante.excedida(navegador(2, pid=101))  # justo en el límite
+    assert vigilante.estadisticas() == {
+        'limite_mb': 500, 'mediciones': 2, 'reciclados': 1, 'pico_mb': 510.0,
+        'picos_mb': {1: 510.0, 2: 500.0}}
+
+
+def test_limite_cero_no_mide():
+    vigilante = memoria.VigilanteMemoria(limite_mb=0)
+
+    assert not vigilante.excedida(navegador(1))
+    assert vigilante.estadisticas()['mediciones'] == 0
@@ -0,0 +1,58 @@
+import pytest
+
+import metricas
+
+
+@pytest.fixture(autouse=True)
+def limpias():
+    metricas.reiniciar()
+    yield
+    metricas.reiniciar()
+
+
+def test_prometheus_con_ayuda_tipo_etiquetas_y_buckets():
+    metricas.incrementar('filas_total', 'exito')
+    metricas.incrementar('filas_total', 'exito', 2)
+    metricas.observar('paso_duracion_segundos', 'login', 0.2)
+    metricas.observar('paso_duracion_segundos', 'login', 3.0)
+
+    lineas = metricas.exportar_prometheus().splitlines()
+
+    assert '# HELP formulario_filas_total Filas procesadas por resultado' in lineas
+    assert '# TYPE formulario_filas_total counter' in lineas
+    assert 'formulario_filas_total{resultado="exito"} 3' in lineas
+    assert '# TYPE formulario_paso_duracion_segundos histogram' in lineas
+    # Buckets acumulados: 0.2 cae en le=0.25 y 3.0 en le=5
+    assert 'formulario_paso_duracion_segundos_bucket{paso="login",le="0.1"} 0' in lineas
+    assert 'formulario_paso_duracion_segundos_bucket{paso="login",le="0.25"} 1' in lineas
+    assert 'formulario_paso_duracion_segundos_bucket{paso="login",le="2.5"} 1' in lineas
+    assert 'formulario_paso_duracion_segundos_bucket{paso="login",le="5"} 2' in lineas
+    assert 'formulario_paso_duracion_segundos_bucket{paso="login",le="+Inf"} 2' in lineas
+    assert 'formulario_paso_duracion_segundos_sum{paso="login"} 3.2' in lineas
+    assert 'formulario_paso_duracion_segundos_count{paso="login"} 2' in lineas
+
+
+def test_json_por_metrica_y_etiqueta():
+    metricas.incrementar('fallos_total', 'portal')
+    metricas.fijar('limite_concurrencia', 'http', 7)
+    metricas.observar('espera_duracion_segundos', 'bienvenida', 0.5)
+
+    datos = metricas.exportar_json()
+
+    assert set(datos) == set(metricas.METRICAS)
+    assert datos['fallos_total'] == {'portal': 1}
+    assert datos['limite_concurrencia'] == {'http': 7}
+    assert datos['filas_total'] == {}
+    espera = datos['espera_duracion_segundos']['bienvenida']
+    assert (espera['total'], espera['suma_s'], espera['media_s']) == (1, 0.5, 0.5)
+    assert espera['buckets']['0.5'] == 1
+    assert sum(espera['buckets'].values()) == 1
+
+
+def test_medir_paso_observa_la_duracion():
+    @metricas.medir_paso('prueba')
+    def paso():
+        return 'listo'
+
+    assert paso() == 'listo'
+    assert metricas.exportar_json()['paso_duracion_segundos']['prueba']['total'] == 1
@@ -0,0 +1,104 @@
+import pytest
+import requests
+
+import automatizacion
+import motor_http
+import portal_simulado
+from persistencia import almacen
+from test_lote import escribir_csv
+
+
+@pytest.fixture
+def portal(monkeypatch):
+    url, servidor = portal_simulado.iniciar_en_hilo(prob_popup=0.0)
+    monkeypatch.setattr(automatizacion, 'PORTAL_URL', url)
+    yield servidor.app
+    servidor.shutdown()
+
+
+def test_envia_las_filas_por_http_sin_respaldo(portal, monkeypatch, tmp_path):
+    respaldos = []
+
+    def obtener_navegador(id_trabajador):
+        respaldos.append(id_trabajador)
+        raise RuntimeError("la fila no debía pasar al navegador")
+
+    monkeypatch.setattr(automatizacion.gestor_sesiones, 'obtener', obtener_navegador)
+    ruta = tmp_path / 'http.csv'
+    escribir_csv(ruta, [f'http{i}' for i in range(4)])
+
+    trabajo_id = automatizacion.ejecutar(str(ruta), motor='http')
+
+    assert respaldos == []
+    assert [f['estado'] for f in almacen.resultados(trabajo_id)] == ['enviado'] * 4
+    envios = portal.config['ENVIOS']
+    assert sorted(e['usuario'] for e in envios) == [f'http{i}' for i in range(4)]
+    # El valor real de la cascada, no el texto de la opción
+    assert {(e['municipio'], e['sector'], e['newsector']) for e in envios} == {
+        ('01', '0102', '03100101010106500')}
+
+
+class Respuesta:
+    def __init__(self, url, html='', datos=None):
+        self.url = url
+        self.text = html
+        self._datos = datos
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._datos
+
+
+FORMULARIO = """<form method="post"><select id="municipio" name="mun"><option value="01">SD</option></select>
+<select id="sector" name="sector"><option value="">--</option></select></form>{}"""
+
+
+def pagina_con(script):
+    return motor_http.Pagina(Respuesta('http://portal/Solicitudes/Formulario', FORMULARIO.format(script)))
+
+
+def test_valor_del_sector_desde_la_cascada_del_script(monkeypatch):
+    pedidas = []
+
+    class Sesion:
+        def get(self, url, params=None, **kwargs):
+            pedidas.append((url, params))
+            return Respuesta(url, datos=[{'Value': '7', 'Text': 'Santo Domingo de Guzmán'}])
+
+    ctx = type('Ctx', (), {'sesion': Sesion()})()
+    pagina = pagina_con("<script>$.getJSON('/Ubicacion/GetSectores', {mun: this.value});</script>")
+    formulario = pagina.formularios[0]
+
+    assert motor_http._valor_sector(ctx, pagina, formulario, '01', 'santo domingo de guzmán') == '7'
+    assert pedidas == [('http://portal/Ubicacion/GetSectores', {'mun': '01'})]
+
+
+def test_sin_cascada_reconocible_pasa_al_navegador():
+    pagina = pagina_con("<script>console.log('sin cascada');</script>")
+
+    with pytest.raises(motor_http.FlujoNoReconocido):
+        motor_http._valor_sector(None, pagina, pagina.formularios[0], '01', 'Santo Domingo de Guzmán')
+
+
+def test_timeout_del_envio_final_no_se_repite(portal, monkeypatch, tmp_path):
+    pedir = motor_http._pedir
+
+    def pedir_sin_respuesta(ctx, metodo, url, **kwargs):
+        pagina = pedir(ctx, metodo, url, **kwargs)
+        if metodo == 'POST' and url.endswith('/Solicitudes/Empresa'):
+            raise requests.ReadTimeout("el portal no respondió")  # la solicitud sí llegó
+        return pagina
+
+    monkeypatch.setattr(motor_http, '_pedir', pedir_sin_respuesta)
+    monkeypatch.setattr(automatizacion.gestor_sesiones, 'obtener', pytest.fail)
+    ruta = tmp_path / 'incierto.csv'
+    escribir_csv(ruta, ['incierto0'])
+
+    trabajo_id = automatizacion.ejecutar(str(ruta), motor='http')
+
+    [fila] = almacen.resultados(trabajo_id)
+    assert (fila['estado'], fila['ultimo_paso']) == ('fallido', 'enviando')
+    assert fila['error'].startswith('[incierto]')
+    assert [e['usuario'] for e in portal.config['ENVIOS']] == ['incierto0']
@@ -0,0 +1,88 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+import paginas
+
+
+class Elemento:
+    def __init__(self, selector):
+        self.selector = selector
+        self.tecleado = []
+        self.pulsado = False
+
+    def send_keys(self, valor):
+        self.tecleado.append(valor)
+
+    def click(self):
+        self.pulsado = True
+
+
+class Driver:
+    """Driver falso que cuenta cada llamada para localizar elementos."""
+
+    def __init__(self, ausentes=()):
+        self.ausentes = ausentes
+        self.llamadas = []
+
+    def execute_async_script(self, script, selector, *args):
+        self.llamadas.append(('observar', selector))
+        return Elemento(selector)
+
+    def find_elements(self, por, selector):
+        self.llamadas.append(('find_elements', selector))
+        return [] if selector in self.ausentes else [Elemento(selector)]
+
+
+class Ctx:
+    def __init__(self, driver=None):
+        self.driver = driver or Driver()
+        self.pagina = None
+
+
+def test_cada_elemento_se_localiza_una_sola_vez():
+    ctx = Ctx()
+    login = paginas.PaginaLogin(ctx)
+
+    login.entrar('ana', 'clave')
+    usuario = login.esperar('usuario', 'login')
+    contrasena = login.elemento('contrasena')
+    login.elemento('entrar')
+
+    assert ctx.driver.llamadas == [
+        ('observar', 'input[name="id"]'),
+        ('find_elements', 'input[name="password"]'),
+        ('find_elements', 'input[type="submit"][value="Iniciar Sesión"]'),
+    ]
+    assert login.busquedas == 3
+    assert usuario.tecleado == ['ana'] and contrasena.tecleado == ['clave']
+
+
+def test_lo_que_no_esta_no_se_guarda():
+    ctx = Ctx(Driver(ausentes=('.validation-summary-errors',)))
+    login = paginas.PaginaLogin(ctx)
+
+    assert login.rechazo() is None
+    with pytest.raises(NoSuchElementException):
+        login.elemento('rechazo')
+    # Puede aparecer más tarde: se vuelve a preguntar al navegador
+    assert login.busquedas == 2
+
+
+def test_pagina_nueva_empieza_sin_elementos():
+    ctx = Ctx()
+    inicio = paginas.PaginaInicio(ctx)
+    inicio.buscar('bienvenida')
+    ctx.pagina = inicio
+
+    # Mientras siga en la misma página se reusa con lo que ya encontró
+    assert paginas.actual(ctx, paginas.PaginaInicio) is inicio
+    nueva = paginas.actual(ctx, paginas.PaginaAplicaciones)
+    assert nueva is not inicio and nueva.busquedas == 0
+    # Otra página del mismo tipo (tras navegar) vuelve a buscar
+    otra = paginas.PaginaInicio(ctx)
+    otra.buscar('bienvenida')
+    assert ctx.driver.llamadas == [('find_elements', '.welcome')] * 2
+    # La página de otro navegador no se reusa
+    otro_ctx = Ctx()
+    otro_ctx.pagina = inicio
+    assert paginas.actual(otro_ctx, paginas.PaginaInicio) is not inicio
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import perfiles
+
+PREFERENCIAS = {'permissions.default.image': 2, 'browser.cache.disk.enable': False}
+
+
+def arranque_simulado(ruta):
+    """Lo que deja el primer arranque de Firefox sobre la plantilla."""
+    with open(os.path.join(ruta, 'prefs.js'), 'w') as archivo:
+        archivo.write('// inicializado\n')
+    with open(os.path.join(ruta, 'user.js'), 'a') as archivo:
+        archivo.write('user_pref("de.geckodriver", true);\n')
+    open(os.path.join(ruta, 'parent.lock'), 'w').close()
+    os.mkdir(os.path.join(ruta, 'cache2'))
+
+
+@pytest.fixture
+def gestor(tmp_path, monkeypatch):
+    monkeypatch.setattr(perfiles, '_reflink', None)
+    g = perfiles.GestorPerfiles(PREFERENCIAS, arranque_simulado, reciclar_cada=2, directorio=str(tmp_path))
+    yield g
+    g.limpiar()
+
+
+def test_copia_la_plantilla_sin_lo_que_deja_el_arranque(gestor, monkeypatch):
+    monkeypatch.setattr(perfiles.fcntl, 'ioctl', lambda *args: (_ for _ in ()).throw(OSError('sin reflink')))
+    ruta = gestor.nuevo(1)
+
+    assert sorted(os.listdir(ruta)) == ['prefs.js', 'user.js']
+    with open(os.path.join(ruta, 'user.js')) as archivo:
+        assert 'geckodriver' not in archivo.read()
+    # Sin reflink se copia normal y se recuerda para las siguientes copias
+    assert gestor.estadisticas()['reflink'] is False
+    assert perfiles._reflink is False
+
+
+def test_usa_reflink_si_el_sistema_de_archivos_lo_permite(gestor, monkeypatch):
+    clonados = []
+
+    def ioctl(destino, pedido, origen):
+        assert pedido == perfiles._FICLONE
+        clonados.append(pedido)
+        os.lseek(origen, 0, os.SEEK_SET)
+        os.write(destino, os.read(origen, 1 << 20))
+
+    monkeypatch.setattr(perfiles.fcntl, 'ioctl', ioctl)
+    monkeypatch.setattr(perfiles.shutil, 'copy2', lambda *args: pytest.fail('no debía copiar normal'))
+    ruta = gestor.nuevo(1)
+
+    assert len(clonados) == 2  # prefs.js y user.js
+    with open(os.path.join(ruta, 'prefs.js')) as archivo:
+        assert archivo.read() == '// inicializado\n'
+    assert gestor.estadisticas()['reflink'] is True
+
+
+def test_recicla_tras_reciclar_cada_usuarios(gestor):
+    ruta = gestor.nuevo(1)
+
+    assert gestor.usar(ruta) is False
+    assert gestor.usar(ruta) is True
+    assert gestor.usar('/otra/ruta') is False  # perfiles ajenos no cuentan
+    assert gestor.estadisticas()['perfiles_reciclados'] == 1
+
+
+def test_solo_borra_lo_que_creo(gestor, tmp_path):
+    ajeno = tmp_path / 'ajeno'
+    ajeno.mkdir()
+    primera, segunda = gestor.nuevo(1), gestor.nuevo(2)
+
+    gestor.descartar(primera)
+    gestor.descartar(str(ajeno))
+    assert not os.path.exists(primera)
+    assert os.path.isdir(segunda)
+    assert ajeno.is_dir()
+
+    raiz = os.path.dirname(segunda)
+    gestor.limpiar()
+    assert not os.path.exists(raiz)
+    assert ajeno.is_dir()
+    assert gestor.estadisticas()['perfiles_activos'] == 0
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from pool_navegadores import Planificador
+
+
+def esperar_hasta(condicion, segundos=5):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        assert time.monotonic() < limite, "la condición no se cumplió a tiempo"
+        time.sleep(0.005)
+
+
+def planificador(num_trabajadores=1, crear_contexto=lambda id_trabajador: object()):
+    p = Planificador(num_trabajadores, crear_contexto, lambda ctx: None)
+    p.lectura_adelantada = 100  # todas las filas en cola: el orden no depende de los hilos de lectura
+    return p
+
+
+def test_reparte_segun_el_peso():
+    orden = []
+    puerta = threading.Event()
+
+    def procesar(ctx, fila):
+        puerta.wait(5)
+        orden.append(fila[0])
+        return True
+
+    p = planificador()
+    normal = p.enviar('normal', [f'a{i}' for i in range(8)], procesar, peso=1)
+    urgente = p.enviar('urgente', [f'b{i}' for i in range(8)], procesar, peso=3)
+    esperar_hasta(lambda: len(normal.cola) + len(urgente.cola) >= 15)
+    puerta.set()
+
+    assert normal.esperar() == (8, 0)
+    assert urgente.esperar() == (8, 0)
+    # Tres filas del trabajo con peso 3 por cada una del de peso 1
+    assert orden[:8].count('b') == 6
+    p.detener()
+
+
+def test_limite_por_trabajo():
+    en_vuelo = []
+    actual = 0
+    lock = threading.Lock()
+
+    def procesar(ctx, fila):
+        nonlocal actual
+        with lock:
+            actual += 1
+            en_vuelo.append(actual)
+        time.sleep(0.01)
+        with lock:
+            actual -= 1
+        return fila % 2 == 0
+
+    p = planificador(num_trabajadores=4)
+    assert p.procesar('t', range(10), procesar, limite=1) == (5, 5)
+    assert max(en_vuelo) == 1
+    p.detener()
+
+
+def test_navegador_que_no_arranca_falla_sus_filas():
+    fallidas = []
+
+    def crear_contexto(id_trabajador):
+        raise RuntimeError("geckodriver no encontrado")
+
+    p = planificador(crear_contexto=crear_contexto)
+    resultado = p.procesar('t', ['u1', 'u2'], lambda ctx, fila: True,
+                           fallar_fila=lambda fila, error: fallidas.append((fila, str(error))))
+
+    assert resultado == (0, 2)
+    assert fallidas == [('u1', "geckodriver no encontrado"), ('u2', "geckodriver no encontrado")]
+    p.detener()
+
+
+def test_error_inesperado_falla_la_fila():
+    fallidas = []
+
+    def procesar(ctx, fila):
+        if fila == 'mala':
+            raise KeyError('contra')
+        return True
+
+    p = planificador()
+    resultado = p.procesar('t', ['buena', 'mala'], procesar,
+                           fallar_fila=lambda fila, error: fallidas.append(fila))
+
+    assert resultado == (1, 1)
+    assert fallidas == ['mala']
+    p.detener()
+
+
+def test_error_de_lectura_despues_de_lo_leido():
+    def filas():
+        yield 'u1'
+        yield 'u2'
+        raise ValueError("archivo dañado")
+
+    procesadas = []
+    p = planificador()
+    trabajo = p.enviar('t', filas(), lambda ctx, fila: procesadas.append(fila) or True)
+
+    with pytest.raises(ValueError, match="archivo dañado"):
+        trabajo.esperar()
+    assert procesadas == ['u1', 'u2']
+    p.detener()
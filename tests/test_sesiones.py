@@ -0,0 +1,177 @@
+import threading
+import time
+
+from sesiones import GestorSesiones, Relevos
+
+
+class Driver:
+    def __init__(self, vivo=True, puerta=None):
+        self.vivo = vivo
+        self.puerta = puerta
+        self.pings = 0
+
+    @property
+    def title(self):
+        self.pings += 1
+        if self.puerta is not None:
+            self.puerta.wait(5)
+        if not self.vivo:
+            raise ConnectionError("geckodriver no responde")
+        return ''
+
+
+class Ctx:
+    def __init__(self, nombre, driver=None):
+        self.id = nombre
+        self.nombre = nombre
+        self.driver = driver or Driver()
+
+
+def gestor(**opciones):
+    lanzados, cerrados = [], []
+
+    def fabrica(id_trabajador):
+        ctx = Ctx(f'nuevo{len(lanzados)}')
+        lanzados.append(ctx)
+        return ctx
+
+    g = GestorSesiones(fabrica, cerrados.append, tamano=4, **opciones)
+    return g, lanzados, cerrados
+
+
+def dejar_libre(g, ctx, hace):
+    g._libres.append((ctx, time.monotonic() - hace))
+
+
+def test_un_ping_colgado_no_deja_sin_navegadores_libres():
+    g, lanzados, _ = gestor(keepalive=10)
+    puerta = threading.Event()
+    colgado = Ctx('colgado', Driver(puerta=puerta))
+    dejar_libre(g, colgado, 60)
+    dejar_libre(g, Ctx('sano'), 60)
+
+    revision = threading.Thread(target=g.revisar_libres, daemon=True)
+    revision.start()
+    limite = time.monotonic() + 5
+    while colgado.driver.pings == 0:
+        assert time.monotonic() < limite
+        time.sleep(0.005)
+
+    # Mientras el ping está colgado, el otro navegador sigue disponible
+    assert g.obtener(1).nombre == 'sano'
+    assert lanzados == []
+    puerta.set()
+    revision.join(5)
+    assert [ctx.nombre for ctx, _ in g._libres] == ['colgado']
+
+
+def test_descarta_muertos_y_no_toca_los_recien_usados():
+    g, _, cerrados = gestor(keepalive=10)
+    muerto = Ctx('muerto', Driver(vivo=False))
+    reciente = Ctx('reciente')
+    dejar_libre(g, muerto, 60)
+    dejar_libre(g, reciente, 1)
+
+    g.revisar_libres()
+
+    assert cerrados == [muerto]
+    assert reciente.driver.pings == 0
+    assert [ctx.nombre for ctx, _ in g._libres] == ['reciente']
+
+
+def test_cierra_los_inactivos_que_sobran():
+    g, _, cerrados = gestor(keepalive=10, inactividad_max=100)
+    g.minimo = 1
+    viejos = [Ctx('viejo1'), Ctx('viejo2')]
+    for ctx in viejos:
+        dejar_libre(g, ctx, 500)
+
+    g.revisar_libres()
+
+    assert cerrados == [viejos[0]]
+    assert [ctx.nombre for ctx, _ in g._libres] == ['viejo2']
+
+
+class Control:
+    def __init__(self, lugares):
+        self.lugares = lugares
+
+    def intentar_entrar(self):
+        if self.lugares == 0:
+            return False
+        self.lugares -= 1
+        return True
+
+    def salir(self):
+        self.lugares += 1
+
+
+def relevos_listos(control=None):
+    g, lanzados, cerrados = gestor()
+    relevos = Relevos(g, 1, control)
+    trabajador = Ctx('trabajador')
+    # El primer final se hace en el trabajador mientras arranca el navegador de relevo
+    assert not relevos.relevar(trabajador, lambda saliente: True)
+    limite = time.monotonic() + 5
+    while not relevos.estadisticas()['libres']:
+        assert time.monotonic() < limite
+        time.sleep(0.005)
+    return g, relevos, trabajador, lanzados, cerrados
+
+
+def test_el_relevo_termina_la_fila_con_el_navegador_del_trabajador():
+    control = Control(1)
+    g, relevos, trabajador, lanzados, _ = relevos_listos(control)
+    de_la_fila, limpio = trabajador.driver, lanzados[0].driver
+    terminados = []
+    puerta = threading.Event()
+
+    def terminar(saliente):
+        terminados.append(saliente.driver)
+        puerta.wait(5)
+        return True
+
+    assert relevos.relevar(trabajador, terminar)
+    # El trabajador sigue con el navegador limpio del relevo
+    assert trabajador.driver is limpio
+    assert control.lugares == 0  # el final ocupa un lugar hasta terminar
+    puerta.set()
+    relevos.esperar()
+
+    assert terminados == [de_la_fila]
+    assert control.lugares == 1
+    assert g._libres == []  # el pool del gestor no presta ni recibe navegadores
+    assert relevos.estadisticas() == {
+        'maximo': 1, 'en_curso': 0, 'libres': 1, 'relevos': 1, 'sin_relevo': 1, 'lanzados': 1}
+
+
+def test_sin_lugar_de_concurrencia_termina_el_trabajador():
+    control = Control(0)
+    _, relevos, trabajador, _, _ = relevos_listos(control)
+    propio = trabajador.driver
+
+    assert not relevos.relevar(trabajador, lambda saliente: True)
+    assert trabajador.driver is propio
+    assert relevos.estadisticas()['libres'] == 1
+
+
+def test_si_falla_la_confirmacion_en_el_relevo_se_cierra_y_se_repone():
+    control = Control(1)
+    g, relevos, trabajador, lanzados, cerrados = relevos_listos(control)
+    de_la_fila = trabajador.driver
+
+    def terminar(saliente):
+        raise TimeoutError('no llegó la confirmación')
+
+    assert relevos.relevar(trabajador, terminar)
+    relevos.esperar()
+
+    assert [ctx.driver for ctx in cerrados] == [de_la_fila]
+    assert control.lugares == 1
+    assert relevos.estadisticas()['lanzados'] == 0
+    # El siguiente final lanza otro navegador de relevo en su lugar
+    assert not relevos.relevar(trabajador, lambda saliente: True)
+    limite = time.monotonic() + 5
+    while len(lanzados) < 2:
+        assert time.monotonic() < limite
+        time.sleep(0.005)
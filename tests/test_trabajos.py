@@ -0,0 +1,172 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import automatizacion
+import lectura
+import progreso
+from models import FilaTrabajo
+from persistencia import almacen
+from pool_navegadores import Planificador
+
+
+def filas_de(*usuarios):
+    return [(numero, {'usuario': usuario, 'e_no': f'E{usuario}', 'contra': 'clave'})
+            for numero, usuario in enumerate(usuarios)]
+
+
+def test_fila_sin_navegador_queda_fallida_en_la_base_y_el_progreso():
+    trabajo_id = almacen.crear_trabajo('sin_navegador.csv')
+    seguimiento = progreso.registrar(trabajo_id, 'sin_navegador.csv')
+
+    def crear_contexto(id_trabajador):
+        raise RuntimeError("Firefox no arrancó")
+
+    p = Planificador(1, crear_contexto, lambda ctx: None)
+    filas = almacen.registrar_filas(trabajo_id, filas_de('sinnav1', 'sinnav2'), seguimiento.omitir)
+    assert p.procesar(trabajo_id, seguimiento.seguir(filas), automatizacion.procesar_usuario,
+                      fallar_fila=automatizacion.fallar_sin_procesar) == (0, 2)
+    p.detener()
+
+    assert [(f['estado'], f['error']) for f in almacen.resultados(trabajo_id)] == [
+        ('fallido', "[desconocido] Firefox no arrancó")] * 2
+    assert [f.estado for f in seguimiento.filas] == ['fallido', 'fallido']
+    # Las fallidas no bloquean una nueva subida del mismo usuario
+    nuevo = almacen.crear_trabajo('de_nuevo.csv')
+    assert len(list(almacen.registrar_filas(nuevo, filas_de('sinnav1')))) == 1
+
+
+def test_no_guarda_los_datos_de_la_fila():
+    trabajo_id = almacen.crear_trabajo('sin_datos.csv')
+    list(almacen.registrar_filas(trabajo_id, filas_de('sindatos1')))
+
+    with almacen.app.app_context():
+        columnas = FilaTrabajo.__table__.columns.keys()
+        guardadas = [tuple(str(getattr(f, c)) for c in columnas)
+                     for f in FilaTrabajo.query.filter_by(trabajo_id=trabajo_id)]
+    assert guardadas and not any('clave' in valor for fila in guardadas for valor in fila)
+
+
+def test_reanudar_relee_las_pendientes_del_archivo(tmp_path):
+    ruta = tmp_path / 'reanudar.csv'
+    ruta.write_text('usuario\n' + '\n'.join(f'rean{i}' for i in range(5)) + '\n', encoding='utf-8')
+    trabajo_id = almacen.crear_trabajo(str(ruta))
+
+    def leer(ruta):
+        # Lo que hace la app: cada fila con su posición en el archivo
+        for numero, fila in enumerate(lectura.leer_filas(ruta)):
+            yield numero, {**fila, 'e_no': 'E', 'contra': f'clave{numero}'}
+
+    # El proceso se cae con la fila 0 enviada, la 1 a medio formulario, la 2 tras
+    # enviarlo y la 3 registrada sin empezar; la 4 no llegó a leerse
+    registradas = almacen.registrar_filas(trabajo_id, leer(str(ruta)))
+    ids = [next(registradas)[0] for _ in range(4)]
+    almacen.marcar_resultado(ids[0], True)
+    almacen.marcar_paso(ids[1], 'iniciar_sesion')
+    almacen.marcar_paso(ids[2], 'formulario')
+
+    reanudadas = list(almacen.filas_para_reanudar(trabajo_id, leer))
+
+    assert [(numero, datos['contra']) for _, numero, datos in reanudadas] == [
+        (1, 'clave1'), (3, 'clave3'), (4, 'clave4')]
+    assert [fila_id for fila_id, _, _ in reanudadas][:2] == [ids[1], ids[3]]
+    assert [f['estado'] for f in almacen.resultados(trabajo_id)] == [
+        'enviado', 'en_proceso', 'enviado', 'pendiente', 'pendiente']
+
+
+def test_reanudar_sin_archivo_deja_las_pendientes_fallidas(tmp_path):
+    trabajo_id = almacen.crear_trabajo(str(tmp_path / 'borrado.csv'))
+    list(almacen.registrar_filas(trabajo_id, filas_de('borrado1', 'borrado2')))
+
+    assert list(almacen.filas_para_reanudar(trabajo_id, lambda ruta: [])) == []
+    assert [(f['estado'], f['error']) for f in almacen.resultados(trabajo_id)] == [
+        ('fallido', 'archivo no disponible para reanudar')] * 2
+
+
+def test_error_general_cierra_el_stream():
+    import app
+
+    trabajo_id = almacen.crear_trabajo('roto.csv', motor='http')
+    seguimiento = progreso.registrar(trabajo_id, 'roto.csv', 'http')
+
+    def filas():
+        raise ValueError("archivo dañado")
+        yield
+
+    app.procesar_trabajo(seguimiento, filas(), motor='http')
+
+    respuesta = app.app.test_client().get(f'/jobs/{trabajo_id}/stream')
+    eventos = respuesta.get_data(as_text=True)
+    assert eventos.endswith('event: fin\ndata: {"estado": "error", "error": "archivo dañado"}\n\n')
+    assert seguimiento.resumen()['estado'] == 'error'
+
+
+def test_reanudar_no_reenvia_la_fila_cortada_durante_el_envio():
+    trabajo_id = almacen.crear_trabajo('cortado.csv')
+    ids = [fila_id for fila_id, _, _ in almacen.registrar_filas(trabajo_id, filas_de('cort0', 'cort1'))]
+    almacen.marcar_paso(ids[0], 'completar_formulario')
+    almacen.marcar_paso(ids[1], 'enviando')
+
+    assert list(almacen.filas_pendientes(trabajo_id).values()) == [ids[0]]
+    cortada = almacen.resultados(trabajo_id)[1]
+    assert cortada['estado'] == 'fallido' and cortada['error'].startswith('[incierto]')
+
+
+def test_el_motor_no_importa_la_web():
+    codigo = "import sys, automatizacion, lote; print('app' in sys.modules)"
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+    assert salida.stdout.splitlines()[0] == 'False'
+
+
+def test_reanudar_arranca_los_trabajos_a_la_vez(tmp_path, monkeypatch):
+    import app
+
+    puerta = threading.Event()
+    empezados = []
+
+    def procesar_trabajo(seguimiento, filas, *args):
+        empezados.append(seguimiento.id)
+        puerta.wait(5)
+
+    monkeypatch.setattr(app, 'procesar_trabajo', procesar_trabajo)
+    trabajos = []
+    for i in range(2):
+        ruta = tmp_path / f'reanudar{i}.csv'
+        ruta.write_text('usuario\n', encoding='utf-8')
+        trabajos.append(almacen.crear_trabajo(str(ruta)))
+
+    app.reanudar_trabajos()  # no espera a que termine el primero
+    try:
+        limite = time.monotonic() + 5
+        while not set(trabajos) <= set(empezados):
+            assert time.monotonic() < limite, "los trabajos no arrancaron a la vez"
+            time.sleep(0.01)
+    finally:
+        puerta.set()
+
+
+def test_importar_la_app_no_reanuda():
+    codigo = ("import threading, app; "
+              "print(sorted(h.name for h in threading.enumerate() if h.name != 'MainThread'))")
+    entorno = {**os.environ, 'REANUDAR_AL_ARRANCAR': '1', 'PRECALENTAR_NAVEGADORES': '1'}
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True,
+                            check=True, env=entorno)
+    assert salida.stdout.splitlines()[0] == '[]'
+
+
+def test_servidor_de_desarrollo_reanuda_solo_en_el_hijo_del_recargador(monkeypatch):
+    import app
+
+    arranques = []
+    monkeypatch.setattr(app, 'arrancar_segundo_plano', lambda: arranques.append(os.getpid()))
+    monkeypatch.setattr(app.app, 'run', lambda **opciones: None)
+
+    monkeypatch.delenv('WERKZEUG_RUN_MAIN', raising=False)
+    app.servidor_desarrollo()  # proceso vigilante del recargador
+    assert arranques == []
+
+    monkeypatch.setenv('WERKZEUG_RUN_MAIN', 'true')
+    app.servidor_desarrollo()  # hijo que atiende
+    assert len(arranques) == 1
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import validacion
+
+
+def fila(usuario='ana', **cambios):
+    return {
+        'usuario': usuario, 'contra': 'clave', 'expedicion': '01/02/2024', 'expiracion': '01/02/2030',
+        'e_no': '100001', 'e_expedicion': '2024-02-01', 'e_expiracion': '2026-02-01',
+        'salario': '25000', 'profesion': 'Agricultor', 'empresa': 'Finca SRL', 'rnc': '101000001',
+        'societario': 'SRL', **cambios,
+    }
+
+
+def validar(filas, **opciones):
+    rechazos = []
+    validas = list(validacion.validar(
+        iter(filas), lambda numero, usuario, motivos: rechazos.append((numero, usuario, motivos)),
+        **opciones))
+    return validas, rechazos
+
+
+def test_normaliza_fechas_codigos_y_salario():
+    validas, rechazos = validar([fila(
+        e_no=100000.0, rnc=101000001.0, expedicion=datetime(2024, 2, 1), expiracion=47150,
+        salario='RD$ 25,000.50')])
+
+    assert rechazos == []
+    [(numero, datos)] = validas
+    assert numero == 0
+    assert datos['e_no'] == '100000'
+    assert datos['rnc'] == '101000001'
+    assert datos['expedicion'] == '01/02/2024'
+    assert datos['expiracion'] == '01/02/2029'  # número de serie de Excel
+    assert datos['e_expedicion'] == '01/02/2024'
+    assert datos['salario'] == '25000.50'
+
+
+def test_contra_conserva_espacios_y_solo_pierde_el_punto_cero():
+    validas, rechazos = validar([fila(contra=' clave '), fila('beto', contra=1234.0), fila('ceci', contra='   ')])
+
+    assert [datos['contra'] for _, datos in validas] == [' clave ', '1234']
+    assert rechazos == [(2, 'ceci', ['falta contra'])]
+
+
+def test_rechaza_con_motivos_y_numero_de_fila_del_archivo():
+    validas, rechazos = validar([
+        fila('ana'),
+        fila('beto', contra='', salario='-5'),
+        fila('carla', expedicion='31/31/2024', e_expiracion='2023-01-01'),
+        fila('dani'),
+    ])
+
+    assert [numero for numero, _ in validas] == [0, 3]
+    assert rechazos == [
+        (1, 'beto', ['falta contra', 'salario inválido']),
+        (2, 'carla', ['fecha inválida en expedicion', 'e_expiracion anterior a e_expedicion']),
+    ]
+
+
+def test_fila_corregida_mas_abajo_no_es_duplicada():
+    validas, rechazos = validar([fila('ana', expedicion='no es fecha'), fila('ana'), fila('ana')])
+
+    assert [numero for numero, _ in validas] == [1]
+    assert [(numero, motivos) for numero, _, motivos in rechazos] == [
+        (0, ['fecha inválida en expedicion']),
+        (2, ['usuario duplicado en el archivo']),
+    ]
+
+
+def test_duplicados_entre_bloques():
+    filas = [fila('ana'), fila('beto', salario=''), fila('beto'), fila('ana'), fila('beto')]
+    validas, rechazos = validar(filas, tamano_bloque=2)
+
+    assert [(numero, datos['usuario']) for numero, datos in validas] == [(0, 'ana'), (2, 'beto')]
+    assert [(numero, motivos) for numero, _, motivos in rechazos] == [
+        (1, ['falta salario']),
+        (3, ['usuario duplicado en el archivo']),
+        (4, ['usuario duplicado en el archivo']),
+    ]
+
+
+def test_columnas_faltantes():
+    assert validacion.columnas_faltantes(['usuario', 'contra']) == [
+        columna for columna in validacion.COLUMNAS_REQUERIDAS if columna not in ('usuario', 'contra')]
@@ -0,0 +1,220 @@
+"""Registro persistente de trabajos y filas.
+
+Cada fila queda guardada con su estado y el último paso completado, así un
+reinicio a mitad de lote solo reprocesa lo pendiente, y volver a subir el
+mismo archivo no reenvía a quien ya se envió (clave `usuario` + `e_no`).
+
+La base no guarda los datos de la fila (contraseña incluida), solo su
+posición en el archivo: al reanudar se relee el archivo subido, que se
+conserva hasta que el trabajo termina.
+"""
+import os
+import uuid
+from datetime import datetime
+
+from models import FilaTrabajo, Trabajo, db
+
+# Motor de envío por defecto: 'navegador' (Selenium) o 'http' (sin navegador,
+# con respaldo en Selenium para las filas que no entiende)
+MOTORES = ('navegador', 'http')
+MOTOR_ENVIO = os.environ.get("MOTOR_ENVIO", "navegador")
+
+# Si el último paso completado es uno de estos, la solicitud ya llegó al portal
+PASOS_ENVIADO = ('formulario', 'cerrar_sesion')
+
+# Se anota justo antes del último envío: una fila que se quedó aquí pudo llegar o no al portal
+PASO_ENVIANDO = 'enviando'
+ERROR_ENVIO_INCIERTO = "[incierto] el proceso se detuvo durante el envío final; revisar en el portal"
+
+# Estados de fila que impiden volver a encolar al mismo usuario + carnet
+ESTADOS_OCUPADOS = ('pendiente', 'en_proceso', 'enviado')
+
+
+def clave(valor):
+    """Texto estable para comparar usuario/e_no venga de xlsx, xls o csv."""
+    if valor is None or valor != valor:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def nuevo_id_trabajo():
+    return uuid.uuid4().hex
+
+
+class AlmacenTrabajos:
+    """Acceso a la base de trabajos desde los hilos de procesamiento."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def crear_trabajo(self, archivo, trabajo_id=None, motor='navegador'):
+        with self.app.app_context():
+            trabajo = Trabajo(id=trabajo_id or nuevo_id_trabajo(), archivo=archivo, motor=motor)
+            db.session.add(trabajo)
+            db.session.commit()
+            return trabajo.id
+
+    def registrar_filas(self, trabajo_id, filas, al_omitir=None, pendientes=None):
+        """Guarda cada (numero, datos) leído y genera (fila_id, numero, datos) de las que hay que procesar.
+
+        `numero` es la posición de la fila en el archivo. Las filas ya
+        registradas en este trabajo (al reanudar) no se vuelven a insertar:
+        solo se generan las de `pendientes` (numero -> fila_id). Las que ya
+        están enviadas o en cola en otro trabajo se marcan como omitidas.
+        """
+        pendientes = pendientes or {}
+        with self.app.app_context():
+            ya_registradas = db.session.query(db.func.max(FilaTrabajo.numero)).filter_by(
+                trabajo_id=trabajo_id).scalar()
+        ya_registradas = -1 if ya_registradas is None else ya_registradas
+
+        for numero, datos in filas:
+            if numero <= ya_registradas:
+                fila_id = pendientes.pop(numero, None)
+                if fila_id is not None:
+                    yield fila_id, numero, datos
+                continue
+            usuario, e_no = clave(datos.get('usuario')), clave(datos.get('e_no'))
+            with self.app.app_context():
+                repetida = db.session.query(FilaTrabajo.id).filter(
+                    FilaTrabajo.usuario == usuario,
+                    FilaTrabajo.e_no == e_no,
+                    FilaTrabajo.estado.in_(ESTADOS_OCUPADOS),
+                ).first()
+                fila = FilaTrabajo(trabajo_id=trabajo_id, numero=numero, usuario=usuario, e_no=e_no,
+                                   estado='omitido' if repetida else 'pendiente')
+                db.session.add(fila)
+                db.session.commit()
+                fila_id = fila.id
+
+            if repetida:
+                print(f"↷ Usuario {usuario} ({e_no}) ya enviado o en cola, se omite")
+                if al_omitir:
+                    al_omitir(usuario)
+                continue
+            yield fila_id, numero, datos
+
+    def filas_pendientes(self, trabajo_id):
+        """numero -> fila_id de las filas sin terminar de un trabajo interrumpido."""
+        with self.app.app_context():
+            # Las que llegaron a enviar el formulario no se reenvían, ni las que se
+            # cortaron a medio envío: esas quedan fallidas para revisarlas a mano
+            for fila in FilaTrabajo.query.filter(
+                    FilaTrabajo.trabajo_id == trabajo_id,
+                    FilaTrabajo.estado == 'en_proceso',
+                    FilaTrabajo.ultimo_paso.in_(PASOS_ENVIADO + (PASO_ENVIANDO,))):
+                enviada = fila.ultimo_paso in PASOS_ENVIADO
+                fila.estado = 'enviado' if enviada else 'fallido'
+                fila.error = None if enviada else ERROR_ENVIO_INCIERTO
+            db.session.commit()
+
+            return {numero: fila_id for numero, fila_id in db.session.query(
+                FilaTrabajo.numero, FilaTrabajo.id).filter(
+                FilaTrabajo.trabajo_id == trabajo_id,
+                FilaTrabajo.estado.in_(('pendiente', 'en_proceso')))}
+
+    def filas_para_reanudar(self, trabajo_id, leer_filas, al_omitir=None):
+        """Relee el archivo del trabajo: sus filas pendientes y el resto sin registrar.
+
+        Si el archivo ya no está, o una fila pendiente ya no aparece en él, esas
+        filas quedan como fallidas: sus datos no se guardaron en la base.
+        """
+        pendientes = self.filas_pendientes(trabajo_id)
+        ruta = self.ruta_trabajo(trabajo_id)
+        if not ruta or not os.path.exists(ruta):
+            self.fallar_filas(pendientes.values(), 'archivo no disponible para reanudar')
+            return
+        yield from self.registrar_filas(trabajo_id, leer_filas(ruta), al_omitir, pendientes)
+        self.fallar_filas(pendientes.values(), 'la fila ya no es válida en el archivo')
+
+    def fallar_filas(self, filas_id, motivo):
+        filas_id = list(filas_id)
+        if not filas_id:
+            return
+        with self.app.app_context():
+            for fila in FilaTrabajo.query.filter(FilaTrabajo.id.in_(filas_id)):
+                fila.estado = 'fallido'
+                fila.error = motivo
+            db.session.commit()
+
+    def ruta_trabajo(self, trabajo_id):
+        with self.app.app_context():
+            trabajo = db.session.get(Trabajo, trabajo_id)
+            return trabajo.archivo if trabajo else None
+
+    def motor_trabajo(self, trabajo_id):
+        with self.app.app_context():
+            trabajo = db.session.get(Trabajo, trabajo_id)
+            return trabajo.motor if trabajo else None
+
+    def marcar_paso(self, fila_id, paso):
+        with self.app.app_context():
+            fila = db.session.get(FilaTrabajo, fila_id)
+            fila.estado = 'en_proceso'
+            fila.ultimo_paso = paso
+            db.session.commit()
+
+    def marcar_resultado(self, fila_id, exito, error=None):
+        with self.app.app_context():
+            fila = db.session.get(FilaTrabajo, fila_id)
+            fila.estado = 'enviado' if exito else 'fallido'
+            fila.error = None if exito else str(error)[:2000]
+            db.session.commit()
+
+    def terminar_trabajo(self, trabajo_id):
+        with self.app.app_context():
+            trabajo = db.session.get(Trabajo, trabajo_id)
+            trabajo.estado = 'completado'
+            trabajo.terminado = datetime.utcnow()
+            db.session.commit()
+
+    def resumen(self, trabajo_id):
+        """Conteo por estado de un trabajo que ya no está en memoria."""
+        with self.app.app_context():
+            trabajo = db.session.get(Trabajo, trabajo_id)
+            if trabajo is None:
+                return None
+            cuentas = dict(db.session.query(FilaTrabajo.estado, db.func.count()).filter_by(
+                trabajo_id=trabajo_id).group_by(FilaTrabajo.estado).all())
+            return {
+                'id': trabajo.id,
+                'archivo': os.path.basename(trabajo.archivo),
+                'estado': trabajo.estado,
+                'motor': trabajo.motor,
+                'total': sum(cuentas.values()) - cuentas.get('omitido', 0),
+                'omitidas': cuentas.get('omitido', 0),
+                **{estado: cuentas.get(estado, 0)
+                   for estado in ('pendiente', 'en_proceso', 'enviado', 'fallido')},
+            }
+
+    def resultados(self, trabajo_id):
+        """Estado final de cada fila del trabajo, en el orden del archivo."""
+        with self.app.app_context():
+            return [{
+                'numero': fila.numero,
+                'usuario': fila.usuario,
+                'e_no': fila.e_no,
+                'estado': fila.estado,
+                'ultimo_paso': fila.ultimo_paso,
+                'error': fila.error,
+            } for fila in FilaTrabajo.query.filter_by(trabajo_id=trabajo_id).order_by(FilaTrabajo.numero)]
+
+    def trabajos_inconclusos(self):
+        with self.app.app_context():
+            return [t.id for t in Trabajo.query.filter_by(estado='en_curso').order_by(Trabajo.creado)]
+
+    def abandonar_trabajo(self, trabajo_id, motivo='interrumpido'):
+        """Cierra un trabajo sin reanudarlo, dejando sus filas como fallidas."""
+        with self.app.app_context():
+            for fila in FilaTrabajo.query.filter(
+                    FilaTrabajo.trabajo_id == trabajo_id,
+                    FilaTrabajo.estado.in_(('pendiente', 'en_proceso'))):
+                # Las que llegaron a enviar el formulario cuentan como enviadas
+                enviada = fila.estado == 'en_proceso' and fila.ultimo_paso in PASOS_ENVIADO
+                incierta = fila.estado == 'en_proceso' and fila.ultimo_paso == PASO_ENVIANDO
+                fila.estado = 'enviado' if enviada else 'fallido'
+                fila.error = None if enviada else ERROR_ENVIO_INCIERTO if incierta else motivo
+            db.session.commit()
+        self.terminar_trabajo(trabajo_id)
@@ -0,0 +1,171 @@
+"""Validación previa de las filas antes de gastar tiempo de navegador.
+
+Las filas leídas en streaming se agrupan en bloques y cada bloque se revisa
+con pandas en una sola pasada por columna: columnas obligatorias presentes
+y con valor, fechas y salario normalizados al texto que espera el portal,
+números guardados como float (100000.0) devueltos como código ('100000') y
+usuarios repetidos en el archivo descartados (entre las filas que por lo
+demás son válidas: una fila corregida más abajo reemplaza a una inválida).
+Las filas rechazadas se reportan con `al_rechazar` y nunca llegan a un
+navegador.
+"""
+import os
+
+COLUMNAS_REQUERIDAS = (
+    'usuario', 'contra', 'expedicion', 'expiracion', 'e_no', 'e_expedicion',
+    'e_expiracion', 'salario', 'profesion', 'empresa', 'rnc', 'societario',
+)
+COLUMNAS_FECHA = ('expedicion', 'expiracion', 'e_expedicion', 'e_expiracion')
+COLUMNAS_CODIGO = ('usuario', 'contra', 'e_no', 'rnc')  # números que son identificadores
+COLUMNAS_TEXTO = ('profesion', 'empresa', 'societario')
+# Los espacios pueden ser parte de la contraseña: no se recortan
+COLUMNAS_SIN_RECORTE = ('contra',)
+
+# (expedición, expiración) que deben venir en orden
+RANGOS_FECHA = (('expedicion', 'expiracion'), ('e_expedicion', 'e_expiracion'))
+
+# Formato de fecha de los campos del portal
+FORMATO_FECHA = os.environ.get("FORMATO_FECHA_PORTAL", "%d/%m/%Y")
+
+# Filas por bloque validado (el primero es corto para que el primer navegador no espere)
+TAMANO_BLOQUE = int(os.environ.get("TAMANO_BLOQUE_VALIDACION", "500"))
+PRIMER_BLOQUE = 50
+
+_VACIOS = ('', 'nan', 'none', 'nat', 'null')
+
+
+def columnas_faltantes(columnas):
+    return [columna for columna in COLUMNAS_REQUERIDAS if columna not in columnas]
+
+
+def columnas_faltantes_archivo(ruta, leer_filas):
+    """Columnas obligatorias que no están en el encabezado (lee solo la primera fila)."""
+    filas = leer_filas(ruta)
+    try:
+        primera = next(filas, None)
+    finally:
+        filas.close()
+    if primera is None:
+        return []
+    return columnas_faltantes(primera.keys())
+
+
+def _vacio(serie, texto):
+    return serie.isna() | texto.str.lower().isin(_VACIOS)
+
+
+def _texto(serie):
+    return serie.astype(str).str.strip()
+
+
+def _codigo(serie, recortar=True):
+    """Texto del valor; los números enteros guardados como float pierden el '.0'."""
+    import pandas as pd
+
+    texto = _texto(serie) if recortar else serie.astype(str)
+    no_texto = serie.map(lambda valor: not isinstance(valor, str))
+    numero = pd.to_numeric(serie.where(no_texto), errors='coerce')
+    entero = numero.notna() & (numero % 1 == 0)
+    return texto.mask(entero, numero[entero].astype('int64').astype(str))
+
+
+def _fecha(serie):
+    """Fechas de Excel, datetime, ISO (aaaa-mm-dd) o dd/mm/aaaa; NaT si no se entiende."""
+    import pandas as pd
+
+    texto = _texto(serie)
+    es_numero = serie.map(lambda valor: isinstance(valor, (int, float)) and not isinstance(valor, bool))
+    es_iso = texto.str.match(r'^\d{4}-\d{1,2}-\d{1,2}')
+
+    fechas = pd.to_datetime(serie.where(~es_numero & ~es_iso), errors='coerce', dayfirst=True, format='mixed')
+    iso = pd.to_datetime(texto.where(es_iso).str.slice(0, 10), errors='coerce', format='ISO8601')
+    # Número de serie de Excel (días desde 1899-12-30)
+    seriales = pd.to_datetime(pd.to_numeric(serie.where(es_numero), errors='coerce'),
+                              unit='D', origin='1899-12-30', errors='coerce')
+    return fechas.fillna(iso).fillna(seriales)
+
+
+def _salario(serie):
+    import pandas as pd
+
+    limpio = _texto(serie).str.replace(r'[^\d.\-]', '', regex=True)
+    return pd.to_numeric(limpio.where(limpio != ''), errors='coerce')
+
+
+def _validar_bloque(filas, inicio, vistos, al_rechazar):
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(filas)
+    df.index = range(inicio, inicio + len(df))
+    for columna in columnas_faltantes(df.columns):
+        df[columna] = None
+
+    errores = {}  # motivo -> máscara booleana de filas con ese problema
+    normal = pd.DataFrame(index=df.index)
+
+    for columna in COLUMNAS_CODIGO + COLUMNAS_TEXTO:
+        if columna in COLUMNAS_CODIGO:
+            valores = _codigo(df[columna], recortar=columna not in COLUMNAS_SIN_RECORTE)
+        else:
+            valores = _texto(df[columna])
+        errores[f'falta {columna}'] = _vacio(df[columna], _texto(df[columna]))
+        normal[columna] = valores
+
+    fechas = {}
+    for columna in COLUMNAS_FECHA:
+        fechas[columna] = _fecha(df[columna])
+        vacia = _vacio(df[columna], _texto(df[columna]))
+        errores[f'falta {columna}'] = vacia
+        errores[f'fecha inválida en {columna}'] = fechas[columna].isna() & ~vacia
+        normal[columna] = fechas[columna].dt.strftime(FORMATO_FECHA)
+    for desde, hasta in RANGOS_FECHA:
+        errores[f'{hasta} anterior a {desde}'] = fechas[hasta] < fechas[desde]
+
+    salario = _salario(df['salario'])
+    vacio = _vacio(df['salario'], _texto(df['salario']))
+    errores['falta salario'] = vacio
+    errores['salario inválido'] = ~vacio & (salario.isna() | (salario <= 0))
+    entero = salario.notna() & (salario % 1 == 0)
+    normal['salario'] = salario.map('{:.2f}'.format).mask(entero, salario[entero].astype('int64').astype(str))
+
+    # Usuarios repetidos (en el mismo bloque o en uno anterior): gana la primera
+    # aparición válida; una fila rechazada por otro motivo no le quita el sitio a otra
+    validas = ~pd.DataFrame(errores).any(axis=1)
+    usuario = normal['usuario']
+    repetido = usuario[validas].duplicated(keep='first').reindex(df.index, fill_value=False)
+    errores['usuario duplicado en el archivo'] = validas & (repetido | usuario.isin(vistos))
+
+    mascaras = pd.DataFrame(errores)
+    rechazadas = mascaras.any(axis=1)
+    vistos.update(usuario[~rechazadas])
+
+    if rechazadas.any() and al_rechazar:
+        for numero, fila in mascaras[rechazadas].iterrows():
+            motivos = [motivo for motivo, tiene in fila.items() if tiene]
+            al_rechazar(numero, normal.at[numero, 'usuario'], motivos)
+
+    normal = normal[~rechazadas]
+    for posicion, registro in zip(normal.index, normal.to_dict('records')):
+        yield posicion, {**filas[posicion - inicio], **registro}
+
+
+def validar(filas, al_rechazar=None, tamano_bloque=TAMANO_BLOQUE):
+    """Genera (numero, fila) de las filas válidas ya normalizadas.
+
+    `numero` es la posición de la fila contada desde 0 entre las filas de
+    datos del archivo, la misma que recibe `al_rechazar(numero, usuario,
+    motivos)` por cada fila descartada.
+    """
+    vistos = set()
+    bloque = []
+    inicio = 0
+    limite = min(PRIMER_BLOQUE, tamano_bloque)
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= limite:
+            yield from _validar_bloque(bloque, inicio, vistos, al_rechazar)
+            inicio += len(bloque)
+            bloque = []
+            limite = tamano_bloque
+    if bloque:
+        yield from _validar_bloque(bloque, inicio, vistos, al_rechazar)